@@ -2,7 +2,7 @@ import React, { useState, useCallback } from "react";
 import { View, Text, FlatList, StyleSheet } from "react-native";
 import { useFocusEffect } from "expo-router";
 import ScreenContainer from "../../components/ScreenContainer";
-import { getDataAuth } from "../../services/apiClient";
+import { getAllIssuePages } from "../../services/complaintService";
 import AsyncStorage from "@react-native-async-storage/async-storage";
 
 export default function Tracking() {
@@ -11,8 +11,7 @@ export default function Tracking() {
   const load = async () => {
     try {
       const token = await AsyncStorage.getItem("access");
-      const data = await getDataAuth("issues/user/", token!);
-      setList(data.issues || []);
+      setList(await getAllIssuePages("issues/user/", token!));
     } catch (error) {
       console.error("Failed to load complaints:", error);
       setList([]);
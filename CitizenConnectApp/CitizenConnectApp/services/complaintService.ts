@@ -27,6 +27,24 @@ function mapComplaint(raw: any): Complaint {
   };
 }
 
+/* ---------- Pagination ---------- */
+
+// Issue lists come a page at a time (newest first); follow next_cursor
+// until the last page so callers still get every issue
+export async function getAllIssuePages(endpoint: string, token: string): Promise<any[]> {
+  const issues: any[] = [];
+  let cursor: string | null = null;
+  do {
+    const query: string = cursor
+      ? `?limit=200&cursor=${encodeURIComponent(cursor)}`
+      : "?limit=200";
+    const data: any = await getDataAuth(`${endpoint}${query}`, token);
+    issues.push(...(data.issues || []));
+    cursor = data.next_cursor || null;
+  } while (cursor);
+  return issues;
+}
+
 /* ---------- User APIs ---------- */
 
 // Report a new complaint
@@ -52,8 +70,8 @@ export async function addComplaint(
 
 // Get all complaints of the logged-in user
 export async function getComplaints(token: string): Promise<Complaint[]> {
-  const data = await getDataAuth("issues/user/", token);
-  return (data.issues || []).map(mapComplaint);
+  const issues = await getAllIssuePages("issues/user/", token);
+  return issues.map(mapComplaint);
 }
 
 // Get a specific complaint by ID
@@ -61,8 +79,13 @@ export async function getComplaintById(
   id: string,
   token: string
 ): Promise<Complaint | null> {
-  const list = await getComplaints(token);
-  return list.find((c) => String(c.id) === String(id)) ?? null;
+  try {
+    const data = await getDataAuth(`issues/${id}/`, token);
+    return mapComplaint(data.issue);
+  } catch (err: any) {
+    if (err.status === 404) return null;
+    throw err;
+  }
 }
 
 /* ---------- Admin APIs ---------- */
@@ -107,8 +130,8 @@ export async function updateComplaintStatus(
 
 // Get all complaints (admin)
 export async function getAllComplaints(token: string): Promise<Complaint[]> {
-  const data = await getDataAuth("admin/issues/", token);
-  return (data.issues || []).map(mapComplaint);
+  const issues = await getAllIssuePages("admin/issues/", token);
+  return issues.map(mapComplaint);
 }
 
 /* ---------- Feedback ---------- */
@@ -0,0 +1,48 @@
+"""
+Database profiles for settings.py.
+
+``sqlite_profile`` turns a SQLite file path into a tuned ``DATABASES`` entry:
+
+- WAL journaling, so readers never block the writer and vice versa;
+- ``synchronous=NORMAL``, which is durable in WAL mode except across power loss;
+- a busy timeout, so concurrent writers queue instead of failing with
+  "database is locked";
+- ``BEGIN IMMEDIATE`` transactions, which take the write lock up front and so
+  avoid lock-upgrade deadlocks between two transactions;
+- a memory-mapped read window, plus persistent connections with health checks.
+
+A replica profile opens the file with ``PRAGMA query_only`` and leaves the
+journal mode to the primary that writes it (e.g. a LiteFS/Litestream copy).
+``journal_mode=None`` leaves the file's journal mode alone too (settings do
+that for the development database committed to the repository).
+"""
+
+
+def sqlite_profile(name, conn_max_age=600, busy_timeout_ms=5000, mmap_size=256 * 1024 * 1024,
+                   replica=False, journal_mode='WAL'):
+    pragmas = [
+        f'PRAGMA busy_timeout={int(busy_timeout_ms)}',
+        f'PRAGMA mmap_size={int(mmap_size)}',
+        'PRAGMA temp_store=MEMORY',
+    ]
+    if replica:
+        pragmas.append('PRAGMA query_only=ON')
+    elif journal_mode:
+        pragmas.append(f'PRAGMA journal_mode={journal_mode}')
+        if journal_mode.upper() == 'WAL':
+            pragmas.append('PRAGMA synchronous=NORMAL')
+
+    options = {
+        'init_command': '; '.join(pragmas),
+        'timeout': busy_timeout_ms / 1000,
+    }
+    if not replica:
+        options['transaction_mode'] = 'IMMEDIATE'
+
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'CONN_MAX_AGE': conn_max_age,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': options,
+    }
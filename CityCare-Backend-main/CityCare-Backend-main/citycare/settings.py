@@ -3,9 +3,11 @@ Django settings for citycare project.
 """
 
 import os
+import tempfile
 from decouple import config
 from pathlib import Path
 from datetime import timedelta
+from .db_profiles import sqlite_profile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -43,6 +45,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',   # must be at the top for CORS
+    'core.metrics.MetricsMiddleware',
+    'core.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -72,14 +76,45 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'citycare.wsgi.application'
 
-# Database
+# Database (tuned SQLite profile, see citycare/db_profiles.py)
+# Persistent connections are per thread, and under ASGI every request's sync
+# code may run in a different thread, so they would pile up unused: asgi.py
+# sets CITYCARE_ASGI and connections are then closed after each request
+SERVED_OVER_ASGI = config('CITYCARE_ASGI', default=False, cast=bool)
+DATABASE_CONN_MAX_AGE = 0 if SERVED_OVER_ASGI else config('DATABASE_CONN_MAX_AGE', default=600, cast=int)
+SQLITE_BUSY_TIMEOUT_MS = config('SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int)
+SQLITE_MMAP_SIZE = config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int)
+
+# The db.sqlite3 committed with the repository keeps its rollback journal, so
+# running manage.py does not rewrite it or leave -wal/-shm files next to it;
+# set DATABASE_NAME (or SQLITE_JOURNAL_MODE) to get WAL
+DATABASE_NAME = config('DATABASE_NAME', default='')
+SQLITE_JOURNAL_MODE = config('SQLITE_JOURNAL_MODE', default='WAL' if DATABASE_NAME else '') or None
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': sqlite_profile(
+        DATABASE_NAME or str(BASE_DIR / 'db.sqlite3'),
+        conn_max_age=DATABASE_CONN_MAX_AGE,
+        busy_timeout_ms=SQLITE_BUSY_TIMEOUT_MS,
+        mmap_size=SQLITE_MMAP_SIZE,
+        journal_mode=SQLITE_JOURNAL_MODE,
+    )
 }
 
+# Optional read replica: read-only list views are routed to it (core/routers.py)
+DATABASE_REPLICA_NAME = config('DATABASE_REPLICA_NAME', default='')
+if DATABASE_REPLICA_NAME:
+    DATABASES['replica'] = sqlite_profile(
+        DATABASE_REPLICA_NAME,
+        conn_max_age=DATABASE_CONN_MAX_AGE,
+        busy_timeout_ms=SQLITE_BUSY_TIMEOUT_MS,
+        mmap_size=SQLITE_MMAP_SIZE,
+        replica=True,
+    )
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
 # Custom User Model
 AUTH_USER_MODEL = 'core.User'
 
@@ -113,16 +148,49 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='City Care <noreply@citycare.com>')
 
+# Email outbox (drained by `manage.py send_outbox`)
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', default=100, cast=int)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=8, cast=int)
+
+# Closed issue archive (moved by `manage.py archive_issues`, e.g. nightly from cron):
+# RESOLVED/REPORT issues untouched for this many days leave the hot table
+ISSUE_ARCHIVE_AFTER_DAYS = config('ISSUE_ARCHIVE_AFTER_DAYS', default=180, cast=int)
+ISSUE_ARCHIVE_BATCH_SIZE = config('ISSUE_ARCHIVE_BATCH_SIZE', default=500, cast=int)
+
+# Notification retention (enforced by `manage.py prune_notifications`, e.g. hourly from cron):
+# notifications expire after NOTIFICATION_TTL_DAYS unless sent with their own expiry, and
+# each user (and the global broadcast stream) keeps only the newest NOTIFICATION_MAX_PER_USER
+NOTIFICATION_TTL_DAYS = config('NOTIFICATION_TTL_DAYS', default=90, cast=int)
+NOTIFICATION_MAX_PER_USER = config('NOTIFICATION_MAX_PER_USER', default=200, cast=int)
+NOTIFICATION_PRUNE_BATCH_SIZE = config('NOTIFICATION_PRUNE_BATCH_SIZE', default=1000, cast=int)
+# Only streams sent a notification this recently are checked against the cap; keep it
+# comfortably above the interval between prune runs
+NOTIFICATION_PRUNE_LOOKBACK_HOURS = config('NOTIFICATION_PRUNE_LOOKBACK_HOURS', default=48, cast=float)
+
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson-backed; datetimes are encoded natively (see core/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
+# Password hashing runs on a bounded thread pool (see core/hashing.py);
+# 0 workers hashes inline on the request thread; 0 pending means 8 per worker
+PASSWORD_HASHING_WORKERS = config('PASSWORD_HASHING_WORKERS', default=os.cpu_count() or 1, cast=int)
+PASSWORD_HASHING_MAX_PENDING = config('PASSWORD_HASHING_MAX_PENDING', default=0, cast=int)
+
+# Users resolved from JWTs are cached per process (see core/user_cache.py)
+AUTH_USER_CACHE_SIZE = config('AUTH_USER_CACHE_SIZE', default=10000, cast=int)
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=60, cast=int)
+
 # JWT Configuration
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
@@ -138,8 +206,28 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    'TOKEN_REFRESH_SERIALIZER': 'core.tokens.TokenRefreshSerializer',
 }
 
+# Revoked refresh tokens (logout, rotation) are checked through a Bloom filter
+# (see core/tokens.py); other workers see a revocation within the sync interval
+TOKEN_BLACKLIST_BLOOM_CAPACITY = config('TOKEN_BLACKLIST_BLOOM_CAPACITY', default=100000, cast=int)
+TOKEN_BLACKLIST_BLOOM_ERROR_RATE = 0.01
+TOKEN_BLACKLIST_SYNC_INTERVAL = config('TOKEN_BLACKLIST_SYNC_INTERVAL', default=5, cast=float)
+TOKEN_BLACKLIST_PURGE_INTERVAL = config('TOKEN_BLACKLIST_PURGE_INTERVAL', default=3600, cast=float)
+
+# Request metrics (see core/metrics.py), served at /metrics to admins or to a
+# scraper sending "Authorization: Bearer <METRICS_SCRAPE_TOKEN>"
+METRICS_DIR = config('METRICS_DIR', default=os.path.join(tempfile.gettempdir(), 'citycare-metrics'))
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5, cast=float)
+METRICS_SCRAPE_TOKEN = config('METRICS_SCRAPE_TOKEN', default='')
+
+# Admin requests sent with "X-Profile: 1" are profiled (see core/profiling.py);
+# only the newest PROFILE_MAX_FILES profiles are kept
+PROFILE_DIR = config('PROFILE_DIR', default=os.path.join(tempfile.gettempdir(), 'citycare-profiles'))
+PROFILE_MAX_FILES = config('PROFILE_MAX_FILES', default=50, cast=int)
+PROFILE_SAMPLE_INTERVAL = config('PROFILE_SAMPLE_INTERVAL', default=0.001, cast=float)
+
 # ---------------------------------------------------
 # ✅ CORS Configuration (development: allow all)
 # ---------------------------------------------------
@@ -1,6 +1,12 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Issue, Notification, Feedback
+from django.db import transaction
+from django.db.models import Q
+from .changelists import SEARCH_LIMIT, LargeTableAdmin, email_or, prefix_q
+from .dedupe import INDEXED_FIELDS, reindex_issue
+from .models import User, Issue, Notification, Feedback, OutboundEmail, IssueCounter, ArchivedIssue
+from .search import search_issue_ids
+from . import counters
 
 class UserAdmin(BaseUserAdmin):
     list_display = ('email', 'name', 'is_admin', 'is_active', 'created_at')
@@ -22,14 +28,32 @@ class UserAdmin(BaseUserAdmin):
     ordering = ('email',)
     filter_horizontal = ('groups', 'user_permissions',)
 
+class ProblemTypeFilter(admin.SimpleListFilter):
+    """problem_type choices from the counters table, not SELECT DISTINCT over issues"""
+    title = 'problem type'
+    parameter_name = 'problem_type'
+
+    def lookups(self, request, model_admin):
+        types = IssueCounter.objects.filter(count__gt=0).values_list('problem_type', flat=True)
+        return [(problem_type, problem_type) for problem_type in sorted(set(types))]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(problem_type=self.value())
+        return queryset
+
 @admin.register(Issue)
-class IssueAdmin(admin.ModelAdmin):
+class IssueAdmin(LargeTableAdmin):
     list_display = ('problem', 'problem_type', 'location', 'user', 'status', 'date', 'created_at')
-    list_filter = ('status', 'problem_type', 'date', 'created_at')
-    search_fields = ('problem', 'location', 'user__name', 'user__email')
+    list_select_related = ('user',)
+    list_filter = ('status', ProblemTypeFilter, 'created_at')
+    # Searched through the full-text index (problem, location, description),
+    # or the reporter's exact email
+    search_fields = ('problem', 'location', 'description', 'user__email')
+    search_help_text = 'Words from the problem, location or description, or a reporter\'s email'
+    raw_id_fields = ('user',)
     readonly_fields = ('date', 'created_at', 'updated_at')
-    ordering = ('-created_at',)
-    
+
     fieldsets = (
         ('Issue Information', {
             'fields': ('user', 'problem', 'problem_type', 'location', 'description')
@@ -39,26 +63,76 @@ class IssueAdmin(admin.ModelAdmin):
         }),
     )
 
+    def indexed_search(self, term):
+        return email_or(term, 'user_id', lambda: Q(pk__in=search_issue_ids(term, SEARCH_LIMIT, ranked=False)))
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            old = Issue.objects.filter(pk=obj.pk).values('status', 'problem_type').first() if change else None
+            super().save_model(request, obj, form, change)
+            if old:
+                counters.record_changed(old['status'], old['problem_type'], obj.status, obj.problem_type)
+                if INDEXED_FIELDS.intersection(form.changed_data):
+                    reindex_issue(obj)
+            else:
+                counters.record_created(obj)
+
+@admin.register(ArchivedIssue)
+class ArchivedIssueAdmin(LargeTableAdmin):
+    list_display = ('problem', 'problem_type', 'location', 'user', 'status', 'created_at', 'archived_at')
+    list_select_related = ('user',)
+    list_filter = ('status', 'created_at')
+    search_fields = ('id', 'user__email')
+    search_help_text = 'An issue id, or the reporter\'s email'
+
+    def indexed_search(self, term):
+        return email_or(term, 'user_id', lambda: Q(pk=int(term)) if term.isdigit() else Q(pk__in=[]))
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 @admin.register(Notification)
-class NotificationAdmin(admin.ModelAdmin):
+class NotificationAdmin(LargeTableAdmin):
     list_display = ('title', 'target_user', 'is_global', 'created_at')
+    list_select_related = ('target_user',)
     list_filter = ('created_at',)
-    search_fields = ('title', 'message', 'target_user__name', 'target_user__email')
+    search_fields = ('title', 'target_user__email')
+    search_help_text = 'The start of the title (case-sensitive), or the recipient\'s email'
+    raw_id_fields = ('target_user',)
     readonly_fields = ('created_at',)
-    ordering = ('-created_at',)
+
+    def indexed_search(self, term):
+        return email_or(term, 'target_user_id', lambda: prefix_q('title', term))
 
     def is_global(self, obj):
-        return obj.target_user is None
+        return obj.target_user_id is None
     is_global.boolean = True
     is_global.short_description = 'Global Notification'
 
 @admin.register(Feedback)
-class FeedbackAdmin(admin.ModelAdmin):
+class FeedbackAdmin(LargeTableAdmin):
     list_display = ('issue', 'user', 'created_at')
+    list_select_related = ('issue', 'user')
     list_filter = ('created_at',)
-    search_fields = ('feedback_text', 'user__name', 'user__email', 'issue__problem')
+    search_fields = ('issue__problem', 'user__email')
+    search_help_text = 'Words from the issue, or the author\'s email'
+    raw_id_fields = ('issue', 'user')
     readonly_fields = ('created_at',)
-    ordering = ('-created_at',)
+
+    def indexed_search(self, term):
+        return email_or(term, 'user_id',
+                        lambda: Q(issue_id__in=search_issue_ids(term, SEARCH_LIMIT, ranked=False)))
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'to_email', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('to_email', 'subject')
+    readonly_fields = ('created_at', 'sent_at', 'claim_token', 'last_error')
+    ordering = ('-id',)
 
 # Register the custom User admin
 admin.site.register(User, UserAdmin)
@@ -0,0 +1,131 @@
+"""
+Hot/cold split of the issues table.
+
+Open issues and recently closed ones live in ``issues``. The
+``archive_issues`` command moves RESOLVED and REPORT issues whose last
+update is older than ``ISSUE_ARCHIVE_AFTER_DAYS`` into ``archived_issues``
+(and their feedback into ``archived_feedback``), one batch per transaction,
+so the indexes behind every list, filter and admin page only cover the
+working set and writers are never blocked for long.
+
+Archived rows keep their ids and column names, so the list projections read
+both tables alike; ``user_issues`` and ``admin_all_issues`` merge the archive
+in only for ``?history=1``, and ``issue_detail`` falls back to it on a miss.
+An issue that other hot issues are marked duplicates of stays hot until they
+are archived too, so ``duplicate_of`` links are never cleared.
+
+Dashboard counters keep counting archived issues: they describe the city's
+whole history, not the hot table.
+"""
+import time
+from collections import Counter
+from datetime import timedelta
+from django.db import connection, transaction
+from django.db.models import Count, Exists, Max, OuterRef
+from django.utils import timezone
+from .models import ArchivedFeedback, ArchivedIssue, Feedback, Issue
+from . import counters
+
+ARCHIVED_STATUSES = ('RESOLVED', 'REPORT')
+
+ISSUE_COLUMNS = (
+    'id', 'user_id', 'problem', 'problem_type', 'location', 'description', 'date',
+    'status', 'lat', 'lon', 'geohash', 'duplicate_of_id', 'created_at', 'updated_at',
+)
+FEEDBACK_COLUMNS = ('id', 'issue_id', 'user_id', 'feedback_text', 'created_at')
+
+HISTORY_VALUES = ('1', 'true', 'yes')
+
+
+def archive_cutoff(older_than_days):
+    return timezone.now() - timedelta(days=older_than_days)
+
+
+def archivable(cutoff):
+    """Closed issues last updated before ``cutoff`` that no hot issue points at"""
+    return Issue.objects.filter(status__in=ARCHIVED_STATUSES, updated_at__lt=cutoff).filter(
+        ~Exists(Issue.objects.filter(duplicate_of=OuterRef('pk'))))
+
+
+def archive_batch(cutoff, batch_size):
+    """
+    Move up to ``batch_size`` archivable issues with their feedback; returns
+    (issues, feedback) moved, or None once nothing is left to archive.
+
+    The batch is locked where the database supports it, and deleted with the
+    same filter it was read with, so an issue reopened in the meantime stays
+    hot and only the issues actually deleted are copied to the archive.
+    """
+    with transaction.atomic():
+        rows = list(archivable(cutoff).select_for_update(skip_locked=True)
+                    .order_by().values(*ISSUE_COLUMNS)[:batch_size])
+        if not rows:
+            return None
+        ids = [row['id'] for row in rows]
+        feedback = list(Feedback.objects.filter(issue_id__in=ids).values(*FEEDBACK_COLUMNS))
+
+        # Cascades to feedback and duplicate-detection signatures; archived
+        # issues still count on the dashboard, so the counters stay as they are
+        with counters.deletes_untracked():
+            archivable(cutoff).filter(pk__in=ids).delete()
+        kept = set(Issue.objects.filter(pk__in=ids).values_list('id', flat=True))
+        rows = [row for row in rows if row['id'] not in kept]
+        feedback = [row for row in feedback if row['issue_id'] not in kept]
+
+        archived_at = timezone.now()
+        ArchivedIssue.objects.bulk_create([ArchivedIssue(archived_at=archived_at, **row) for row in rows])
+        ArchivedFeedback.objects.bulk_create([ArchivedFeedback(**row) for row in feedback])
+    return len(rows), len(feedback)
+
+
+def archive_issues(older_than_days, batch_size, pause=0.0, on_batch=None):
+    """
+    Archive every issue closed more than ``older_than_days`` ago, ``batch_size``
+    at a time, sleeping ``pause`` seconds between batches. ``on_batch(moved)``
+    reports progress. Returns a Counter of the issues and feedback moved.
+    """
+    cutoff = archive_cutoff(older_than_days)
+    moved = Counter()
+    while True:
+        batch = archive_batch(cutoff, batch_size)
+        if batch is None:
+            break
+        issues, feedback = batch
+        moved['issues'] += issues
+        moved['feedback'] += feedback
+        if on_batch:
+            on_batch(moved)
+        if pause:
+            time.sleep(pause)
+
+    if moved['issues'] and connection.vendor == 'sqlite':
+        # Refresh the row estimates the admin changelists read (sqlite_stat1);
+        # analysis_limit keeps ANALYZE to a sample of each index
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA analysis_limit = 1000')
+            cursor.execute(f'ANALYZE {Issue._meta.db_table}')
+            cursor.execute(f'ANALYZE {ArchivedIssue._meta.db_table}')
+    return moved
+
+
+# Reads
+
+def wants_history(request):
+    return request.GET.get('history', '').lower() in HISTORY_VALUES
+
+
+def history_querysets(request, *args, **kwargs):
+    """``[archived issues matching the filters]`` for ?history=1, else ``[]``"""
+    return [ArchivedIssue.objects.filter(*args, **kwargs)] if wants_history(request) else []
+
+
+def archive_validators(querysets, related=()):
+    """ETag parts for the archive half of a ?history=1 list (``related`` as for list_validators)"""
+    parts = []
+    for queryset in querysets:
+        summary = queryset.order_by().aggregate(
+            latest=Max('archived_at'), count=Count('id'),
+            **{f'related_{index}': Max(field) for index, field in enumerate(related)})
+        parts += [summary['latest'], summary['count'],
+                  *(summary[f'related_{index}'] for index in range(len(related)))]
+    return parts
@@ -0,0 +1,53 @@
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from .user_cache import user_cache
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves the token's user through ``user_cache``"""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        try:
+            user = user_cache.get(int(user_id))
+        except (TypeError, ValueError):
+            user = None
+        if user is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed("The user's password has been changed.", code='password_changed')
+
+        return user
+
+
+def authenticate_jwt(request, query_token=False):
+    """
+    Resolve the user for a plain Django (non-DRF) view.
+
+    Accepts the usual ``Authorization: Bearer`` header. With ``query_token``
+    a ``?token=`` query parameter is accepted too, for the event stream,
+    whose ``EventSource`` clients cannot set headers; elsewhere a token in
+    the URL would only end up in access logs and profiles.
+    Returns None when the request is not authenticated.
+    """
+    authentication = CachedJWTAuthentication()
+    raw_token = request.GET.get('token') if query_token else None
+    try:
+        if raw_token:
+            return authentication.get_user(authentication.get_validated_token(raw_token))
+        result = authentication.authenticate(request)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return result[0] if result else None
@@ -0,0 +1,66 @@
+"""
+Set-based bulk issue status changes.
+
+One locking SELECT reads the old statuses, one ``UPDATE ... WHERE id IN``
+applies the transition, and the side effects (counters, notifications,
+outbox emails, push events) are written in batches, all inside a single
+transaction.
+"""
+from collections import Counter
+from django.db import transaction
+from django.utils import timezone
+from . import counters
+from .events import publish_notification, publish_issue_statuses
+from .models import Issue, Notification
+from .outbox import enqueue_emails
+from .utils import issue_status_email, issue_status_notification, STATUS_NOTIFY
+
+BULK_STATUS_MAX = 5000
+
+BULK_FIELDS = ('id', 'status', 'problem', 'problem_type', 'location', 'user_id', 'user__name', 'user__email')
+
+
+class BulkStatusError(ValueError):
+    """Raised when a bulk status request selects too many issues"""
+
+
+def change_status(queryset, new_status):
+    """
+    Move every issue in ``queryset`` to ``new_status``.
+
+    Returns the locked value rows with their *old* status. Issues already in
+    ``new_status`` are reported but get no notification or email.
+    """
+    with transaction.atomic():
+        rows = list(queryset.select_for_update(of=('self',)).order_by('id').values(*BULK_FIELDS)[:BULK_STATUS_MAX + 1])
+        if len(rows) > BULK_STATUS_MAX:
+            raise BulkStatusError(f'Select at most {BULK_STATUS_MAX} issues per request')
+        if not rows:
+            return rows
+
+        now = timezone.now()
+        Issue.objects.filter(id__in=[row['id'] for row in rows]).update(status=new_status, updated_at=now)
+
+        changed = [row for row in rows if row['status'] != new_status]
+        deltas = Counter()
+        for row in changed:
+            deltas[(row['status'], row['problem_type'])] -= 1
+            deltas[(new_status, row['problem_type'])] += 1
+        counters.adjust_many(deltas)
+
+        if new_status in STATUS_NOTIFY and changed:
+            notifications = []
+            for row in changed:
+                title, message = issue_status_notification(row['problem'], row['location'], new_status)
+                notifications.append(Notification(title=title, message=message, target_user_id=row['user_id']))
+            notifications = Notification.objects.bulk_create(notifications)
+            enqueue_emails([
+                (*issue_status_email(row['user__name'], row['problem'], row['location'], new_status, now),
+                 row['user__email'])
+                for row in changed
+            ])
+            for notification in notifications:
+                publish_notification(notification)
+
+        publish_issue_statuses(changed, new_status, now)
+    return rows
@@ -0,0 +1,58 @@
+"""
+Conditional GET support for the read endpoints.
+
+Validators are derived from one aggregate query (latest timestamp and row
+count) plus the request's query string, without serializing the body. When
+the client's ``If-None-Match`` / ``If-Modified-Since`` still match, the view
+returns 304 Not Modified and skips building the payload.
+
+Lists only send an ETag: deleting a row that is not the newest leaves the
+latest timestamp where it was, so ``If-Modified-Since`` would keep
+answering 304, while the ETag also covers the row count.
+"""
+import hashlib
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+class Validators:
+    def __init__(self, latest, *parts, dated=True):
+        self.latest = latest
+        digest = hashlib.sha1(
+            '|'.join(str(part) for part in (latest, *parts)).encode()).hexdigest()
+        self.etag = f'W/"{digest[:32]}"'
+        # Only single objects (dated) get Last-Modified
+        self.last_modified = int(latest.timestamp()) if latest and dated else None
+
+
+def list_validators(request, queryset, timestamp_field='updated_at', *extra, related=()):
+    """
+    Validators for a list: max(timestamp), row count, query string and extras.
+    ``related`` names the timestamps of joined rows the payload shows (e.g.
+    ``issue__updated_at``), so editing those rows changes the ETag too.
+    """
+    summary = queryset.order_by().aggregate(
+        latest=Max(timestamp_field), count=Count('id'),
+        **{f'related_{index}': Max(field) for index, field in enumerate(related)})
+    versions = [summary[f'related_{index}'] for index in range(len(related))]
+    return Validators(summary['latest'], summary['count'], request.GET.urlencode(), *extra, *versions,
+                      dated=False)
+
+
+def not_modified(request, validators):
+    """Return a 304 response when the client's copy is current, else None"""
+    response = get_conditional_response(
+        request, etag=validators.etag, last_modified=validators.last_modified)
+    if response is not None:
+        return with_validators(response, validators)
+    return None
+
+
+def with_validators(response, validators):
+    """Attach ETag / Last-Modified to a response"""
+    response['ETag'] = validators.etag
+    if validators.last_modified is not None:
+        response['Last-Modified'] = http_date(validators.last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,115 @@
+"""
+Incrementally maintained dashboard counters.
+
+Every code path that creates an issue, changes its status/problem_type or
+deletes it adjusts ``IssueCounter`` in the same transaction, so the stats
+endpoint reads a few dozen rows instead of scanning the issues table.
+Archived issues keep counting. The ``rebuild_issue_counters`` command
+recomputes them from scratch and reports any drift.
+"""
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from django.db import transaction
+from django.db.models import Count, F
+from .models import ArchivedIssue, Issue, IssueCounter
+
+
+def adjust(status, problem_type, delta):
+    """Add ``delta`` to one (status, problem_type) counter"""
+    if not delta:
+        return
+    updated = IssueCounter.objects.filter(
+        status=status, problem_type=problem_type).update(count=F('count') + delta)
+    if not updated:
+        counter, _ = IssueCounter.objects.get_or_create(status=status, problem_type=problem_type)
+        IssueCounter.objects.filter(pk=counter.pk).update(count=F('count') + delta)
+
+
+def adjust_many(deltas):
+    """Apply a {(status, problem_type): delta} mapping"""
+    for (status, problem_type), delta in deltas.items():
+        adjust(status, problem_type, delta)
+
+
+def record_created(issue):
+    adjust(issue.status, issue.problem_type, 1)
+
+
+_deletes = threading.local()
+
+
+@contextmanager
+def deletes_untracked():
+    """Issue deletes in this block leave the counters alone (the rows are archived, not gone)"""
+    _deletes.untracked = True
+    try:
+        yield
+    finally:
+        _deletes.untracked = False
+
+
+def record_deleted(issue):
+    if not getattr(_deletes, 'untracked', False):
+        adjust(issue.status, issue.problem_type, -1)
+
+
+def record_changed(old_status, old_problem_type, new_status, new_problem_type):
+    if (old_status, old_problem_type) != (new_status, new_problem_type):
+        adjust(old_status, old_problem_type, -1)
+        adjust(new_status, new_problem_type, 1)
+
+
+def dashboard_stats():
+    """Totals by status and problem_type from the counters table (one query)"""
+    by_status, by_problem_type, matrix, total = Counter(), Counter(), [], 0
+    for status, problem_type, count in IssueCounter.objects.filter(count__gt=0).values_list(
+            'status', 'problem_type', 'count').order_by('status', 'problem_type'):
+        by_status[status] += count
+        by_problem_type[problem_type] += count
+        total += count
+        matrix.append({'status': status, 'problem_type': problem_type, 'count': count})
+
+    return {
+        'total': total,
+        'by_status': {status: by_status[status] for status, _ in Issue.STATUS_CHOICES},
+        'by_problem_type': dict(by_problem_type),
+        'matrix': matrix,
+    }
+
+
+def actual_counts():
+    """Recompute the counters with a GROUP BY over the hot and archived issue tables"""
+    totals = Counter()
+    for model in (Issue, ArchivedIssue):
+        for row in model.objects.order_by().values('status', 'problem_type').annotate(count=Count('id')):
+            totals[row['status'], row['problem_type']] += row['count']
+    return dict(totals)
+
+
+def rebuild(dry_run=False):
+    """
+    Replace the counters with freshly computed values.
+
+    Returns a list of (status, problem_type, stored, actual) for every cell
+    that had drifted.
+    """
+    with transaction.atomic():
+        stored = {
+            (status, problem_type): count
+            for status, problem_type, count in IssueCounter.objects.select_for_update().values_list(
+                'status', 'problem_type', 'count')
+        }
+        actual = actual_counts()
+        drift = [
+            (status, problem_type, stored.get((status, problem_type), 0), actual.get((status, problem_type), 0))
+            for status, problem_type in sorted(set(stored) | set(actual))
+            if stored.get((status, problem_type), 0) != actual.get((status, problem_type), 0)
+        ]
+        if not dry_run:
+            IssueCounter.objects.all().delete()
+            IssueCounter.objects.bulk_create([
+                IssueCounter(status=status, problem_type=problem_type, count=count)
+                for (status, problem_type), count in actual.items()
+            ])
+    return drift
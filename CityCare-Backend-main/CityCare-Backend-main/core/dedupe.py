@@ -0,0 +1,170 @@
+"""
+Near-duplicate issue detection with MinHash + LSH.
+
+An issue's problem, description and normalized location are reduced to a
+set of character shingles and summarised as a 64-value MinHash signature.
+The signature is split into 16 bands of 4 values; each band is hashed into
+an indexed ``IssueLSHBucket`` row. Issues sharing any bucket with a new
+report are the only candidates compared, so lookup cost depends on the
+number of similar issues rather than the number of open issues.
+
+Only the first ``MAX_TEXT_LENGTH`` characters of problem and description
+are shingled, so a pasted essay costs no more than a long report. Editing
+an issue's text re-indexes it (``reindex_issue``).
+"""
+import hashlib
+import random
+import re
+import zlib
+from array import array
+from django.db import transaction
+from django.db.models import Q
+from .models import Issue, IssueSignature, IssueLSHBucket
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+SHINGLE_SIZE = 4
+MAX_TEXT_LENGTH = 2000
+# Editing any of these re-indexes the issue
+INDEXED_FIELDS = frozenset(('problem', 'description', 'location'))
+DUPLICATE_THRESHOLD = 0.6
+OPEN_STATUSES = ('PENDING', 'IN_PROGRESS')
+
+_PRIME = (1 << 61) - 1
+_MASK = 0xFFFFFFFF
+_rng = random.Random(1729)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+_ABBREVIATIONS = {
+    'street': 'st', 'road': 'rd', 'avenue': 'ave', 'lane': 'ln', 'drive': 'dr',
+    'near': '', 'opposite': 'opp', 'opp.': 'opp', 'junction': 'jn', 'the': '',
+}
+_NON_WORD = re.compile(r'[^\w\s]+', re.UNICODE)
+
+
+def normalize_location(location):
+    words = _NON_WORD.sub(' ', location.lower()).split()
+    return ' '.join(filter(None, (_ABBREVIATIONS.get(word, word) for word in words)))
+
+
+def issue_text(problem, description, location):
+    text = f'{problem} {description}'[:MAX_TEXT_LENGTH].lower()
+    return ' '.join(_NON_WORD.sub(' ', text).split()) + ' @ ' + normalize_location(location)
+
+
+def shingles(text):
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text):
+    """64-value MinHash signature of a text's shingle set"""
+    hashed = [zlib.crc32(shingle.encode()) for shingle in shingles(text)]
+    return [min((a * x + b) % _PRIME for x in hashed) & _MASK for a, b in _PERMUTATIONS]
+
+
+def band_buckets(signature):
+    """(band, bucket) pairs for the LSH index"""
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(array('I', rows).tobytes(), digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, 'big', signed=True)))
+    return buckets
+
+
+def pack(signature):
+    return array('I', signature).tobytes()
+
+
+def unpack(data):
+    return array('I', bytes(data)).tolist()
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for a, b in zip(first, second) if a == b) / NUM_PERMUTATIONS
+
+
+def signature_for(issue):
+    return minhash(issue_text(issue.problem, issue.description, issue.location))
+
+
+def index_rows(issue_id, signature):
+    """Unsaved signature and bucket rows for one issue (for bulk_create)"""
+    return (
+        IssueSignature(issue_id=issue_id, minhash=pack(signature)),
+        [IssueLSHBucket(issue_id=issue_id, band=band, bucket=bucket)
+         for band, bucket in band_buckets(signature)],
+    )
+
+
+def index_issue(issue, signature=None):
+    signature = signature or signature_for(issue)
+    row, buckets = index_rows(issue.id, signature)
+    row.save()
+    IssueLSHBucket.objects.bulk_create(buckets)
+
+
+def reindex_issue(issue):
+    """Replace an edited issue's signature and buckets"""
+    with transaction.atomic():
+        IssueLSHBucket.objects.filter(issue_id=issue.id).delete()
+        IssueSignature.objects.filter(issue_id=issue.id).delete()
+        index_issue(issue)
+
+
+def find_duplicates(signature, exclude_id=None, limit=5):
+    """
+    Open issues whose estimated similarity to ``signature`` is at least the
+    threshold, most similar first, as (similarity, issue value dict) pairs.
+    """
+    bucket_q = Q()
+    for band, bucket in band_buckets(signature):
+        bucket_q |= Q(band=band, bucket=bucket)
+
+    candidate_ids = set(IssueLSHBucket.objects.filter(bucket_q).values_list('issue_id', flat=True))
+    candidate_ids.discard(exclude_id)
+    if not candidate_ids:
+        return []
+
+    candidates = IssueSignature.objects.filter(
+        issue_id__in=candidate_ids, issue__status__in=OPEN_STATUSES
+    ).values('issue_id', 'minhash', 'issue__problem', 'issue__location',
+             'issue__status', 'issue__duplicate_of_id')
+
+    matches = []
+    for candidate in candidates:
+        score = similarity(signature, unpack(candidate['minhash']))
+        if score >= DUPLICATE_THRESHOLD:
+            matches.append((score, candidate))
+    matches.sort(key=lambda match: (-match[0], match[1]['issue_id']))
+    return matches[:limit]
+
+
+def check_new_issue(issue):
+    """
+    Index a freshly reported issue and link it to the canonical issue of its
+    closest open duplicate. Returns the duplicate matches.
+    """
+    signature = signature_for(issue)
+    matches = find_duplicates(signature, exclude_id=issue.id)
+    if matches:
+        best = matches[0][1]
+        issue.duplicate_of_id = best['issue__duplicate_of_id'] or best['issue_id']
+        Issue.objects.filter(id=issue.id).update(duplicate_of_id=issue.duplicate_of_id)
+    index_issue(issue, signature)
+    return matches
+
+
+def duplicate_row(match):
+    score, candidate = match
+    return {
+        'id': candidate['issue_id'],
+        'problem': candidate['issue__problem'],
+        'location': candidate['issue__location'],
+        'status': candidate['issue__status'],
+        'similarity': round(score, 2)
+    }
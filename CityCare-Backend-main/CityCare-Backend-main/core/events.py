@@ -0,0 +1,133 @@
+"""
+In-process pub/sub hub for the push channel.
+
+Views publish events (new notifications, issue status changes) from any
+thread; each connected client holds an ``asyncio.Queue`` on the ASGI event
+loop, so thousands of idle SSE/long-poll connections cost one queue each
+rather than one thread each. A short replay buffer lets clients resume with
+``Last-Event-ID`` / ``?since=`` after reconnecting.
+
+The hub is per process: run a single ASGI worker per host for the push
+channel, or put a shared broker behind ``publish`` when scaling out.
+"""
+import asyncio
+import itertools
+import threading
+from collections import deque
+from django.db import transaction
+
+SUBSCRIBER_QUEUE_SIZE = 100
+REPLAY_BUFFER_SIZE = 1000
+
+
+class Subscription:
+    def __init__(self, user_id, loop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def wants(self, event):
+        return event['user_id'] is None or event['user_id'] == self.user_id
+
+    def deliver(self, event):
+        """Queue an event, dropping the oldest one if the client is too slow"""
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def drain(self):
+        """Return every event already queued without waiting"""
+        events = []
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+        return events
+
+
+class EventHub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+        self._recent = deque(maxlen=REPLAY_BUFFER_SIZE)
+        self._sequence = itertools.count(1)
+
+    def subscribe(self, user_id, since=None):
+        """Register a subscriber on the running loop, replaying events after ``since``"""
+        subscription = Subscription(user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.add(subscription)
+            backlog = [event for event in self._recent if since is not None and event['id'] > since]
+        for event in backlog:
+            if subscription.wants(event):
+                subscription.deliver(event)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event_type, data, user_id=None):
+        """Send an event to one user, or to everyone when ``user_id`` is None"""
+        with self._lock:
+            event = {'id': next(self._sequence), 'type': event_type, 'user_id': user_id, 'data': data}
+            self._recent.append(event)
+            targets = [subscription for subscription in self._subscriptions if subscription.wants(event)]
+
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down
+                self.unsubscribe(subscription)
+        return event
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscriptions)
+
+
+hub = EventHub()
+
+
+def publish_notification(notification):
+    """Publish a notification to its target user (or everyone) once committed"""
+    data = {
+        'id': notification.id,
+        'title': notification.title,
+        'message': notification.message,
+        'is_global': notification.target_user_id is None,
+        'created_at': notification.created_at.isoformat()
+    }
+    transaction.on_commit(lambda: hub.publish('notification', data, notification.target_user_id))
+
+
+def _issue_status_data(issue_id, problem, status, old_status, updated_at):
+    return {
+        'id': issue_id,
+        'problem': problem,
+        'status': status,
+        'old_status': old_status,
+        'updated_at': updated_at.isoformat()
+    }
+
+
+def publish_issue_status(issue, old_status):
+    """Publish an issue status transition to the reporter once committed"""
+    data = _issue_status_data(issue.id, issue.problem, issue.status, old_status, issue.updated_at)
+    transaction.on_commit(lambda: hub.publish('issue_status', data, issue.user_id))
+
+
+def publish_issue_statuses(rows, status, updated_at):
+    """Publish a bulk transition; ``rows`` are value dicts with the old status"""
+    events = [
+        (_issue_status_data(row['id'], row['problem'], status, row['status'], updated_at), row['user_id'])
+        for row in rows
+    ]
+
+    def publish_all():
+        for data, user_id in events:
+            hub.publish('issue_status', data, user_id)
+
+    transaction.on_commit(publish_all)
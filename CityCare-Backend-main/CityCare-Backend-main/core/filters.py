@@ -0,0 +1,54 @@
+from datetime import datetime, time
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+class FilterError(ValueError):
+    """Raised when a list filter query parameter is malformed"""
+
+
+def parse_date_bound(value, end_of_day=False):
+    """Parse an ISO date or datetime query parameter into an aware datetime"""
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError
+            parsed = datetime.combine(day, time.max if end_of_day else time.min)
+    except ValueError:
+        raise FilterError(f'Invalid date: {value}')
+
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def date_range_q(params, field='created_at'):
+    """Build a Q for ?date_from=&date_to= (inclusive) on the given field"""
+    q = Q()
+    if params.get('date_from'):
+        q &= Q(**{f'{field}__gte': parse_date_bound(params['date_from'])})
+    if params.get('date_to'):
+        q &= Q(**{f'{field}__lte': parse_date_bound(params['date_to'], end_of_day=True)})
+    return q
+
+
+def issue_attr_q(params, prefix=''):
+    """
+    Build a Q for ?status=&problem_type=.
+
+    ``prefix`` lets related models filter through their issue, e.g. ``issue__``.
+    """
+    q = Q()
+    if params.get('status'):
+        q &= Q(**{f'{prefix}status': params['status']})
+    if params.get('problem_type'):
+        q &= Q(**{f'{prefix}problem_type': params['problem_type']})
+    return q
+
+
+def issue_filter_q(params):
+    """Build a Q for the full issue filter set (status, problem_type, date range)"""
+    return issue_attr_q(params) & date_range_q(params)
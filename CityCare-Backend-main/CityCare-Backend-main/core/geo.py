@@ -0,0 +1,103 @@
+"""
+Geohash grid indexing for issue coordinates.
+
+Each issue with coordinates stores a precision-9 geohash (~5 m cells) in an
+indexed column. A radius or bounding-box query is turned into a small set of
+covering cells at a coarser precision, and every cell becomes one B-tree
+range scan on the geohash column (``cell <= geohash < cell + '~'``). Exact
+distances are then checked only for the candidates in those cells. This
+works on plain SQLite with no GIS extension.
+"""
+import math
+from django.db.models import Q
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+STORED_PRECISION = 9
+MIN_QUERY_PRECISION = 4
+MAX_COVER_CELLS = 64
+EARTH_RADIUS_M = 6371008.8
+
+
+class GeoError(ValueError):
+    """Raised for invalid coordinates or an area too large to query"""
+
+
+def encode(lat, lon, precision=STORED_PRECISION):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = bits * 2 + 1
+            rng[0] = mid
+        else:
+            bits *= 2
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """(height, width) of a geohash cell in degrees"""
+    lat_bits = 5 * precision // 2
+    lon_bits = 5 * precision - lat_bits
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def validate_point(lat, lon):
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        raise GeoError('Latitude and longitude must be numbers')
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise GeoError('Latitude must be within ±90 and longitude within ±180')
+    return lat, lon
+
+
+def _cells_at(min_lat, min_lon, max_lat, max_lon, precision):
+    height, width = cell_size(precision)
+    rows = range(int((min_lat + 90) // height), int((max_lat + 90) // height) + 1)
+    cols = range(int((min_lon + 180) // width), int((max_lon + 180) // width) + 1)
+    if len(rows) * len(cols) > MAX_COVER_CELLS:
+        return None
+    return sorted({
+        encode(min(-90 + (row + 0.5) * height, 90), min(-180 + (col + 0.5) * width, 180), precision)
+        for row in rows for col in cols
+    })
+
+
+def covering_cells(min_lat, min_lon, max_lat, max_lon):
+    """The finest set of at most MAX_COVER_CELLS geohash cells covering a box"""
+    for precision in range(STORED_PRECISION - 1, MIN_QUERY_PRECISION - 1, -1):
+        cells = _cells_at(min_lat, min_lon, max_lat, max_lon, precision)
+        if cells is not None:
+            return cells
+    raise GeoError('Area too large to query')
+
+
+def cells_q(cells):
+    """Q matching issues whose geohash falls inside any of the cells (index range scans)"""
+    q = Q()
+    for cell in cells:
+        q |= Q(geohash__gte=cell, geohash__lt=cell + '~')
+    return q
+
+
+def radius_box(lat, lon, radius_m):
+    """Bounding box (min_lat, min_lon, max_lat, max_lon) around a circle"""
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    dlon = math.degrees(radius_m / (EARTH_RADIUS_M * max(math.cos(math.radians(lat)), 1e-6)))
+    return max(lat - dlat, -90), max(lon - dlon, -180), min(lat + dlat, 90), min(lon + dlon, 180)
+
+
+def distance_m(lat1, lon1, lat2, lon2):
+    """Great-circle (haversine) distance in metres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi, dlmb = phi2 - phi1, math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
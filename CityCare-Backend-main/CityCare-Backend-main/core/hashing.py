@@ -0,0 +1,98 @@
+"""
+Bounded worker pool for password hashing.
+
+PBKDF2 with a million iterations costs ~0.3 s of CPU per login. Run on the
+request thread it stalls the ASGI event loop (or pins a sync worker), so a
+burst of logins starves every other request. Hashing is submitted to a small
+thread pool instead; ``hashlib`` releases the GIL while hashing, so the pool
+runs on as many cores as it has threads.
+
+At most ``PASSWORD_HASHING_MAX_PENDING`` hashes may be queued or running.
+Beyond that ``HashingBusy`` is raised straight away and the views answer 503
+with ``Retry-After``, rather than letting the queue and latency grow without
+bound. ``PASSWORD_HASHING_WORKERS = 0`` hashes inline on the calling thread.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full"""
+
+
+class HashingPool:
+    def __init__(self):
+        self._executor = None
+        self._slots = None
+        self.workers = None
+
+    def configure(self, workers=None, max_pending=None):
+        """(Re)build the pool; defaults come from settings"""
+        workers = settings.PASSWORD_HASHING_WORKERS if workers is None else workers
+        max_pending = max_pending or settings.PASSWORD_HASHING_MAX_PENDING or workers * 8
+        if self._executor:
+            self._executor.shutdown(wait=True)
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='password-hashing') if workers else None
+        self._slots = threading.BoundedSemaphore(max(max_pending, workers, 1))
+
+    def submit(self, func, *args):
+        """Queue ``func(*args)`` on the pool, or raise HashingBusy"""
+        if self.workers is None:
+            self.configure()
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, func, *args):
+        """Run ``func(*args)`` on the pool and wait for it (sync callers)"""
+        if self.workers is None:
+            self.configure()
+        if not self.workers:
+            return func(*args)
+        return self.submit(func, *args).result()
+
+    async def arun(self, func, *args):
+        """Run ``func(*args)`` on the pool without blocking the event loop"""
+        if self.workers is None:
+            self.configure()
+        if not self.workers:
+            return func(*args)
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+
+pool = HashingPool()
+
+
+def make_password(password):
+    return pool.run(hashers.make_password, password)
+
+
+async def amake_password(password):
+    return await pool.arun(hashers.make_password, password)
+
+
+async def averify_password(user, password):
+    """
+    Check ``password`` against ``user`` (None for an unknown email) like
+    ModelBackend: unknown users still pay for one hash to keep timing flat,
+    and an outdated hash is upgraded after a successful check.
+    """
+    if user is None:
+        await amake_password(password)
+        return False
+
+    valid = await pool.arun(hashers.check_password, password, user.password)
+    if valid and hashers.identify_hasher(user.password).must_update(user.password):
+        user.password = await amake_password(password)
+        await user.asave(update_fields=['password'])
+    return valid and user.is_active
@@ -0,0 +1,246 @@
+"""
+Streaming bulk import of legacy issues (CSV or NDJSON).
+
+The file is parsed row by row and processed in chunks: each chunk resolves
+reporter emails through an in-memory email -> user id map (creating missing
+users with unusable passwords), inserts its issues with ``bulk_create`` and
+adjusts the dashboard counters, all in one transaction. Rejected rows are
+collected with their line number and reason. Memory is bounded by the chunk
+size plus the email map.
+
+Expected columns: email, problem, problem_type, location, description, and
+optionally name, status, created_at (ISO 8601), lat, lon.
+"""
+import csv
+import io
+import json
+from collections import Counter
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from . import counters
+from .geo import GeoError, validate_point
+from .models import Issue, User
+
+IMPORT_CHUNK_SIZE = 5000
+REQUIRED_COLUMNS = ('email', 'problem', 'problem_type', 'location', 'description')
+STATUSES = {status for status, _ in Issue.STATUS_CHOICES}
+
+
+class RowError(ValueError):
+    """A single input row that cannot be imported"""
+
+
+def iter_csv_rows(binary_file):
+    text = io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
+    for line_number, row in enumerate(csv.DictReader(text), start=2):
+        yield line_number, row
+
+
+def iter_ndjson_rows(binary_file):
+    text = io.TextIOWrapper(binary_file, encoding='utf-8-sig')
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def iter_rows(binary_file, file_format):
+    if file_format == 'csv':
+        return iter_csv_rows(binary_file)
+    if file_format == 'ndjson':
+        return iter_ndjson_rows(binary_file)
+    raise ValueError('Format must be csv or ndjson')
+
+
+def _text(row, column, max_length=None):
+    value = row.get(column)
+    value = '' if value is None else str(value).strip()
+    if max_length and len(value) > max_length:
+        raise RowError(f'{column} is longer than {max_length} characters')
+    return value
+
+
+def clean_row(row):
+    """Validate one input row into a dict of Issue fields (plus reporter email/name)"""
+    if row is None:
+        raise RowError('Malformed row')
+
+    cleaned = {
+        # As UserManager stores them: only the domain is lowercased
+        'email': User.objects.normalize_email(_text(row, 'email', 254)),
+        'name': _text(row, 'name', 100),
+        'problem': _text(row, 'problem', 200),
+        'problem_type': _text(row, 'problem_type', 50),
+        'location': _text(row, 'location', 200),
+        'description': _text(row, 'description'),
+        'status': _text(row, 'status').upper() or 'PENDING',
+    }
+    missing = [column for column in REQUIRED_COLUMNS if not cleaned[column]]
+    if missing:
+        raise RowError(f"Missing {', '.join(missing)}")
+    try:
+        validate_email(cleaned['email'])
+    except ValidationError:
+        raise RowError('Invalid email')
+    if cleaned['status'] not in STATUSES:
+        raise RowError(f"Invalid status {cleaned['status']}")
+
+    created_at = _text(row, 'created_at')
+    cleaned['created_at'] = None
+    if created_at:
+        parsed = parse_datetime(created_at)
+        if parsed is None:
+            raise RowError('Invalid created_at')
+        cleaned['created_at'] = timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+    lat, lon = row.get('lat'), row.get('lon')
+    cleaned['lat'] = cleaned['lon'] = None
+    if lat not in (None, '') or lon not in (None, ''):
+        try:
+            cleaned['lat'], cleaned['lon'] = validate_point(lat, lon)
+        except GeoError as e:
+            raise RowError(str(e))
+    return cleaned
+
+
+def backdate(pairs):
+    """
+    Restore legacy timestamps on freshly inserted ``(issue, created_at)`` pairs.
+
+    auto_now_add always stamps "now" on insert. ``bulk_update`` would fix that
+    with one CASE expression per column, which costs far more to build than to
+    run, so this issues a single parameterised UPDATE per row via executemany.
+    """
+    field = Issue._meta.get_field('created_at')
+    sql = 'UPDATE {table} SET {created} = %s, {date} = %s, {updated} = %s WHERE {pk} = %s'.format(
+        table=connection.ops.quote_name(Issue._meta.db_table),
+        created=connection.ops.quote_name('created_at'),
+        date=connection.ops.quote_name('date'),
+        updated=connection.ops.quote_name('updated_at'),
+        pk=connection.ops.quote_name('id'),
+    )
+    params = []
+    for issue, created_at in pairs:
+        issue.created_at = issue.date = issue.updated_at = created_at
+        value = field.get_db_prep_value(created_at, connection)
+        params.append((value, value, value, issue.id))
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+class IssueImporter:
+    def __init__(self, chunk_size=IMPORT_CHUNK_SIZE, max_errors_kept=1000, error_sink=None):
+        self.chunk_size = chunk_size
+        self.max_errors_kept = max_errors_kept
+        self.error_sink = error_sink
+        self.user_ids = {}
+        self.imported = 0
+        self.rejected = 0
+        self.users_created = 0
+        self.errors = []
+
+    def reject(self, line_number, reason, row):
+        """Record a rejected row; every error goes to ``error_sink``, the first few are kept"""
+        error = {'line': line_number, 'error': reason, 'row': row}
+        self.rejected += 1
+        if self.error_sink:
+            self.error_sink(error)
+        if len(self.errors) < self.max_errors_kept:
+            self.errors.append(error)
+
+    def run(self, rows, on_chunk=None):
+        """Import ``(line_number, row)`` pairs; ``on_chunk`` is called after each chunk"""
+        chunk = []
+        for line_number, row in rows:
+            try:
+                chunk.append(clean_row(row))
+            except RowError as e:
+                self.reject(line_number, str(e), row)
+            if len(chunk) >= self.chunk_size:
+                self.import_chunk(chunk)
+                chunk = []
+                if on_chunk:
+                    on_chunk(self)
+        if chunk:
+            self.import_chunk(chunk)
+            if on_chunk:
+                on_chunk(self)
+        return self
+
+    def resolve_users(self, chunk):
+        names = {}
+        for row in chunk:
+            if row['email'] not in self.user_ids:
+                names.setdefault(row['email'], row['name'] or row['email'].split('@')[0])
+        if not names:
+            return
+
+        self.user_ids.update(User.objects.filter(email__in=names).values_list('email', 'id'))
+        missing = [email for email in names if email not in self.user_ids]
+        if missing:
+            # make_password(None) is random, so it also marks the rows this insert
+            # added: ignore_conflicts silently skips users created concurrently
+            unusable = make_password(None)
+            User.objects.bulk_create(
+                [User(email=email, name=names[email], password=unusable) for email in missing],
+                ignore_conflicts=True,
+            )
+            users = list(User.objects.filter(email__in=missing).values_list('email', 'id', 'password'))
+            self.user_ids.update((email, user_id) for email, user_id, _ in users)
+            self.users_created += sum(password == unusable for _, _, password in users)
+
+    def import_chunk(self, chunk):
+        with transaction.atomic():
+            self.resolve_users(chunk)
+
+            issues, backdated, deltas = [], [], Counter()
+            for row in chunk:
+                issue = Issue(
+                    user_id=self.user_ids[row['email']],
+                    problem=row['problem'],
+                    problem_type=row['problem_type'],
+                    location=row['location'],
+                    description=row['description'],
+                    status=row['status'],
+                    lat=row['lat'],
+                    lon=row['lon'],
+                )
+                # bulk_create skips save(), so derive the geohash here
+                issue.set_geohash()
+                issues.append(issue)
+                deltas[(row['status'], row['problem_type'])] += 1
+                if row['created_at']:
+                    backdated.append((issue, row['created_at']))
+
+            Issue.objects.bulk_create(issues)
+
+            if backdated:
+                backdate(backdated)
+
+            counters.adjust_many(deltas)
+        self.imported += len(chunk)
+
+    def summary(self):
+        return {
+            'imported': self.imported,
+            'rejected': self.rejected,
+            'users_created': self.users_created,
+        }
+
+
+def error_report_writer(stream):
+    """An ``error_sink`` that writes rejected rows as CSV: line, error, original row as JSON"""
+    writer = csv.writer(stream)
+    writer.writerow(['line', 'error', 'row'])
+
+    def write(error):
+        writer.writerow([error['line'], error['error'], json.dumps(error['row'], default=str)])
+    return write
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.archive import archivable, archive_cutoff, archive_issues
+
+
+class Command(BaseCommand):
+    help = ('Move RESOLVED/REPORT issues untouched for ISSUE_ARCHIVE_AFTER_DAYS days (and their feedback) '
+            'from the hot issues table into the archive, one batch per transaction. Run it from cron.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=settings.ISSUE_ARCHIVE_AFTER_DAYS,
+                            help='Archive closed issues last updated more than this many days ago')
+        parser.add_argument('--batch-size', type=int, default=settings.ISSUE_ARCHIVE_BATCH_SIZE,
+                            help='Issues moved per transaction')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches, to leave room for other writers')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the issues that would move')
+
+    def handle(self, *args, **options):
+        days = options['older_than_days']
+        if options['dry_run']:
+            count = archivable(archive_cutoff(days)).count()
+            self.stdout.write(f'{count} issues would be archived')
+            return
+
+        def progress(moved):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"  {moved['issues']} issues, {moved['feedback']} feedback archived")
+
+        moved = archive_issues(days, options['batch_size'], options['pause'], on_batch=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {moved['issues']} issues and {moved['feedback']} feedback"))
@@ -0,0 +1,43 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.dedupe import issue_text, minhash, index_rows
+from core.models import Issue, IssueSignature, IssueLSHBucket
+
+
+class Command(BaseCommand):
+    help = 'Build MinHash signatures and LSH buckets for issues that do not have them yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Issues signed and inserted per transaction')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id, total, start = 0, 0, time.perf_counter()
+
+        while True:
+            batch = list(
+                Issue.objects.filter(id__gt=last_id, signature__isnull=True)
+                .order_by('id').values('id', 'problem', 'description', 'location')[:batch_size]
+            )
+            if not batch:
+                break
+
+            signatures, buckets = [], []
+            for issue in batch:
+                signature = minhash(issue_text(issue['problem'], issue['description'], issue['location']))
+                row, issue_buckets = index_rows(issue['id'], signature)
+                signatures.append(row)
+                buckets.extend(issue_buckets)
+
+            with transaction.atomic():
+                IssueSignature.objects.bulk_create(signatures, ignore_conflicts=True)
+                IssueLSHBucket.objects.bulk_create(buckets)
+
+            last_id = batch[-1]['id']
+            total += len(batch)
+            self.stdout.write(f'Indexed {total} issues (up to id {last_id})')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfill complete: {total} issues in {time.perf_counter() - start:.1f}s'))
@@ -0,0 +1,105 @@
+import statistics
+import time
+from django.contrib import admin
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from core.models import Feedback, Issue, Notification, User
+from core.synthetic import seed_city
+
+# The admin options before the changelists were tuned
+LEGACY_OPTIONS = {
+    Issue: {
+        'list_display': ('problem', 'problem_type', 'location', 'user', 'status', 'date', 'created_at'),
+        'list_filter': ('status', 'problem_type', 'date', 'created_at'),
+        'search_fields': ('problem', 'location', 'user__name', 'user__email'),
+        'ordering': ('-created_at',),
+    },
+    Notification: {
+        'list_display': ('title', 'target_user', 'created_at'),
+        'list_filter': ('created_at',),
+        'search_fields': ('title', 'message', 'target_user__name', 'target_user__email'),
+        'ordering': ('-created_at',),
+    },
+    Feedback: {
+        'list_display': ('issue', 'user', 'created_at'),
+        'list_filter': ('created_at',),
+        'search_fields': ('feedback_text', 'user__name', 'user__email', 'issue__problem'),
+        'ordering': ('-created_at',),
+    },
+}
+
+
+def legacy_admin(model):
+    options = type(f'Legacy{model.__name__}Admin', (admin.ModelAdmin,), LEGACY_OPTIONS[model])
+    return options(model, admin.site)
+
+
+class Command(BaseCommand):
+    help = ('Time the Issue, Notification and Feedback admin changelists (plain, filtered, '
+            'date drill-down and search) with the legacy admin options and the tuned ones. '
+            'A synthetic city is inserted inside a transaction that is rolled back afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--issues', type=int, default=1_000_000,
+                            help='Synthetic issues to add before measuring')
+        parser.add_argument('--repeat', type=int, default=3, help='Loads per page (the median is kept)')
+
+    def pages(self, email):
+        issue = Issue.objects.order_by('-created_at', '-id').values('created_at', 'problem').first()
+        day = issue['created_at']
+        drill_down = {'created_at__year': day.year, 'created_at__month': day.month}
+        return [
+            (Issue, 'list', {}),
+            (Issue, 'status filter', {'status__exact': 'PENDING'}),
+            (Issue, 'month drill-down', drill_down),
+            (Issue, 'search words', {'q': issue['problem'].split()[0]}),
+            (Issue, 'search email', {'q': email}),
+            (Notification, 'list', {}),
+            (Notification, 'month drill-down', drill_down),
+            (Feedback, 'list', {}),
+            (Feedback, 'search email', {'q': email}),
+        ]
+
+    def load(self, model_admin, request, repeat):
+        samples = []
+        for _ in range(repeat):
+            reset_queries()
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = model_admin.changelist_view(request)
+                response.render()
+                samples.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                raise RuntimeError(f'{model_admin} answered {response.status_code}')
+        return statistics.median(samples), len(queries)
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        results = []
+        with transaction.atomic():
+            start = time.perf_counter()
+            inserted = seed_city(options['issues'], seed=23)
+            self.stdout.write(f"Seeded {inserted['issues']} issues, {inserted['users']} users, "
+                              f"{inserted['notifications']} notifications and {inserted['feedback']} feedback "
+                              f"in {time.perf_counter() - start:.1f}s")
+            superuser = User.objects.create_superuser('benchmark-admin@citycare.invalid', 'Benchmark', None)
+            email = Issue.objects.order_by('-created_at').values_list('user__email', flat=True).first()
+
+            for model, name, params in self.pages(email):
+                request = factory.get('/admin/', params)
+                request.user = superuser
+                legacy = self.load(legacy_admin(model), request, options['repeat'])
+                tuned = self.load(admin.site._registry[model], request, options['repeat'])
+                results.append((f'{model.__name__} {name}', legacy, tuned))
+            transaction.set_rollback(True)
+
+        for label, (legacy_ms, legacy_queries), (tuned_ms, tuned_queries) in results:
+            self.stdout.write(f'{label:>30}: legacy {legacy_ms:9.1f} ms {legacy_queries:4d} queries  '
+                              f'tuned {tuned_ms:8.1f} ms {tuned_queries:3d} queries  '
+                              f'({legacy_ms / max(tuned_ms, 1e-9):.1f}x)')
+        total_legacy = sum(legacy[0] for _, legacy, _ in results)
+        total_tuned = sum(tuned[0] for _, _, tuned in results)
+        self.stdout.write(self.style.SUCCESS(
+            f'Changelists load {total_legacy / max(total_tuned, 1e-9):.1f}x faster in total'))
@@ -0,0 +1,91 @@
+import asyncio
+import os
+import statistics
+import time
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+from core import hashing
+from core.models import User
+
+PASSWORD = 'benchmark-password'
+PROBE_INTERVAL = 0.02
+
+
+def percentiles(samples):
+    cuts = statistics.quantiles(samples, n=100, method='inclusive') if len(samples) > 1 else samples * 99
+    return {'p50': cuts[49], 'p95': cuts[94], 'max': max(samples)}
+
+
+class Command(BaseCommand):
+    help = ('Measure login throughput with password hashing inline on the request thread '
+            '(before) and on the bounded hashing pool (after). Benchmark users are created '
+            'inside a transaction that is rolled back afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=40, help='Logins per mode')
+        parser.add_argument('--concurrency', type=int, default=16, help='Logins in flight at once')
+        parser.add_argument('--workers', type=int, default=settings.PASSWORD_HASHING_WORKERS,
+                            help='Hashing pool size for the "pool" mode')
+
+    async def burst(self, emails, concurrency):
+        """Fire the logins while a probe measures how late the event loop runs other work"""
+        client = AsyncClient()
+        url = reverse('login')
+        gate = asyncio.Semaphore(concurrency)
+        latencies, lag, statuses = [], [], []
+        done = asyncio.Event()
+
+        async def login(email):
+            async with gate:
+                start = time.perf_counter()
+                response = await client.post(url, {'email': email, 'password': PASSWORD},
+                                             content_type='application/json')
+                latencies.append((time.perf_counter() - start) * 1000)
+                statuses.append(response.status_code)
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(PROBE_INTERVAL)
+                lag.append((time.perf_counter() - start - PROBE_INTERVAL) * 1000)
+
+        probe_task = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(login(email) for email in emails))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await probe_task
+        return elapsed, latencies, lag or [0.0], statuses
+
+    def handle(self, *args, **options):
+        cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+        modes = [('inline', 0), ('pool', options['workers'])]
+        results = {}
+
+        # AsyncClient talks to the in-process ASGI handler as "testserver"
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']), transaction.atomic():
+            password = make_password(PASSWORD)
+            emails = [f'benchmark-login-{i}@citycare.invalid' for i in range(options['logins'])]
+            User.objects.bulk_create([User(email=email, name='Benchmark', password=password) for email in emails])
+
+            for name, workers in modes:
+                hashing.pool.configure(workers=workers, max_pending=max(options['concurrency'], workers))
+                results[name] = async_to_sync(self.burst)(emails, options['concurrency'])
+            transaction.set_rollback(True)
+        hashing.pool.configure()
+
+        self.stdout.write(f"{options['logins']} logins per mode, {options['concurrency']} concurrent, "
+                          f"{cores} core(s), pool of {options['workers']}")
+        for name, (elapsed, latencies, lag, statuses) in results.items():
+            rate = len(latencies) / elapsed
+            login, loop = percentiles(latencies), percentiles(lag)
+            failed = sum(1 for code in statuses if code != 200)
+            self.stdout.write(f"{name:>7}: {rate:.1f} logins/s ({rate / cores:.1f}/core)  "
+                              f"login p50 {login['p50']:.0f} ms p95 {login['p95']:.0f} ms  "
+                              f"event-loop lag p95 {loop['p95']:.0f} ms max {loop['max']:.0f} ms  "
+                              f"failed {failed}")
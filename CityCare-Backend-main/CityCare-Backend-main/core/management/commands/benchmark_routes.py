@@ -0,0 +1,244 @@
+import json
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from core import urls as core_urls
+from core.models import Issue, User, Notification, Feedback
+from core.synthetic import seed_city, STREETS, SEED_PASSWORD, SEED_EMAIL_DOMAIN
+from core.tokens import RefreshToken
+
+ADMIN_EMAIL = 'benchmark-admin@citycare.invalid'
+IMPORT_ROWS = 100
+BULK_IDS = 50
+
+
+def percentiles(samples):
+    cuts = statistics.quantiles(samples, n=100, method='inclusive') if len(samples) > 1 else samples * 99
+    return {'p50_ms': cuts[49], 'p95_ms': cuts[94], 'p99_ms': cuts[98], 'max_ms': max(samples)}
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=settings.BASE_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Fixture:
+    """Who calls each route and with which ids, picked from the seeded city"""
+
+    def __init__(self, rng, client):
+        self.rng = rng
+        self.admin = User.objects.filter(email=ADMIN_EMAIL).first() or User.objects.create_user(
+            ADMIN_EMAIL, 'Benchmark Admin', SEED_PASSWORD, is_admin=True)
+        # One profiled request, so there is a profile to download
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}')
+        self.profile_id = client.get(reverse('admin_issue_stats'), HTTP_X_PROFILE='1')['X-Profile-Id']
+        # Recent issues, and the citizen who reported the latest one
+        self.issue_ids = list(Issue.objects.order_by('-id').values_list('id', flat=True)[:1000])
+        self.citizen = User.objects.get(id=Issue.objects.order_by('-id').values_list('user_id', flat=True)[0])
+        self.citizen_issue_id = Issue.objects.filter(user=self.citizen).order_by('-id').values_list(
+            'id', flat=True)[0]
+        self.notification_ids = list(Notification.objects.filter(target_user=self.citizen).order_by(
+            '-id').values_list('id', flat=True)[:20])
+
+    def issue_id(self):
+        return self.rng.choice(self.issue_ids)
+
+    def import_file(self):
+        rows = ['email,problem,problem_type,location,description,status']
+        for i in range(IMPORT_ROWS):
+            rows.append(f'import{self.rng.randrange(1000)}@{SEED_EMAIL_DOMAIN},Pothole,ROAD,'
+                        f'{i} {self.rng.choice(STREETS)},Imported by the benchmark,PENDING')
+        return SimpleUploadedFile('issues.csv', '\n'.join(rows).encode(), content_type='text/csv')
+
+
+# url name -> (method, caller, build(fixture) -> request kwargs). Callers are
+# 'admin', 'citizen' or None (anonymous).
+ROUTES = {
+    'register': ('post', None, lambda f: {
+        'data': {'name': 'Benchmark', 'email': f'benchmark-{f.rng.randrange(10 ** 9)}@citycare.invalid',
+                 'password': SEED_PASSWORD}}),
+    'login': ('post', None, lambda f: {'data': {'email': f.citizen.email, 'password': SEED_PASSWORD}}),
+    'logout': ('post', 'citizen', lambda f: {'data': {'refresh': str(RefreshToken.for_user(f.citizen))}}),
+    'forgot_password': ('post', None, lambda f: {'data': {'email': f.citizen.email}}),
+    'edit_profile': ('put', 'citizen', lambda f: {'data': {'name': 'Benchmark Citizen'}}),
+    'token_refresh': ('post', None, lambda f: {'data': {'refresh': str(RefreshToken.for_user(f.citizen))}}),
+
+    'report_issue': ('post', 'citizen', lambda f: {'data': {
+        'problem': 'Pothole', 'problem_type': 'ROAD', 'location': f'12 {f.rng.choice(STREETS)}',
+        'description': 'Deep pothole near the bus stop', 'lat': 18.52, 'lon': 73.85}}),
+    'user_issues': ('get', 'citizen', lambda f: {}),
+    'issues_nearby': ('get', 'citizen', lambda f: {'data': {'lat': 18.52, 'lon': 73.85, 'radius': 1000}}),
+    'issues_in_bbox': ('get', 'citizen', lambda f: {'data': {
+        'min_lat': 18.50, 'min_lon': 73.83, 'max_lat': 18.54, 'max_lon': 73.87}}),
+    'issue_detail': ('get', 'citizen', lambda f: {'kwargs': {'issue_id': f.citizen_issue_id}}),
+    'get_notifications': ('get', 'citizen', lambda f: {}),
+    'notifications_unread_count': ('get', 'citizen', lambda f: {}),
+    'mark_notifications_read': ('post', 'citizen', lambda f: {'data': {'ids': f.notification_ids}}
+                                if f.notification_ids else {'data': {'all': True}}),
+    'submit_feedback': ('post', 'citizen', lambda f: {
+        'data': {'issue_id': f.citizen_issue_id, 'feedback_text': 'Thanks for fixing this'}}),
+    'event_stream': ('get', 'citizen', lambda f: {'data': {'mode': 'poll', 'timeout': 0}}),
+
+    'admin_all_issues': ('get', 'admin', lambda f: {}),
+    'admin_issue_stats': ('get', 'admin', lambda f: {}),
+    'admin_search_issues': ('get', 'admin', lambda f: {'data': {'q': f'pothole {f.rng.choice(STREETS)}'}}),
+    'admin_change_issue_status': ('put', 'admin', lambda f: {
+        'kwargs': {'issue_id': f.issue_id()}, 'data': {'status': 'RESOLVED'}}),
+    'admin_bulk_change_issue_status': ('post', 'admin', lambda f: {
+        'data': {'status': 'IN_PROGRESS', 'ids': f.rng.sample(f.issue_ids, min(BULK_IDS, len(f.issue_ids)))}}),
+    'admin_import_issues': ('post', 'admin', lambda f: {'data': {'file': f.import_file()}, 'format': 'multipart'}),
+    'admin_view_feedback': ('get', 'admin', lambda f: {}),
+    'admin_all_notifications': ('get', 'admin', lambda f: {}),
+    'admin_send_notification': ('post', 'admin', lambda f: {
+        'data': {'title': 'Benchmark', 'message': 'Load test', 'target_user_id': f.citizen.id}}),
+    'admin_profiles': ('get', 'admin', lambda f: {}),
+    'admin_profile_detail': ('get', 'admin', lambda f: {'kwargs': {'profile_id': f.profile_id}}),
+    # A rare slice, so the export is timed per request rather than per table
+    'admin_export': ('get', 'admin', lambda f: {
+        'kwargs': {'resource': 'issues'}, 'data': {'status': 'REPORT', 'problem_type': 'ANIMALS'}}),
+}
+
+
+def route_names():
+    """Every named route in core/urls.py, plus the token refresh endpoint"""
+    return [pattern.name for pattern in core_urls.urlpatterns] + ['token_refresh']
+
+
+class Command(BaseCommand):
+    help = ('Seed a synthetic city at each scale and time every API route: p50/p95/p99 latency, '
+            'queries per request and peak RSS, written as a JSON report to diff between commits. '
+            'Runs inside a transaction that is rolled back afterwards unless --keep is given.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='1000,10000,100000',
+                            help='Comma-separated issue counts; the city grows from one scale to the next')
+        parser.add_argument('--requests', type=int, default=30, help='Timed requests per route and scale')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per route first')
+        parser.add_argument('--routes', default='', help='Comma-separated url names (default: all)')
+        parser.add_argument('--output', default='benchmark_report.json', help='JSON report path')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+        parser.add_argument('--keep', action='store_true', help='Commit the seeded city')
+
+    def request(self, client, name, fixture):
+        method, caller, build = ROUTES[name]
+        spec = build(fixture)
+        client.credentials()
+        if caller:
+            user = fixture.admin if caller == 'admin' else fixture.citizen
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        url = reverse(name, kwargs=spec.get('kwargs'))
+        body = {'format': spec.get('format', 'json')} if method != 'get' else {}
+
+        # Every request is rolled back, so writes do not skew later samples
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = getattr(client, method)(url, spec.get('data'), **body)
+                if response.streaming:
+                    for _ in response.streaming_content:
+                        pass
+                elapsed = (time.perf_counter() - start) * 1000
+            transaction.set_rollback(True)
+        return response.status_code, elapsed, len(queries)
+
+    def time_route(self, client, name, fixture, options):
+        for _ in range(options['warmup']):
+            self.request(client, name, fixture)
+        samples, query_counts, statuses = [], [], set()
+        for _ in range(options['requests']):
+            status, elapsed, queries = self.request(client, name, fixture)
+            samples.append(elapsed)
+            query_counts.append(queries)
+            statuses.add(status)
+        method, caller, _ = ROUTES[name]
+        return {
+            'method': method.upper(),
+            'caller': caller,
+            'statuses': sorted(statuses),
+            **{key: round(value, 3) for key, value in percentiles(samples).items()},
+            'queries': statistics.median(query_counts),
+            'peak_rss_mb': peak_rss_mb(),
+        }
+
+    def handle(self, *args, **options):
+        try:
+            scales = sorted({int(scale) for scale in options['scales'].split(',') if scale.strip()})
+        except ValueError:
+            raise CommandError('Scales must be integers')
+        if not scales or scales[0] <= 0:
+            raise CommandError('Give at least one positive scale')
+
+        missing = [name for name in route_names() if name not in ROUTES]
+        if missing:
+            raise CommandError(f"No benchmark plan for route(s): {', '.join(missing)}")
+        names = [name.strip() for name in options['routes'].split(',') if name.strip()] or route_names()
+        unknown = [name for name in names if name not in ROUTES]
+        if unknown:
+            raise CommandError(f"Unknown route(s): {', '.join(unknown)}")
+
+        rng = random.Random(options['seed'])
+        report = {
+            'commit': current_commit(),
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'requests_per_route': options['requests'],
+            'scales': [],
+        }
+
+        # The test client talks to the in-process handler as "testserver"
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']), transaction.atomic():
+            client = APIClient()
+            seeded = 0
+            for scale in scales:
+                start = time.perf_counter()
+                seed_city(scale - seeded, seed=options['seed'] + scale)
+                seeded = scale
+                seconds = time.perf_counter() - start
+                self.stdout.write(f'Seeded {scale} issues ({seconds:.1f}s), timing {len(names)} routes')
+
+                fixture = Fixture(rng, client)
+                routes = {name: self.time_route(client, name, fixture, options) for name in names}
+                report['scales'].append({
+                    'issues': scale,
+                    'rows': {
+                        'users': User.objects.count(),
+                        'issues': Issue.objects.count(),
+                        'feedback': Feedback.objects.count(),
+                        'notifications': Notification.objects.count(),
+                    },
+                    'seed_seconds': round(seconds, 1),
+                    'peak_rss_mb': peak_rss_mb(),
+                    'routes': routes,
+                })
+                for name, stats in routes.items():
+                    self.stdout.write(f"{name:>32}: p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms  "
+                                      f"p99 {stats['p99_ms']:8.2f} ms  {stats['queries']:>5} queries  "
+                                      f"HTTP {','.join(map(str, stats['statuses']))}")
+            transaction.set_rollback(not options['keep'])
+
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+            output.write('\n')
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
@@ -0,0 +1,58 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.models import Issue, User
+from core.search import search_issue_ids, search_tokens, like_scan_q
+from core.synthetic import issue_batches, search_terms
+
+
+def percentiles(samples):
+    cuts = statistics.quantiles(samples, n=100) if len(samples) > 1 else samples * 99
+    return {'p50': cuts[49], 'p95': cuts[94], 'max': max(samples)}
+
+
+class Command(BaseCommand):
+    help = ('Compare indexed full-text issue search with the LIKE scan. Synthetic issues '
+            'are inserted inside a transaction that is rolled back afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--issues', type=int, default=1_000_000,
+                            help='Synthetic issues to add before measuring')
+        parser.add_argument('--queries', type=int, default=50, help='Search terms to time')
+        parser.add_argument('--limit', type=int, default=50, help='Page size per search')
+
+    def timed(self, func, terms):
+        samples = []
+        for term in terms:
+            start = time.perf_counter()
+            func(term)
+            samples.append((time.perf_counter() - start) * 1000)
+        return percentiles(samples)
+
+    def handle(self, *args, **options):
+        limit = options['limit']
+        terms = search_terms(options['queries'])
+
+        with transaction.atomic():
+            user = User.objects.create(email='benchmark-search@citycare.invalid', name='Benchmark')
+            start = time.perf_counter()
+            for batch in issue_batches([user.id], options['issues']):
+                Issue.objects.bulk_create(batch)
+            self.stdout.write(f"Inserted {options['issues']} issues in {time.perf_counter() - start:.1f}s "
+                              f"({Issue.objects.count()} total)")
+
+            results = {
+                'indexed': self.timed(lambda term: search_issue_ids(term, limit), terms),
+                'like_scan': self.timed(
+                    lambda term: list(Issue.objects.filter(like_scan_q(search_tokens(term)))
+                                      .order_by('-created_at', '-id').values_list('id', flat=True)[:limit]),
+                    terms),
+            }
+            transaction.set_rollback(True)
+
+        for name, stats in results.items():
+            self.stdout.write(f"{name:>10}: p50 {stats['p50']:.2f} ms  p95 {stats['p95']:.2f} ms  "
+                              f"max {stats['max']:.2f} ms")
+        speedup = results['like_scan']['p50'] / max(results['indexed']['p50'], 1e-9)
+        self.stdout.write(self.style.SUCCESS(f'Indexed search is {speedup:.1f}x faster at p50'))
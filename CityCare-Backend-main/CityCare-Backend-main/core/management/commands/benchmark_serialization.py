@@ -0,0 +1,86 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from core.models import Issue, User
+from core.projections import ISSUE_FIELDS, ISSUE_USER_FIELDS, issue_values, issue_row
+from core.renderers import FastJSONRenderer, orjson
+from core.synthetic import issue_batches
+
+
+def legacy_issue_row(row):
+    """The previous shaping: a values() dict per row, timestamps formatted in Python"""
+    data = {
+        'id': row['id'],
+        'problem': row['problem'],
+        'problem_type': row['problem_type'],
+        'location': row['location'],
+        'description': row['description'],
+        'status': row['status'],
+        'lat': row['lat'],
+        'lon': row['lon'],
+        'duplicate_of': row['duplicate_of_id'],
+        'date': row['date'].isoformat(),
+        'created_at': row['created_at'].isoformat()
+    }
+    data['user'] = {
+        'id': row['user_id'],
+        'name': row['user__name'],
+        'email': row['user__email']
+    }
+    return data
+
+
+class Command(BaseCommand):
+    help = ('Measure issue list serialization throughput (rows/s): values() dicts + DRF JSONRenderer '
+            '(before) against values_list tuples + FastJSONRenderer (after). Synthetic issues are '
+            'inserted inside a transaction that is rolled back afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50_000, help='Issues serialized per run')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per pipeline (best is kept)')
+
+    def best_of(self, repeat, func):
+        timings = {}
+        for _ in range(repeat):
+            for stage, seconds in func().items():
+                timings[stage] = min(timings.get(stage, seconds), seconds)
+        return timings
+
+    def run_pipeline(self, fetch, shape, renderer):
+        start = time.perf_counter()
+        rows = list(fetch())
+        fetched = time.perf_counter()
+        data = {'issues': [shape(row) for row in rows]}
+        shaped = time.perf_counter()
+        renderer.render(data)
+        rendered = time.perf_counter()
+        return {'query': fetched - start, 'shape': shaped - fetched, 'render': rendered - shaped}
+
+    def handle(self, *args, **options):
+        count = options['rows']
+        with transaction.atomic():
+            user = User.objects.create(email='benchmark-serialization@citycare.invalid', name='Benchmark')
+            for batch in issue_batches([user.id], count):
+                Issue.objects.bulk_create(batch)
+            issues = Issue.objects.filter(user=user).order_by('-created_at', '-id')
+
+            results = {
+                'before': self.best_of(options['repeat'], lambda: self.run_pipeline(
+                    lambda: issues.values(*ISSUE_FIELDS, *ISSUE_USER_FIELDS), legacy_issue_row, JSONRenderer())),
+                'after': self.best_of(options['repeat'], lambda: self.run_pipeline(
+                    lambda: issue_values(issues, with_user=True), issue_row, FastJSONRenderer())),
+            }
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{count} issues, best of {options['repeat']}, "
+                          f"renderer backend: {'orjson' if orjson else 'stdlib json'}")
+        for name, timings in results.items():
+            serialize = timings['shape'] + timings['render']
+            self.stdout.write(f"{name:>6}: query {timings['query'] * 1000:7.1f} ms  "
+                              f"shape {count / timings['shape']:>10,.0f} rows/s  "
+                              f"render {count / timings['render']:>10,.0f} rows/s  "
+                              f"shape+render {count / serialize:>10,.0f} rows/s")
+        speedup = (results['before']['shape'] + results['before']['render']) / (
+            results['after']['shape'] + results['after']['render'])
+        self.stdout.write(self.style.SUCCESS(f'Serialization is {speedup:.1f}x faster'))
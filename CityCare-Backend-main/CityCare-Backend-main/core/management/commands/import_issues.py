@@ -0,0 +1,43 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from core.imports import IssueImporter, IMPORT_CHUNK_SIZE, iter_rows, error_report_writer
+
+
+class Command(BaseCommand):
+    help = 'Stream-import legacy issues from a CSV or NDJSON file in bulk_create chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or NDJSON file to import')
+        parser.add_argument('--format', choices=['csv', 'ndjson'],
+                            help='Input format (default: from the file extension)')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE,
+                            help='Rows inserted per transaction')
+        parser.add_argument('--errors', default=None,
+                            help='Write rejected rows to this CSV file (default: <path>.errors.csv)')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+        errors_path = options['errors'] or f'{path}.errors.csv'
+        start = time.perf_counter()
+
+        def progress(importer):
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f'{importer.imported} imported, {importer.rejected} rejected '
+                              f'({importer.imported / max(elapsed, 1e-9):.0f} rows/s)')
+
+        try:
+            with open(path, 'rb') as source, open(errors_path, 'w', newline='') as errors:
+                importer = IssueImporter(chunk_size=options['chunk_size'], max_errors_kept=0,
+                                         error_sink=error_report_writer(errors))
+                importer.run(iter_rows(source, file_format), on_chunk=progress)
+        except OSError as e:
+            raise CommandError(str(e))
+
+        summary = importer.summary()
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {summary['imported']} issues ({summary['users_created']} new users) "
+            f"in {time.perf_counter() - start:.1f}s"))
+        if summary['rejected']:
+            self.stdout.write(self.style.WARNING(f"{summary['rejected']} rows rejected, see {errors_path}"))
+        self.stdout.write('Run backfill_issue_signatures to add the imported issues to duplicate detection.')
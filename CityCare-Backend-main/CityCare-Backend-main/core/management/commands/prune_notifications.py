@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.retention import prune_notifications
+
+
+class Command(BaseCommand):
+    help = ('Delete expired notifications, then each recently notified user\'s (and the global stream\'s) '
+            'notifications past the newest NOTIFICATION_MAX_PER_USER, in small index-ordered batches. '
+            'Run it from cron.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.NOTIFICATION_PRUNE_BATCH_SIZE,
+                            help='Notifications deleted per statement')
+        parser.add_argument('--max-per-user', type=int, default=settings.NOTIFICATION_MAX_PER_USER,
+                            help='Notifications kept per user and for the global stream')
+        parser.add_argument('--since-hours', type=float, default=settings.NOTIFICATION_PRUNE_LOOKBACK_HOURS,
+                            help='Only check streams sent a notification in the last this many hours '
+                                 'against the cap; 0 checks every stream (e.g. after lowering the cap)')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches, to leave room for other writers')
+
+    def handle(self, *args, **options):
+        pruned = prune_notifications(options['max_per_user'], options['batch_size'], options['pause'],
+                                     options['since_hours'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {pruned['expired']} expired and {pruned['over_cap']} over-cap notifications"))
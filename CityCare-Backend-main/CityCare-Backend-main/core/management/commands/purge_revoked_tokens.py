@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from core.tokens import purge_expired
+
+
+class Command(BaseCommand):
+    help = ('Delete revoked refresh tokens that have expired. Workers also do this on their '
+            'own every TOKEN_BLACKLIST_PURGE_INTERVAL seconds; use this from cron when idle.')
+
+    def handle(self, *args, **options):
+        deleted = purge_expired()
+        self.stdout.write(self.style.SUCCESS(f'Purged {deleted} expired revoked tokens'))
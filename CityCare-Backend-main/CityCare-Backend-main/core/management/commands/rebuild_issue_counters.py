@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from core.counters import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the dashboard issue counters from the issues table and report drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report drift, do not rewrite the counters')
+
+    def handle(self, *args, **options):
+        drift = rebuild(dry_run=options['dry_run'])
+        for status, problem_type, stored, actual in drift:
+            self.stdout.write(f'{status} / {problem_type}: stored {stored}, actual {actual}')
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Counters are consistent'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} counters drifted (not rewritten)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt counters, fixed {len(drift)} drifted cells'))
@@ -0,0 +1,46 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from core.synthetic import (
+    seed_city, FEEDBACK_ON_RESOLVED, SEED_HISTORY_DAYS, SEED_PASSWORD, SEED_EMAIL_DOMAIN,
+)
+
+
+class Command(BaseCommand):
+    help = ('Generate a synthetic city (citizens, issues with a skewed problem_type/status mix, '
+            'feedback and notifications) with bulk_create, for benchmarks and load tests')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--issues', type=int, default=100_000, help='Issues to create')
+        parser.add_argument('--users', type=int, default=None,
+                            help='Citizens to create (default: one per ten issues)')
+        parser.add_argument('--notifications', type=int, default=None,
+                            help='Notifications to create (default: one per two issues)')
+        parser.add_argument('--feedback-rate', type=float, default=FEEDBACK_ON_RESOLVED,
+                            help='Share of resolved issues that get feedback')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+        parser.add_argument('--history-days', type=int, default=SEED_HISTORY_DAYS,
+                            help='Days of history the issues and notifications are spread over')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+
+        def progress(model, inserted):
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f'{inserted} {model} ({elapsed:.1f}s)')
+
+        try:
+            inserted = seed_city(options['issues'], users=options['users'],
+                                 notifications=options['notifications'],
+                                 feedback_rate=options['feedback_rate'],
+                                 batch_size=options['batch_size'], seed=options['seed'],
+                                 history_days=options['history_days'], on_batch=progress)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {inserted.get('users', 0)} users, {inserted.get('issues', 0)} issues, "
+            f"{inserted.get('feedback', 0)} feedback and {inserted.get('notifications', 0)} notifications "
+            f"in {time.perf_counter() - start:.1f}s"))
+        self.stdout.write(f'Citizens are citizen<N>@{SEED_EMAIL_DOMAIN} with password "{SEED_PASSWORD}". '
+                          'Run backfill_issue_signatures to add the issues to duplicate detection.')
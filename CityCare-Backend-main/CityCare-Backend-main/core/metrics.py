@@ -0,0 +1,248 @@
+"""
+Request metrics in Prometheus text format.
+
+``MetricsMiddleware`` records, per route (url name) and method: a latency
+histogram, requests by status code, response size, and the number and total
+time of SQL queries the request ran. Queries are counted by an execute
+wrapper installed on every database connection as it opens; it adds to the
+stats of the request running in the current context, which ``sync_to_async``
+carries into worker threads, so async views are counted too.
+
+Counters live in plain dicts in each process. Every
+``METRICS_FLUSH_INTERVAL`` seconds a process writes a snapshot to
+``METRICS_DIR/<pid>.json``, and ``/metrics`` sums the snapshots of all
+processes, so any worker can answer a scrape. Snapshots of exited workers are
+kept so totals never go backwards; clear the directory on deploy.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+
+# name -> (type, help, buckets, label names)
+METRICS = {
+    'citycare_http_requests_total': (
+        'counter', 'Requests by route, method and status code', None, ('route', 'method', 'status')),
+    'citycare_http_request_duration_seconds': (
+        'histogram', 'Time to produce the response', LATENCY_BUCKETS, ('route', 'method')),
+    'citycare_http_response_size_bytes': (
+        'histogram', 'Response body size (streaming responses are not measured)', SIZE_BUCKETS,
+        ('route', 'method')),
+    'citycare_db_queries_per_request': (
+        'histogram', 'SQL queries run by one request', QUERY_COUNT_BUCKETS, ('route', 'method')),
+    'citycare_db_queries_total': (
+        'counter', 'SQL queries run by requests', None, ('route', 'method')),
+    'citycare_db_query_seconds_total': (
+        'counter', 'Time spent in SQL queries run by requests', None, ('route', 'method')),
+}
+
+
+class RequestStats:
+    __slots__ = ('queries', 'query_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+_current = ContextVar('request_stats', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper: time the query against the current request's stats"""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_seconds += time.perf_counter() - start
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    """``connection_created`` receiver"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        # (name, labels) -> [bucket counts..., +Inf count, sum]
+        self._histograms = {}
+        self._flushed_at = 0.0
+
+    def inc(self, name, labels, value=1):
+        with self._lock:
+            self._counters[name, labels] += value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        with self._lock:
+            series = self._histograms.get((name, labels))
+            if series is None:
+                series = self._histograms[name, labels] = [0] * (len(buckets) + 1) + [0.0]
+            series[bisect.bisect_left(buckets, value)] += 1
+            series[-1] += value
+
+    def record(self, route, method, status, seconds, size, stats):
+        labels = (route, method)
+        self.inc('citycare_http_requests_total', (route, method, str(status)))
+        self.observe('citycare_http_request_duration_seconds', labels, seconds)
+        if size is not None:
+            self.observe('citycare_http_response_size_bytes', labels, size)
+        self.observe('citycare_db_queries_per_request', labels, stats.queries)
+        self.inc('citycare_db_queries_total', labels, stats.queries)
+        self.inc('citycare_db_query_seconds_total', labels, stats.query_seconds)
+        self.maybe_flush()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, list(labels), list(series)]
+                               for (name, labels), series in self._histograms.items()],
+            }
+
+    def maybe_flush(self):
+        if time.monotonic() - self._flushed_at >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """Write this process's snapshot for the other workers to aggregate"""
+        self._flushed_at = time.monotonic()
+        directory = settings.METRICS_DIR
+        if not directory:
+            return
+        path = Path(directory)
+        try:
+            path.mkdir(parents=True, exist_ok=True)
+            temp = path / f'.{os.getpid()}.json.tmp'
+            temp.write_text(json.dumps(self.snapshot()))
+            os.replace(temp, path / f'{os.getpid()}.json')
+        except OSError:
+            pass
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+registry = Registry()
+
+
+def collect():
+    """Sum the snapshots of every process (this one read live)"""
+    registry.flush()
+    snapshots = [registry.snapshot()]
+    if settings.METRICS_DIR:
+        own = f'{os.getpid()}.json'
+        for path in Path(settings.METRICS_DIR).glob('*.json'):
+            if path.name == own:
+                continue
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+
+    counters, histograms = defaultdict(float), {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            counters[name, tuple(labels)] += value
+        for name, labels, series in snapshot['histograms']:
+            if name not in METRICS:
+                continue
+            total = histograms.setdefault((name, tuple(labels)), [0] * len(series))
+            for i, value in enumerate(series):
+                total[i] += value
+    return counters, histograms
+
+
+def _labels(names, values, extra=()):
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for value in values)
+    pairs = [f'{name}="{value}"' for name, value in zip(names, escaped)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def render():
+    """The aggregated metrics in Prometheus text exposition format 0.0.4"""
+    counters, histograms = collect()
+    lines = []
+    for name, (kind, help_text, buckets, label_names) in METRICS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        if kind == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{_labels(label_names, labels)} {_number(value)}')
+            continue
+        for (metric, labels), series in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip((*buckets, '+Inf'), series):
+                cumulative += count
+                le = bound if bound == '+Inf' else _number(bound)
+                lines.append(f"{name}_bucket{_labels(label_names, labels, [('le', le)])} {cumulative}")
+            lines.append(f'{name}_sum{_labels(label_names, labels)} {_number(series[-1])}')
+            lines.append(f'{name}_count{_labels(label_names, labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, time.perf_counter() - start, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, time.perf_counter() - start, stats)
+        return response
+
+    def record(self, request, response, seconds, stats):
+        # Label by url name, never by raw path, to keep the series count bounded
+        match = request.resolver_match
+        route = (match.url_name or match.view_name) if match else 'unmatched'
+        size = None if response.streaming else len(response.content)
+        registry.record(route, request.method, response.status_code, seconds, size, stats)
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:24
+
+from django.db import migrations, models
+
+
+def populate_counters(apps, schema_editor):
+    Issue = apps.get_model('core', 'Issue')
+    IssueCounter = apps.get_model('core', 'IssueCounter')
+    rows = Issue.objects.order_by().values('status', 'problem_type').annotate(count=models.Count('id'))
+    IssueCounter.objects.bulk_create([IssueCounter(**row) for row in rows])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_notification_read_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('IN_PROGRESS', 'In Progress'), ('RESOLVED', 'Resolved'), ('REPORT', 'Report')], max_length=20)),
+                ('problem_type', models.CharField(max_length=50)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'issue_counters',
+                'constraints': [models.UniqueConstraint(fields=('status', 'problem_type'), name='issue_counter_unique')],
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
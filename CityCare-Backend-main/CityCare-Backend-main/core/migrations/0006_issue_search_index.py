@@ -0,0 +1,59 @@
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    """CREATE VIRTUAL TABLE issues_fts USING fts5(
+        problem, location, description,
+        content='issues', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER issues_fts_ai AFTER INSERT ON issues BEGIN
+        INSERT INTO issues_fts(rowid, problem, location, description)
+        VALUES (new.id, new.problem, new.location, new.description);
+    END""",
+    """CREATE TRIGGER issues_fts_ad AFTER DELETE ON issues BEGIN
+        INSERT INTO issues_fts(issues_fts, rowid, problem, location, description)
+        VALUES ('delete', old.id, old.problem, old.location, old.description);
+    END""",
+    """CREATE TRIGGER issues_fts_au AFTER UPDATE OF problem, location, description ON issues BEGIN
+        INSERT INTO issues_fts(issues_fts, rowid, problem, location, description)
+        VALUES ('delete', old.id, old.problem, old.location, old.description);
+        INSERT INTO issues_fts(rowid, problem, location, description)
+        VALUES (new.id, new.problem, new.location, new.description);
+    END""",
+    "INSERT INTO issues_fts(issues_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    'DROP TRIGGER IF EXISTS issues_fts_au',
+    'DROP TRIGGER IF EXISTS issues_fts_ad',
+    'DROP TRIGGER IF EXISTS issues_fts_ai',
+    'DROP TABLE IF EXISTS issues_fts',
+]
+
+POSTGRES_FORWARD = [
+    """CREATE INDEX issues_search_idx ON issues USING GIN (
+        to_tsvector('english', problem || ' ' || location || ' ' || description)
+    )""",
+]
+
+POSTGRES_REVERSE = ['DROP INDEX IF EXISTS issues_search_idx']
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_issue_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            _run({'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRES_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_issue_coordinates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueSignature',
+            fields=[
+                ('issue', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='core.issue')),
+                ('minhash', models.BinaryField()),
+            ],
+            options={
+                'db_table': 'issue_signatures',
+            },
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='core.issue'),
+        ),
+        migrations.CreateModel(
+            name='IssueLSHBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('issue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='core.issue')),
+            ],
+            options={
+                'db_table': 'issue_lsh_buckets',
+                'indexes': [models.Index(fields=['band', 'bucket'], name='issue_lsh_band_bucket_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_admin_changelist_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedIssue',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('problem', models.CharField(max_length=200)),
+                ('problem_type', models.CharField(max_length=50)),
+                ('location', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('date', models.DateTimeField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('IN_PROGRESS', 'In Progress'), ('RESOLVED', 'Resolved'), ('REPORT', 'Report')], max_length=20)),
+                ('lat', models.FloatField(blank=True, null=True)),
+                ('lon', models.FloatField(blank=True, null=True)),
+                ('geohash', models.CharField(blank=True, max_length=12, null=True)),
+                ('duplicate_of_id', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_issues', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'archived_issues',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedFeedback',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('feedback_text', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_feedback', to=settings.AUTH_USER_MODEL)),
+                ('issue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feedback', to='core.archivedissue')),
+            ],
+            options={
+                'db_table': 'archived_feedback',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedissue',
+            index=models.Index(fields=['-created_at', '-id'], name='archived_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedissue',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='archived_user_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedissue',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='archived_status_created_idx'),
+        ),
+    ]
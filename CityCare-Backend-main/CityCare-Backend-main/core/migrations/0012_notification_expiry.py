@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:12
+
+from datetime import timedelta
+import core.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_expiry(apps, schema_editor):
+    # Existing notifications expire NOTIFICATION_TTL_DAYS after they were sent
+    Notification = apps.get_model('core', 'Notification')
+    Notification.objects.update(
+        expires_at=models.F('created_at') + timedelta(days=settings.NOTIFICATION_TTL_DAYS))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_issue_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='expires_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(backfill_expiry, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='notification',
+            name='expires_at',
+            field=models.DateTimeField(default=core.models.notification_expiry),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['expires_at', 'id'], name='notifications_expires_idx'),
+        ),
+    ]
@@ -1,6 +1,9 @@
+from datetime import timedelta
+from django.conf import settings
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
 from django.utils import timezone
+from .geo import encode as geohash_encode
 
 class UserManager(BaseUserManager):
     def create_user(self, email, name, password=None, **extra_fields):
@@ -59,21 +62,48 @@ class Issue(models.Model):
     description = models.TextField()
     date = models.DateTimeField(auto_now_add=True, editable=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    lat = models.FloatField(null=True, blank=True)
+    lon = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True, db_index=True, editable=False)
+    duplicate_of = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True,
+                                     related_name='duplicates')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.problem} - {self.location} ({self.status})"
 
+    def set_geohash(self):
+        has_point = self.lat is not None and self.lon is not None
+        self.geohash = geohash_encode(self.lat, self.lon) if has_point else None
+
+    def save(self, *args, **kwargs):
+        self.set_geohash()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and ({'lat', 'lon'} & set(update_fields)):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
+
     class Meta:
         db_table = 'issues'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='issues_created_id_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='issues_user_created_id_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='issues_status_created_id_idx'),
+        ]
+
+def notification_expiry():
+    return timezone.now() + timedelta(days=settings.NOTIFICATION_TTL_DAYS)
 
 class Notification(models.Model):
     title = models.CharField(max_length=200)
     message = models.TextField()
     target_user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='notifications')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Hidden from then on, and deleted by prune_notifications
+    expires_at = models.DateTimeField(default=notification_expiry)
 
     def __str__(self):
         if self.target_user:
@@ -83,6 +113,12 @@ class Notification(models.Model):
     class Meta:
         db_table = 'notifications'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='notifications_created_id_idx'),
+            models.Index(fields=['target_user', '-created_at', '-id'], name='notifications_user_created_idx'),
+            models.Index(fields=['title'], name='notifications_title_idx'),
+            models.Index(fields=['expires_at', 'id'], name='notifications_expires_idx'),
+        ]
 
     @property
     def is_global(self):
@@ -93,10 +129,153 @@ class Feedback(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='feedback_given')
     feedback_text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Feedback by {self.user.name} on {self.issue.problem}"
 
     class Meta:
         db_table = 'feedback'
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='feedback_created_id_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='feedback_user_created_id_idx'),
+        ]
+
+class ArchivedIssue(models.Model):
+    """A closed issue moved out of ``issues`` by ``archive_issues``, with the same id and columns"""
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_issues')
+    problem = models.CharField(max_length=200)
+    problem_type = models.CharField(max_length=50)
+    location = models.CharField(max_length=200)
+    description = models.TextField()
+    date = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=Issue.STATUS_CHOICES)
+    lat = models.FloatField(null=True, blank=True)
+    lon = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True)
+    # May point at a hot or an archived issue, so it is not a foreign key
+    duplicate_of_id = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.problem} - {self.location} ({self.status}, archived)"
+
+    class Meta:
+        db_table = 'archived_issues'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='archived_created_id_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='archived_user_created_id_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='archived_status_created_idx'),
+        ]
+
+class ArchivedFeedback(models.Model):
+    """Feedback on an archived issue, moved with it"""
+    id = models.BigIntegerField(primary_key=True)
+    issue = models.ForeignKey(ArchivedIssue, on_delete=models.CASCADE, related_name='feedback')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_feedback')
+    feedback_text = models.TextField()
+    created_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'archived_feedback'
+        ordering = ['-created_at']
+
+class OutboundEmail(models.Model):
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('SENDING', 'Sending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    to_email = models.EmailField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.CharField(max_length=32, blank=True, default='')
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
+
+    class Meta:
+        db_table = 'email_outbox'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_due_idx'),
+        ]
+
+class NotificationReadState(models.Model):
+    """
+    Per-user notification read state.
+
+    Every notification with ``id <= read_through_id`` is read; notifications
+    above it that were read individually are bits in ``read_bitmap`` (bit i
+    is notification ``read_through_id + 1 + i``), zlib-compressed. This keeps
+    one small row per user instead of one row per user per notification.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='notification_read_state')
+    read_through_id = models.BigIntegerField(default=0)
+    read_bitmap = models.BinaryField(default=b'')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Read state for {self.user_id} (through {self.read_through_id})"
+
+    class Meta:
+        db_table = 'notification_read_state'
+
+class IssueCounter(models.Model):
+    """Materialized count of issues per (status, problem_type) for the admin dashboard"""
+    status = models.CharField(max_length=20, choices=Issue.STATUS_CHOICES)
+    problem_type = models.CharField(max_length=50)
+    count = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.status} / {self.problem_type}: {self.count}"
+
+    class Meta:
+        db_table = 'issue_counters'
+        constraints = [
+            models.UniqueConstraint(fields=['status', 'problem_type'], name='issue_counter_unique'),
+        ]
+
+
+class IssueSignature(models.Model):
+    """MinHash signature of an issue's text, used for near-duplicate detection"""
+    issue = models.OneToOneField(Issue, on_delete=models.CASCADE, primary_key=True, related_name='signature')
+    minhash = models.BinaryField()
+
+    class Meta:
+        db_table = 'issue_signatures'
+
+class IssueLSHBucket(models.Model):
+    """One LSH band bucket of an issue's signature; issues sharing a bucket are duplicate candidates"""
+    issue = models.ForeignKey(Issue, on_delete=models.CASCADE, related_name='lsh_buckets')
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        db_table = 'issue_lsh_buckets'
+        indexes = [
+            models.Index(fields=['band', 'bucket'], name='issue_lsh_band_bucket_idx'),
+        ]
+
+class RevokedToken(models.Model):
+    """A refresh token jti revoked by logout or rotation; kept only until the token expires"""
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'revoked_tokens'
@@ -0,0 +1,138 @@
+"""
+Durable email outbox.
+
+Views call ``enqueue_email`` inside their own transaction, so an email is
+recorded if and only if the change that triggered it commits. The
+``send_outbox`` management command then drains due rows in batches over a
+single SMTP connection, retrying failures with exponential backoff.
+"""
+import logging
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+# A claimed batch is leased for this long; if the worker dies mid-batch the
+# rows become due again once the lease runs out.
+CLAIM_LEASE = timedelta(minutes=5)
+RETRY_BASE_DELAY = timedelta(seconds=30)
+RETRY_MAX_DELAY = timedelta(hours=1)
+
+
+def enqueue_email(subject, body, to_email, from_email=None):
+    """Record an email in the outbox for the sender worker to deliver"""
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to_email=to_email,
+    )
+
+
+def enqueue_emails(emails):
+    """Record several (subject, body, to_email) emails with one INSERT"""
+    return OutboundEmail.objects.bulk_create([
+        OutboundEmail(subject=subject, body=body, to_email=to_email,
+                      from_email=settings.DEFAULT_FROM_EMAIL)
+        for subject, body, to_email in emails
+    ])
+
+
+def retry_delay(attempts):
+    """Exponential backoff delay before the next attempt"""
+    return min(RETRY_BASE_DELAY * (2 ** (attempts - 1)), RETRY_MAX_DELAY)
+
+
+def claim_batch(batch_size):
+    """
+    Claim up to ``batch_size`` due emails for this worker.
+
+    Claiming is a conditional UPDATE tagged with a fresh token, so concurrent
+    workers never pick up the same row.
+    """
+    now = timezone.now()
+    due = (Q(status='PENDING') | Q(status='SENDING')) & Q(next_attempt_at__lte=now)
+    ids = list(OutboundEmail.objects.filter(due).order_by('next_attempt_at', 'id')
+               .values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+
+    token = uuid.uuid4().hex
+    OutboundEmail.objects.filter(due, id__in=ids).update(
+        status='SENDING', claim_token=token, next_attempt_at=now + CLAIM_LEASE
+    )
+    return list(OutboundEmail.objects.filter(claim_token=token, status='SENDING'))
+
+
+def _record_failure(email, error, max_attempts):
+    logger.warning('Failed to send outbox email %s: %s', email.id, error)
+    email.last_error = str(error)
+    if email.attempts >= max_attempts:
+        email.status = 'FAILED'
+    else:
+        email.status = 'PENDING'
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+
+
+def send_batch(emails, max_attempts, connection=None):
+    """Deliver a claimed batch over one connection; returns (sent, failed)"""
+    sent = failed = 0
+    connection = connection or get_connection()
+
+    for email in emails:
+        email.attempts += 1
+        email.claim_token = ''
+
+    try:
+        connection.open()
+    except Exception as e:
+        for email in emails:
+            _record_failure(email, e, max_attempts)
+        failed = len(emails)
+    else:
+        try:
+            for email in emails:
+                message = EmailMessage(
+                    subject=email.subject,
+                    body=email.body,
+                    from_email=email.from_email,
+                    to=[email.to_email],
+                    connection=connection,
+                )
+                try:
+                    connection.send_messages([message])
+                except Exception as e:
+                    _record_failure(email, e, max_attempts)
+                    failed += 1
+                else:
+                    email.status = 'SENT'
+                    email.sent_at = timezone.now()
+                    email.last_error = ''
+                    sent += 1
+        finally:
+            connection.close()
+
+    OutboundEmail.objects.bulk_update(
+        emails, ['status', 'attempts', 'next_attempt_at', 'claim_token', 'last_error', 'sent_at']
+    )
+    return sent, failed
+
+
+def drain_outbox(batch_size=None, max_attempts=None):
+    """Send every email that is currently due; returns (sent, failed)"""
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    max_attempts = max_attempts or settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+    total_sent = total_failed = 0
+
+    while True:
+        emails = claim_batch(batch_size)
+        if not emails:
+            return total_sent, total_failed
+        sent, failed = send_batch(emails, max_attempts)
+        total_sent += sent
+        total_failed += failed
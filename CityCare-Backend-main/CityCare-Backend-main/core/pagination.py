@@ -0,0 +1,104 @@
+import base64
+import json
+from datetime import datetime
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class CursorError(ValueError):
+    """Raised when a cursor or limit query parameter cannot be used"""
+
+
+def encode_cursor(created_at, pk, direction):
+    """Build an opaque cursor pointing at a (created_at, id) position"""
+    payload = json.dumps({'t': created_at.isoformat(), 'i': pk, 'd': direction},
+                         separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor into (created_at, id, direction)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = datetime.fromisoformat(payload['t'])
+        pk = int(payload['i'])
+        direction = payload['d']
+    except (ValueError, KeyError, TypeError):
+        raise CursorError('Invalid cursor')
+
+    if direction not in ('next', 'prev'):
+        raise CursorError('Invalid cursor')
+    return created_at, pk, direction
+
+
+def parse_limit(value):
+    """Parse the ?limit= parameter, clamping it to MAX_PAGE_SIZE"""
+    if value in (None, ''):
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise CursorError('Invalid limit')
+    if limit < 1:
+        raise CursorError('Invalid limit')
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def paginate_keyset(queryset, request, row_key=None, merge=()):
+    """
+    Keyset-paginate a queryset newest first on (created_at, id).
+
+    The ordering matches the models' ``-created_at`` Meta ordering with ``id``
+    as a tie-breaker, so every page is a single index range scan no matter how
+    deep it is. ``row_key`` gives a row's ``(created_at, id)`` for ``values_list``
+    rows. ``merge`` holds further querysets over disjoint ids (the issue
+    archive); each is scanned the same way and the pages are merged.
+    Returns ``(rows, next_cursor, prev_cursor)``.
+    """
+    limit = parse_limit(request.GET.get('limit'))
+    cursor = request.GET.get('cursor')
+    querysets = [queryset, *merge]
+
+    direction = 'next'
+    if cursor:
+        created_at, pk, direction = decode_cursor(cursor)
+        if direction == 'next':
+            position = Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        else:
+            position = Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+        querysets = [queryset.filter(position) for queryset in querysets]
+
+    if direction == 'next':
+        ordering = ('-created_at', '-id')
+    else:
+        ordering = ('created_at', 'id')
+
+    row_key = row_key or _row_key
+    rows = []
+    for queryset in querysets:
+        rows += queryset.order_by(*ordering)[:limit + 1]
+    if merge:
+        rows.sort(key=row_key, reverse=direction == 'next')
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == 'prev':
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        first, last = row_key(rows[0]), row_key(rows[-1])
+        if has_more or direction == 'prev':
+            next_cursor = encode_cursor(*last, 'next')
+        if cursor and (has_more or direction == 'next'):
+            prev_cursor = encode_cursor(*first, 'prev')
+
+    return rows, next_cursor, prev_cursor
+
+
+def _row_key(row):
+    if isinstance(row, dict):
+        return row['created_at'], row['id']
+    return row.created_at, row.id
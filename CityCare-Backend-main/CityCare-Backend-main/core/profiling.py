@@ -0,0 +1,248 @@
+"""
+On-demand request profiling for admins.
+
+An admin request carrying ``X-Profile: 1`` (or ``?_profile=1``) runs under a
+sampling profiler: a background thread snapshots the request thread's stack
+every ``PROFILE_SAMPLE_INTERVAL`` seconds and counts identical stacks, and
+every SQL statement is recorded with its duration. The result is saved as
+JSON in ``PROFILE_DIR``, which keeps only the newest ``PROFILE_MAX_FILES``
+profiles, and its id is returned in the ``X-Profile-Id`` response header.
+The stacks download in the folded format read by flamegraph.pl and
+speedscope.
+
+Requests without the trigger pay one header and one query parameter lookup.
+Async views hand their sync work to other threads, so for them every
+thread is sampled, each stack prefixed with its thread name.
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from .authentication import authenticate_jwt
+
+TRIGGER_HEADER = 'HTTP_X_PROFILE'
+TRIGGER_PARAM = '_profile'
+PROFILE_ID_RE = re.compile(r'^[0-9]{19}-[0-9a-f]{8}$')
+MAX_STACK_DEPTH = 200
+
+
+class ProfileError(ValueError):
+    """Unknown or malformed profile id"""
+
+
+class Sampler(threading.Thread):
+    """Count the stacks of ``thread_id`` (or of every other thread if None)"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='request-profiler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+
+    def run(self):
+        names = {}
+        while not self._stopped.wait(self.interval):
+            frames = sys._current_frames()
+            if self.thread_id is not None:
+                targets = [(None, frames.get(self.thread_id))]
+            else:
+                if len(names) != len(frames):
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                targets = [(names.get(ident, str(ident)), frame) for ident, frame in frames.items()
+                           if ident != self.ident]
+            for thread_name, frame in targets:
+                if frame is not None:
+                    self.stacks[folded_stack(frame, thread_name)] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def frame_label(code):
+    path = Path(code.co_filename)
+    # co_qualname is new in Python 3.11
+    return f'{getattr(code, "co_qualname", code.co_name)} ({"/".join(path.parts[-2:])}:{code.co_firstlineno})'
+
+
+def folded_stack(frame, thread_name=None):
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    if thread_name:
+        labels.append(thread_name)
+    return ';'.join(reversed(labels))
+
+
+class Profile:
+    def __init__(self, request):
+        self.request = request
+        self.queries = []
+        self.started_at = timezone.now()
+        self.id = f'{time.time_ns()}-{uuid.uuid4().hex[:8]}'
+
+    def start(self, thread_id):
+        self.sampler = Sampler(thread_id, settings.PROFILE_SAMPLE_INTERVAL)
+        self._token = _current.set(self)
+        self._start = time.perf_counter()
+        self.sampler.start()
+
+    def stop(self):
+        self.duration = time.perf_counter() - self._start
+        self.sampler.stop()
+        _current.reset(self._token)
+
+    def as_dict(self, response):
+        return {
+            'id': self.id,
+            'method': self.request.method,
+            'path': self.request.path,
+            'status': response.status_code,
+            'started_at': self.started_at.isoformat(),
+            'duration_ms': round(self.duration * 1000, 3),
+            'sample_interval_ms': settings.PROFILE_SAMPLE_INTERVAL * 1000,
+            'samples': self.sampler.samples,
+            'stacks': dict(self.sampler.stacks.most_common()),
+            'query_count': len(self.queries),
+            'query_ms': round(sum(query['ms'] for query in self.queries), 3),
+            'queries': self.queries,
+        }
+
+
+_current = ContextVar('request_profile', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper: log statements run while a profile is active"""
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.queries.append({
+            'sql': sql,
+            'alias': context['connection'].alias,
+            'many': many,
+            'ms': round((time.perf_counter() - start) * 1000, 3),
+        })
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    """``connection_created`` receiver"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+# Ring buffer on disk
+
+def profile_dir():
+    return Path(settings.PROFILE_DIR)
+
+
+def save(data):
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    temp = directory / f".{data['id']}.json.tmp"
+    temp.write_text(json.dumps(data))
+    os.replace(temp, directory / f"{data['id']}.json")
+
+    # Ids start with a nanosecond timestamp, so name order is age order
+    paths = sorted(directory.glob('*.json'))
+    for path in paths[:max(len(paths) - settings.PROFILE_MAX_FILES, 0)]:
+        path.unlink(missing_ok=True)
+
+
+def list_profiles():
+    """Summaries of the saved profiles, newest first"""
+    summaries = []
+    for path in sorted(profile_dir().glob('*.json'), reverse=True):
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        summaries.append({key: data[key] for key in (
+            'id', 'method', 'path', 'status', 'started_at', 'duration_ms', 'samples', 'query_count', 'query_ms')})
+    return summaries
+
+
+def load(profile_id):
+    if not PROFILE_ID_RE.match(profile_id):
+        raise ProfileError('Invalid profile id')
+    try:
+        return json.loads((profile_dir() / f'{profile_id}.json').read_text())
+    except FileNotFoundError:
+        raise ProfileError('Profile not found')
+
+
+def folded(data):
+    """Stacks in flamegraph.pl's folded format (``frame;frame;frame count``)"""
+    return ''.join(f'{stack} {count}\n' for stack, count in data['stacks'].items())
+
+
+# Middleware
+
+def is_triggered(request):
+    # request.GET is parsed once and reused by the view
+    return request.META.get(TRIGGER_HEADER) == '1' or request.GET.get(TRIGGER_PARAM) == '1'
+
+
+def _wants_profile(request):
+    user = authenticate_jwt(request)
+    return user is not None and user.is_admin
+
+
+def saved(profile, response):
+    save(profile.as_dict(response))
+    response['X-Profile-Id'] = profile.id
+    return response
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not is_triggered(request) or not _wants_profile(request):
+            return self.get_response(request)
+
+        profile = Profile(request)
+        profile.start(threading.get_ident())
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.stop()
+        return saved(profile, response)
+
+    async def __acall__(self, request):
+        if not is_triggered(request) or not await sync_to_async(_wants_profile)(request):
+            return await self.get_response(request)
+
+        profile = Profile(request)
+        profile.start(None)
+        try:
+            response = await self.get_response(request)
+        finally:
+            profile.stop()
+        return await sync_to_async(saved)(profile, response)
@@ -0,0 +1,249 @@
+"""
+Column projections for the list views.
+
+Each ``*_values`` helper narrows a queryset to exactly the columns a list
+response needs (joining related users/issues in the same SELECT) as
+``values_list`` tuples, and each ``*_row`` helper shapes one tuple into the
+response format by position. No model instances or intermediate dicts are
+built, so a page of N rows costs a single query and one dict per row.
+Datetimes stay datetime objects; ``FastJSONRenderer`` encodes them.
+
+``issue_projection`` / ``notification_projection`` narrow the SELECT further
+to a client's ``?fields=`` list.
+"""
+from django.db.models import Case, F, TextField, Value, When
+from django.db.models.functions import Concat, Length, Substr
+from django.db.models.lookups import GreaterThan
+
+ISSUE_FIELDS = (
+    'id', 'problem', 'problem_type', 'location', 'description',
+    'status', 'lat', 'lon', 'duplicate_of_id', 'date', 'created_at',
+)
+ISSUE_KEYS = (
+    'id', 'problem', 'problem_type', 'location', 'description',
+    'status', 'lat', 'lon', 'duplicate_of', 'date', 'created_at',
+)
+ISSUE_USER_FIELDS = ('user_id', 'user__name', 'user__email')
+USER_KEYS = ('id', 'name', 'email')
+
+# Positions within an issue tuple
+ISSUE_LAT = ISSUE_FIELDS.index('lat')
+ISSUE_LON = ISSUE_FIELDS.index('lon')
+ISSUE_CREATED_AT = ISSUE_FIELDS.index('created_at')
+ISSUE_USER_ID = len(ISSUE_FIELDS)
+
+FEEDBACK_FIELDS = (
+    'id', 'feedback_text', 'created_at',
+    'issue_id', 'issue__problem', 'issue__location', 'issue__status',
+    'user_id', 'user__name', 'user__email',
+)
+FEEDBACK_ISSUE_KEYS = ('id', 'problem', 'location', 'status')
+
+NOTIFICATION_FIELDS = ('id', 'title', 'message', 'target_user_id', 'created_at')
+NOTIFICATION_USER_FIELDS = ('target_user__name', 'target_user__email')
+NOTIFICATION_CREATED_AT = NOTIFICATION_FIELDS.index('created_at')
+
+
+def issue_values(queryset, with_user=False):
+    """Project an Issue queryset onto the list columns"""
+    fields = ISSUE_FIELDS + ISSUE_USER_FIELDS if with_user else ISSUE_FIELDS
+    return queryset.values_list(*fields)
+
+
+def issue_key(row):
+    """(created_at, id) of an issue tuple, for keyset pagination"""
+    return row[ISSUE_CREATED_AT], row[0]
+
+
+def issue_row(row):
+    """Shape an issue tuple for the API (extra trailing columns are ignored)"""
+    data = dict(zip(ISSUE_KEYS, row))
+    if len(row) >= ISSUE_USER_ID + len(USER_KEYS):
+        data['user'] = dict(zip(USER_KEYS, row[ISSUE_USER_ID:]))
+    return data
+
+
+# The map views show other citizens' issues only as pins
+PUBLIC_ISSUE_KEYS = ('id', 'problem_type', 'status', 'lat', 'lon')
+PUBLIC_ISSUE_POSITIONS = tuple(ISSUE_KEYS.index(key) for key in PUBLIC_ISSUE_KEYS)
+
+
+def map_issue_values(queryset):
+    """Project an Issue queryset onto the list columns plus the reporter's id"""
+    return queryset.values_list(*ISSUE_FIELDS, 'user_id')
+
+
+def map_issue_row(row, viewer):
+    """Shape a map_issue_values tuple: in full for its reporter or an admin, else only the public fields"""
+    if viewer.is_admin or row[ISSUE_USER_ID] == viewer.id:
+        return issue_row(row)
+    return {key: row[position] for key, position in zip(PUBLIC_ISSUE_KEYS, PUBLIC_ISSUE_POSITIONS)}
+
+
+def feedback_values(queryset):
+    """Project a Feedback queryset onto the list columns"""
+    return queryset.values_list(*FEEDBACK_FIELDS)
+
+
+def feedback_row(row):
+    """Shape a feedback tuple for the API"""
+    return {
+        'id': row[0],
+        'issue': dict(zip(FEEDBACK_ISSUE_KEYS, row[3:7])),
+        'user': dict(zip(USER_KEYS, row[7:10])),
+        'feedback_text': row[1],
+        'created_at': row[2]
+    }
+
+
+def notification_values(queryset, with_user=False):
+    """Project a Notification queryset onto the list columns"""
+    fields = NOTIFICATION_FIELDS + NOTIFICATION_USER_FIELDS if with_user else NOTIFICATION_FIELDS
+    return queryset.values_list(*fields)
+
+
+def notification_key(row):
+    """(created_at, id) of a notification tuple"""
+    return row[NOTIFICATION_CREATED_AT], row[0]
+
+
+def notification_row(row):
+    """Shape a notification tuple for the API"""
+    data = {
+        'id': row[0],
+        'title': row[1],
+        'message': row[2],
+        'is_global': row[3] is None,
+        'created_at': row[4]
+    }
+    if len(row) > len(NOTIFICATION_FIELDS):
+        data['target_user'] = {
+            'id': row[3],
+            'name': row[5],
+            'email': row[6]
+        } if row[3] is not None else None
+    return data
+
+
+# Sparse fieldsets (?fields=)
+
+DESCRIPTION_PREVIEW_LENGTH = 120
+
+
+class FieldsetError(ValueError):
+    """Raised when ?fields= names a field the list does not offer"""
+
+
+def _user(values):
+    return dict(zip(USER_KEYS, values))
+
+
+def _target_user(values):
+    return dict(zip(USER_KEYS, values)) if values[0] is not None else None
+
+
+def description_preview():
+    """The first DESCRIPTION_PREVIEW_LENGTH characters of the description, with '…' if cut, in SQL"""
+    cut = Concat(Substr('description', 1, DESCRIPTION_PREVIEW_LENGTH), Value('…'),
+                 output_field=TextField())
+    return Case(When(GreaterThan(Length('description'), DESCRIPTION_PREVIEW_LENGTH), then=cut),
+                default=F('description'), output_field=TextField())
+
+
+# key -> (columns, build from the column values or None for a plain column).
+# Keys with no columns are computed by the view.
+ISSUE_FIELDSET = {
+    **{key: ((field,), None) for key, field in zip(ISSUE_KEYS, ISSUE_FIELDS)},
+    'description_preview': (('description_preview',), None),
+}
+ISSUE_USER_FIELDSET = {'user': (ISSUE_USER_FIELDS, _user)}
+NOTIFICATION_FIELDSET = {
+    'id': (('id',), None),
+    'title': (('title',), None),
+    'message': (('message',), None),
+    'is_global': (('target_user_id',), lambda values: values[0] is None),
+    'created_at': (('created_at',), None),
+    'expires_at': (('expires_at',), None),
+}
+NOTIFICATION_USER_FIELDSET = {
+    'target_user': (('target_user_id',) + NOTIFICATION_USER_FIELDS, _target_user),
+}
+ANNOTATIONS = {'description_preview': description_preview}
+
+
+class Projection:
+    """
+    How a list view reads and shapes its rows: ``values(queryset)``,
+    ``key(row)`` for keyset pagination and ``row(row)`` for the response.
+    Every projection's tuples start with ``id``; ``keys`` is the requested
+    field names, or None for full rows.
+    """
+
+    def __init__(self, values, key, row, keys=None):
+        self.values = values
+        self.key = key
+        self.row = row
+        self.keys = keys
+
+    def wants(self, key):
+        return self.keys is None or key in self.keys
+
+
+def sparse_projection(fields, spec, computed=()):
+    """
+    Projection for an explicit ``?fields=`` list: only the columns behind the
+    requested keys are selected (plus id and created_at, which pagination
+    and read state need), so unrequested TEXT columns are never read.
+    """
+    keys = list(dict.fromkeys(key.strip() for key in fields.split(',') if key.strip()))
+    if not keys:
+        raise FieldsetError('No fields given')
+    unknown = [key for key in keys if key not in spec and key not in computed]
+    if unknown:
+        raise FieldsetError(f"Unknown field(s): {', '.join(unknown)}. "
+                            f"Choose from {', '.join([*spec, *computed])}")
+    if 'id' not in keys:
+        keys.insert(0, 'id')
+
+    columns, plan = ['id', 'created_at'], []
+    for key in keys:
+        if key in computed:
+            continue
+        sources, build = spec[key]
+        if build is None and sources[0] in columns:
+            # id / created_at are already selected
+            start = columns.index(sources[0])
+            plan.append((key, start, start + 1, None))
+            continue
+        plan.append((key, len(columns), len(columns) + len(sources), build))
+        columns += sources
+
+    annotations = {name: ANNOTATIONS[name]() for name in columns if name in ANNOTATIONS}
+
+    def values(queryset):
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        return queryset.values_list(*columns)
+
+    def row(values_row):
+        return {key: build(values_row[start:end]) if build else values_row[start]
+                for key, start, end, build in plan}
+
+    return Projection(values, lambda values_row: (values_row[1], values_row[0]), row, set(keys))
+
+
+def issue_projection(fields, with_user=False):
+    """The issue list projection for ?fields= (full rows when it is absent)"""
+    if not fields:
+        return Projection(lambda queryset: issue_values(queryset, with_user), issue_key, issue_row)
+    spec = {**ISSUE_FIELDSET, **ISSUE_USER_FIELDSET} if with_user else ISSUE_FIELDSET
+    return sparse_projection(fields, spec)
+
+
+def notification_projection(fields, with_user=False, computed=()):
+    """The notification list projection for ?fields= (full rows when it is absent)"""
+    if not fields:
+        return Projection(lambda queryset: notification_values(queryset, with_user), notification_key,
+                          notification_row)
+    spec = {**NOTIFICATION_FIELDSET, **NOTIFICATION_USER_FIELDSET} if with_user else NOTIFICATION_FIELDSET
+    return sparse_projection(fields, spec, computed)
@@ -0,0 +1,127 @@
+"""
+Notification read tracking backed by ``NotificationReadState``.
+
+A user's read set is a high-water mark plus a bitmap of ids above it.
+Marking notifications read sets bits and then advances the mark over the
+contiguous read prefix, so the bitmap stays short. Unread counts cover the
+same bounded window ``get_notifications`` shows (see ``retention``), and
+notifications outside that window never hold the mark back.
+"""
+import hashlib
+import zlib
+from django.db import transaction
+from django.db.models import Max, Q
+from .models import Notification, NotificationReadState
+from .retention import window_ids
+
+
+def visible_to(user):
+    """Q matching the notifications a user receives (personal + global)"""
+    return Q(target_user=user) | Q(target_user__isnull=True)
+
+
+def decode_bitmap(data):
+    if not data:
+        return 0
+    return int.from_bytes(zlib.decompress(bytes(data)), 'little')
+
+
+def encode_bitmap(bits):
+    if not bits:
+        return b''
+    return zlib.compress(bits.to_bytes((bits.bit_length() + 7) // 8, 'little'))
+
+
+class ReadSet:
+    """In-memory view of a user's read state"""
+
+    def __init__(self, read_through_id=0, bits=0):
+        self.read_through_id = read_through_id
+        self.bits = bits
+
+    @classmethod
+    def for_user(cls, user):
+        state = NotificationReadState.objects.filter(user=user).values_list(
+            'read_through_id', 'read_bitmap').first()
+        if state is None:
+            return cls()
+        return cls(state[0], decode_bitmap(state[1]))
+
+    def __contains__(self, notification_id):
+        offset = notification_id - self.read_through_id - 1
+        return offset < 0 or bool(self.bits >> offset & 1)
+
+    def fingerprint(self):
+        """A short digest of the read state, for ETags (the bitmap can outgrow str())"""
+        raw = self.bits.to_bytes((self.bits.bit_length() + 7) // 8, 'little')
+        return f'{self.read_through_id}:{hashlib.sha1(raw).hexdigest()}'
+
+    def add(self, notification_id):
+        offset = notification_id - self.read_through_id - 1
+        if offset >= 0:
+            self.bits |= 1 << offset
+
+
+def unread_count(user):
+    """
+    Count unread notifications for a user: the ids of their notification
+    window (at most NOTIFICATION_MAX_PER_USER) that are not in the read set.
+    """
+    read_set = ReadSet.for_user(user)
+    return sum(1 for notification_id in window_ids(user) if notification_id not in read_set)
+
+
+def _advance(read_set, user):
+    """
+    Move the high-water mark up to the first unread notification of the
+    user's window. Rows outside the window (expired, or past the per-user
+    cap) can never be shown or marked read, so they must not hold it back.
+    """
+    shown = sorted(notification_id for notification_id in window_ids(user)
+                   if notification_id > read_set.read_through_id)
+    unread = next((notification_id for notification_id in shown if notification_id not in read_set), None)
+    if unread is not None:
+        new_mark = unread - 1
+    else:
+        new_mark = max([read_set.read_through_id + read_set.bits.bit_length(), *shown])
+
+    shift = new_mark - read_set.read_through_id
+    if shift > 0:
+        read_set.bits >>= shift
+        read_set.read_through_id = new_mark
+
+
+def _save(user, read_set):
+    NotificationReadState.objects.update_or_create(
+        user=user,
+        defaults={
+            'read_through_id': read_set.read_through_id,
+            'read_bitmap': encode_bitmap(read_set.bits),
+        },
+    )
+
+
+def mark_read(user, notification_ids):
+    """Mark specific notifications read; ids the user cannot see are ignored"""
+    with transaction.atomic():
+        NotificationReadState.objects.select_for_update().filter(user=user).first()
+        read_set = ReadSet.for_user(user)
+        visible_ids = Notification.objects.filter(
+            visible_to(user), id__in=notification_ids, id__gt=read_set.read_through_id
+        ).values_list('id', flat=True)
+        for notification_id in visible_ids:
+            read_set.add(notification_id)
+        _advance(read_set, user)
+        _save(user, read_set)
+
+
+def mark_all_read(user):
+    """Mark every notification the user can currently see as read"""
+    latest = Notification.objects.filter(visible_to(user)).aggregate(latest=Max('id'))['latest']
+    with transaction.atomic():
+        NotificationReadState.objects.select_for_update().filter(user=user).first()
+        read_set = ReadSet.for_user(user)
+        if latest and latest > read_set.read_through_id:
+            read_set.bits >>= latest - read_set.read_through_id
+            read_set.read_through_id = latest
+        _save(user, read_set)
@@ -0,0 +1,104 @@
+"""
+Notification retention.
+
+Every notification carries an ``expires_at`` (``NOTIFICATION_TTL_DAYS`` after
+it was sent unless the sender chose otherwise), and a user is only ever shown
+the newest ``NOTIFICATION_MAX_PER_USER`` live notifications of their personal
+and global streams combined. ``window`` reads exactly that: one bounded walk
+of the (target_user, created_at, id) index per stream, instead of an OR over
+the user's rows and the city's whole broadcast history.
+
+``prune_notifications`` deletes what the window can no longer show: expired
+rows in (expires_at, id) index order, then each stream's rows past the cap.
+A stream only grows past the cap by receiving notifications, so only the
+streams sent one in the last ``NOTIFICATION_PRUNE_LOOKBACK_HOURS`` (found
+through the created_at index) are probed, one indexed OFFSET each.
+It deletes ``batch_size`` rows per statement in autocommit mode, so no lock
+is held for longer than one small DELETE.
+"""
+import time
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from .models import Notification
+
+
+def streams(user):
+    """The personal and global audiences a user's notifications come from"""
+    return Q(target_user=user), Q(target_user__isnull=True)
+
+
+def window(user, values, key, now=None):
+    """
+    The user's visible notifications, newest first: ``values(queryset)``
+    projects each stream and ``key(row)`` gives a row's (created_at, id).
+    """
+    now = now or timezone.now()
+    cap = settings.NOTIFICATION_MAX_PER_USER
+    rows = []
+    for audience in streams(user):
+        live = Notification.objects.filter(audience, expires_at__gt=now).order_by('-created_at', '-id')
+        rows += values(live)[:cap]
+    rows.sort(key=key, reverse=True)
+    return rows[:cap]
+
+
+def window_ids(user, now=None):
+    return [row[0] for row in window(user, lambda queryset: queryset.values_list('id', 'created_at'),
+                                     lambda row: (row[1], row[0]), now)]
+
+
+# Pruning
+
+def _delete_batches(select, batch_size, pause):
+    """Delete the ids ``select(batch_size)`` returns until it returns none"""
+    deleted = 0
+    while True:
+        ids = list(select(batch_size))
+        if not ids:
+            return deleted
+        deleted += Notification.objects.filter(pk__in=ids).delete()[0]
+        if pause:
+            time.sleep(pause)
+
+
+def prune_expired(batch_size, pause=0.0, now=None):
+    now = now or timezone.now()
+    expired = Notification.objects.filter(expires_at__lte=now).order_by('expires_at', 'id')
+    return _delete_batches(lambda size: expired.values_list('id', flat=True)[:size], batch_size, pause)
+
+
+def prune_over_cap(cap, batch_size, pause=0.0, since=None):
+    """
+    Delete the notifications past the newest ``cap`` of every stream sent one
+    at or after ``since`` (of every stream when it is None)
+    """
+    recent = Notification.objects.order_by()
+    if since is not None:
+        recent = recent.filter(created_at__gte=since)
+    deleted = 0
+    for target_user in list(recent.values_list('target_user', flat=True).distinct()):
+        stream = Notification.objects.filter(
+            Q(target_user=target_user) if target_user is not None else Q(target_user__isnull=True)
+        ).order_by('-created_at', '-id')
+        deleted += _delete_batches(
+            lambda size: stream.values_list('id', flat=True)[cap:cap + size], batch_size, pause)
+    return deleted
+
+
+def prune_notifications(cap=None, batch_size=None, pause=0.0, since_hours=None):
+    """
+    Delete expired notifications, then those past the per-stream cap in the
+    streams sent one in the last ``since_hours`` (0 checks every stream);
+    returns the counts
+    """
+    cap = settings.NOTIFICATION_MAX_PER_USER if cap is None else cap
+    batch_size = batch_size or settings.NOTIFICATION_PRUNE_BATCH_SIZE
+    since_hours = settings.NOTIFICATION_PRUNE_LOOKBACK_HOURS if since_hours is None else since_hours
+    since = timezone.now() - timedelta(hours=since_hours) if since_hours else None
+    pruned = Counter()
+    pruned['expired'] = prune_expired(batch_size, pause)
+    pruned['over_cap'] = prune_over_cap(cap, batch_size, pause, since)
+    return pruned
@@ -0,0 +1,46 @@
+"""
+Read-replica routing for the read-only list views.
+
+Django routers only see the model, not the request, so views opt in with
+``@replica_reads``: while such a view runs, reads go to the ``replica`` alias
+(when one is configured in ``DATABASES``) and every write still goes to the
+primary. All other views read from the primary, so a citizen who has just
+reported an issue sees it on the report response even if the replica lags.
+"""
+import functools
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_DB_ALIAS = 'replica'
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_reads(view):
+    """Route the reads made inside ``view`` to the replica"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        token = _use_replica.set(True)
+        try:
+            return view(*args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and REPLICA_DB_ALIAS in settings.DATABASES:
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,92 @@
+"""
+Ranked full-text search over issues.
+
+SQLite uses the ``issues_fts`` FTS5 table (kept in sync by triggers, see
+migration 0006) ranked by bm25; PostgreSQL uses the GIN-indexed
+``to_tsvector`` expression ranked by ts_rank. Other backends fall back to a
+LIKE scan. Each search is one index lookup for the page of ids plus one
+query to project those rows.
+"""
+import re
+from django.db import connection
+from django.db.models import Q
+from .models import Issue
+from .projections import issue_values
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# bm25 column weights for (problem, location, description)
+FTS_WEIGHTS = (10.0, 5.0, 1.0)
+
+PG_DOCUMENT = "to_tsvector('english', problem || ' ' || location || ' ' || description)"
+
+
+def search_tokens(query):
+    return TOKEN_RE.findall(query.lower())
+
+
+def fts5_query(tokens):
+    """Quote every token (so user input is never FTS syntax); prefix-match the last"""
+    quoted = [f'"{token}"' for token in tokens]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def _search_ids_sqlite(tokens, limit, offset, ranked):
+    with connection.cursor() as cursor:
+        if ranked:
+            cursor.execute(
+                'SELECT rowid FROM issues_fts WHERE issues_fts MATCH %s '
+                'ORDER BY bm25(issues_fts, %s, %s, %s), rowid DESC LIMIT %s OFFSET %s',
+                [fts5_query(tokens), *FTS_WEIGHTS, limit, offset],
+            )
+        else:
+            cursor.execute(
+                'SELECT rowid FROM issues_fts WHERE issues_fts MATCH %s ORDER BY rowid DESC LIMIT %s OFFSET %s',
+                [fts5_query(tokens), limit, offset],
+            )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _search_ids_postgres(tokens, limit, offset, ranked):
+    order = f'ts_rank({PG_DOCUMENT}, query) DESC, id DESC' if ranked else 'id DESC'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT id FROM issues, plainto_tsquery('english', %s) AS query "
+            f"WHERE {PG_DOCUMENT} @@ query "
+            f"ORDER BY {order} LIMIT %s OFFSET %s",
+            [' '.join(tokens), limit, offset],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def like_scan_q(tokens):
+    """The unindexed LIKE '%term%' scan (fallback, and benchmark baseline)"""
+    q = Q()
+    for token in tokens:
+        q &= Q(problem__icontains=token) | Q(location__icontains=token) | Q(description__icontains=token)
+    return q
+
+
+def _search_ids_like(tokens, limit, offset):
+    return list(Issue.objects.filter(like_scan_q(tokens)).order_by('-created_at', '-id')
+                .values_list('id', flat=True)[offset:offset + limit])
+
+
+def search_issue_ids(query, limit, offset=0, ranked=True):
+    """Ids of the best matching issues, best first (newest first if not ``ranked``)"""
+    tokens = search_tokens(query)
+    if not tokens:
+        return []
+    if connection.vendor == 'sqlite':
+        return _search_ids_sqlite(tokens, limit, offset, ranked)
+    if connection.vendor == 'postgresql':
+        return _search_ids_postgres(tokens, limit, offset, ranked)
+    return _search_ids_like(tokens, limit, offset)
+
+
+def search_issues(query, limit, offset=0):
+    """Projected rows for one page of ranked results, best first"""
+    ids = search_issue_ids(query, limit, offset)
+    rows = {row[0]: row for row in issue_values(Issue.objects.filter(id__in=ids), with_user=True)}
+    return [rows[issue_id] for issue_id in ids if issue_id in rows]
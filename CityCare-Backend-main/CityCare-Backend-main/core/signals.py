@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import ArchivedIssue, Issue, User
+from . import counters
+from .user_cache import invalidate_user
+
+
+@receiver(post_delete, sender=Issue)
+def issue_deleted(sender, instance, **kwargs):
+    """Keep dashboard counters in step with deletes (admin, cascades, shell)"""
+    counters.record_deleted(instance)
+
+
+@receiver(post_delete, sender=ArchivedIssue)
+def archived_issue_deleted(sender, instance, **kwargs):
+    """Archived issues count too, so deleting one (e.g. with its user) decrements"""
+    counters.record_deleted(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    """Profile edits, password changes, deactivation and deletes evict the auth cache"""
+    invalidate_user(instance.pk)
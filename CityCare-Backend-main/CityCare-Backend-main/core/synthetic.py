@@ -0,0 +1,270 @@
+"""
+Synthetic city data for benchmarks and load tests.
+
+Problem types and statuses follow a skewed mix (lots of road and garbage
+reports, most issues still open) so that index selectivity looks like a
+real city rather than a uniform distribution. Reporters are skewed too: a
+few active citizens file many issues, most file one or two.
+
+``seed_city`` inserts a whole city with ``bulk_create`` in batches, keeping
+memory bounded by the batch size plus the list of user ids. Rows are spread
+over ``history_days`` of history in insertion order (to the second, so busy
+seconds tie), closed issues were last updated days after they were
+reported, and notifications expire NOTIFICATION_TTL_DAYS after they were
+sent, so date drill-downs, archiving, notification pruning and keyset
+pagination all see a realistic timeline.
+"""
+import random
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+from . import counters
+from .models import Issue, User, Notification, Feedback
+
+PROBLEM_TYPES = [
+    ('ROAD', 30), ('GARBAGE', 22), ('WATER', 14), ('STREETLIGHT', 12), ('DRAINAGE', 8),
+    ('TRAFFIC', 5), ('PARKS', 4), ('NOISE', 3), ('ANIMALS', 1), ('OTHER', 1),
+]
+STATUSES = [('PENDING', 45), ('IN_PROGRESS', 25), ('RESOLVED', 25), ('REPORT', 5)]
+
+PROBLEMS = {
+    'ROAD': ['Pothole', 'Cracked pavement', 'Broken speed bump', 'Road cave-in', 'Faded lane markings'],
+    'GARBAGE': ['Overflowing bin', 'Illegal dumping', 'Missed collection', 'Litter pile', 'Broken dumpster'],
+    'WATER': ['Burst pipe', 'Low water pressure', 'Leaking hydrant', 'Contaminated tap water', 'Water main leak'],
+    'STREETLIGHT': ['Streetlight out', 'Flickering lamp', 'Damaged light pole', 'Light on during day'],
+    'DRAINAGE': ['Blocked drain', 'Flooded underpass', 'Open manhole', 'Sewage overflow'],
+    'TRAFFIC': ['Broken traffic signal', 'Missing stop sign', 'Damaged guardrail'],
+    'PARKS': ['Broken swing', 'Overgrown grass', 'Fallen tree', 'Vandalised bench'],
+    'NOISE': ['Construction noise at night', 'Loud music', 'Car alarm'],
+    'ANIMALS': ['Stray dogs', 'Dead animal on road'],
+    'OTHER': ['Graffiti', 'Abandoned vehicle'],
+}
+STREETS = [
+    'Main Street', 'Station Road', 'Elm Street', 'Lake Road', 'Market Square', 'Park Avenue',
+    'Church Lane', 'Hill Road', 'Mill Street', 'River Walk', 'School Road', 'Bridge Street',
+]
+DETAILS = [
+    'Reported by several neighbours.', 'Has been like this for a week.', 'Dangerous for cyclists.',
+    'Children walk past here every day.', 'Getting worse after the rain.', 'Near the bus stop.',
+    'Blocks the footpath.', 'Cars are swerving to avoid it.', 'Smells terrible.', 'Happens every night.',
+]
+
+
+def weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+# Reports cluster around the city centre; some arrive without coordinates
+CITY_CENTRE = (18.5204, 73.8567)
+CITY_SPREAD_DEGREES = 0.08
+WITH_COORDINATES = 0.7
+
+
+def synthetic_issue(rng, user_id):
+    problem_type = weighted(rng, PROBLEM_TYPES)
+    issue = Issue(
+        user_id=user_id,
+        problem=rng.choice(PROBLEMS[problem_type]),
+        problem_type=problem_type,
+        location=f'{rng.randint(1, 400)} {rng.choice(STREETS)}',
+        description=' '.join(rng.sample(DETAILS, 2)),
+        status=weighted(rng, STATUSES),
+    )
+    if rng.random() < WITH_COORDINATES:
+        issue.lat = rng.gauss(CITY_CENTRE[0], CITY_SPREAD_DEGREES)
+        issue.lon = rng.gauss(CITY_CENTRE[1], CITY_SPREAD_DEGREES)
+    # bulk_create skips save(), so derive the geohash here
+    issue.set_geohash()
+    return issue
+
+
+def issue_batches(user_ids, count, batch_size=5000, seed=0):
+    """Yield lists of unsaved Issue instances totalling ``count``"""
+    rng = random.Random(seed)
+    while count > 0:
+        size = min(batch_size, count)
+        yield [synthetic_issue(rng, rng.choice(user_ids)) for _ in range(size)]
+        count -= size
+
+
+def search_terms(count, seed=0):
+    """Admin-style searches: a problem word plus a street, sometimes with a house number"""
+    rng = random.Random(seed)
+    words = sorted({word.lower() for problems in PROBLEMS.values() for problem in problems
+                    for word in problem.split() if len(word) > 3})
+    terms = []
+    for _ in range(count):
+        street = rng.choice(STREETS).split()[0].lower()
+        number = f'{rng.randint(1, 400)} ' if rng.random() < 0.5 else ''
+        terms.append(f'{rng.choice(words)} {number}{street}')
+    return terms
+
+
+# Every seeded citizen can log in with this password
+SEED_PASSWORD = 'citycare-seed'
+SEED_EMAIL_DOMAIN = 'seed.citycare.invalid'
+
+FIRST_NAMES = ['Asha', 'Ravi', 'Meera', 'Arjun', 'Priya', 'Kiran', 'Sanjay', 'Neha', 'Vikram', 'Anita',
+               'Rahul', 'Pooja', 'Amit', 'Sneha', 'Rohan', 'Divya']
+LAST_NAMES = ['Patil', 'Sharma', 'Kulkarni', 'Deshmukh', 'Joshi', 'Rao', 'Iyer', 'Shah', 'Kapoor', 'Nair']
+
+NOTIFICATIONS = [
+    ('Water supply interruption', 'Water supply will be interrupted on {street} between 10am and 4pm.'),
+    ('Road closure', '{street} is closed for resurfacing this weekend.'),
+    ('Garbage collection update', 'Collection on {street} moves to Tuesday mornings.'),
+    ('Streetlight maintenance', 'Streetlights on {street} will be serviced tonight.'),
+]
+FEEDBACK = [
+    'Thank you, fixed quickly.', 'Fixed but came back after a week.', 'Took too long to resolve.',
+    'Great work by the crew.', 'Only partially fixed.', 'Still not fixed properly.',
+]
+
+# Defaults relative to the number of issues
+USERS_PER_ISSUE = 0.1
+NOTIFICATIONS_PER_ISSUE = 0.5
+GLOBAL_NOTIFICATIONS = 0.05
+FEEDBACK_ON_RESOLVED = 0.4
+
+
+# Days of history seeded rows are spread over, and how long closed issues stayed open
+SEED_HISTORY_DAYS = 365
+MAX_DAYS_TO_CLOSE = 30
+
+
+def timeline(rng, start, span, count):
+    """Yield ``count`` ascending timestamps across ``span`` from ``start``, truncated to the second"""
+    for i in range(count):
+        yield (start + span * ((i + rng.random()) / count)).replace(microsecond=0)
+
+
+def restore_timestamps(model, columns, rows):
+    """
+    Overwrite ``columns`` on freshly inserted ``(pk, *values)`` rows.
+
+    auto_now_add stamps "now" on every bulk insert, so, as ``imports.backdate``
+    does, the seeded history is written back with one parameterised UPDATE
+    per row via executemany.
+    """
+    quote = connection.ops.quote_name
+    fields = [model._meta.get_field(column) for column in columns]
+    sql = 'UPDATE {table} SET {columns} WHERE {pk} = %s'.format(
+        table=quote(model._meta.db_table),
+        columns=', '.join(f'{quote(field.column)} = %s' for field in fields),
+        pk=quote(model._meta.pk.column),
+    )
+    params = [
+        (*(field.get_db_prep_value(value, connection) for field, value in zip(fields, values)), pk)
+        for pk, *values in rows
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def closed_at(rng, issue, created_at, now):
+    """When an issue was last updated: open ones when reported, closed ones days later"""
+    if issue.status == 'PENDING':
+        return created_at
+    return min(created_at + timedelta(days=rng.uniform(0, MAX_DAYS_TO_CLOSE)), now).replace(microsecond=0)
+
+
+def seed_emails(start, count):
+    return [f'citizen{i}@{SEED_EMAIL_DOMAIN}' for i in range(start, start + count)]
+
+
+def reporter_picker(rng, user_ids):
+    """Pick reporters with a Pareto skew: low indexes report far more often"""
+    last = len(user_ids) - 1
+
+    def pick():
+        return user_ids[min(int(rng.paretovariate(1.2)) - 1, last)]
+    return pick
+
+
+def seed_city(issues, users=None, notifications=None, feedback_rate=FEEDBACK_ON_RESOLVED,
+              batch_size=5000, seed=0, on_batch=None, history_days=SEED_HISTORY_DAYS):
+    """
+    Insert ``users`` citizens, ``issues`` issues (with feedback on a share of
+    the resolved ones) and ``notifications`` notifications, dated over the
+    last ``history_days`` days.
+
+    Seeded emails continue from the citizens already in the database, so
+    seeding can be repeated to grow a city. Dashboard counters are adjusted
+    per batch; duplicate-detection signatures are not built (run
+    ``backfill_issue_signatures``). ``on_batch(model, inserted)`` reports
+    progress.
+    """
+    rng = random.Random(seed)
+    users = max(int(issues * USERS_PER_ISSUE), 1) if users is None else users
+    notifications = int(issues * NOTIFICATIONS_PER_ISSUE) if notifications is None else notifications
+    inserted = Counter()
+
+    start = User.objects.filter(email__endswith=f'@{SEED_EMAIL_DOMAIN}').count()
+    password = make_password(SEED_PASSWORD)
+    for offset in range(0, users, batch_size):
+        emails = seed_emails(start + offset, min(batch_size, users - offset))
+        User.objects.bulk_create([
+            User(email=email, name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}', password=password)
+            for email in emails
+        ])
+        inserted['users'] += len(emails)
+        if on_batch:
+            on_batch('users', inserted['users'])
+
+    user_ids = list(User.objects.filter(email__endswith=f'@{SEED_EMAIL_DOMAIN}')
+                    .order_by('id').values_list('id', flat=True))
+    if not user_ids:
+        raise ValueError('Seed at least one user')
+    rng.shuffle(user_ids)
+    pick = reporter_picker(rng, user_ids)
+
+    now = timezone.now().replace(microsecond=0)
+    span = timedelta(days=history_days)
+    issue_times = timeline(rng, now - span, span, issues)
+    remaining = issues
+    while remaining > 0:
+        size = min(batch_size, remaining)
+        with transaction.atomic():
+            batch = [synthetic_issue(rng, pick()) for _ in range(size)]
+            Issue.objects.bulk_create(batch)
+            counters.adjust_many(Counter((issue.status, issue.problem_type) for issue in batch))
+            dated = [(issue, created_at, closed_at(rng, issue, created_at, now))
+                     for issue, created_at in zip(batch, issue_times)]
+            feedback = Feedback.objects.bulk_create([
+                Feedback(issue_id=issue.id, user_id=issue.user_id, feedback_text=rng.choice(FEEDBACK))
+                for issue, _, _ in dated if issue.status == 'RESOLVED' and rng.random() < feedback_rate
+            ])
+            restore_timestamps(Issue, ('created_at', 'date', 'updated_at'), [
+                (issue.id, created_at, created_at, updated_at) for issue, created_at, updated_at in dated])
+            # Feedback arrives when the issue is resolved
+            resolved = {issue.id: updated_at for issue, _, updated_at in dated}
+            restore_timestamps(Feedback, ('created_at', 'updated_at'), [
+                (row.id, resolved[row.issue_id], resolved[row.issue_id]) for row in feedback])
+        remaining -= size
+        inserted['issues'] += size
+        inserted['feedback'] += len(feedback)
+        if on_batch:
+            on_batch('issues', inserted['issues'])
+
+    ttl = timedelta(days=settings.NOTIFICATION_TTL_DAYS)
+    sent_times = timeline(rng, now - span, span, notifications)
+    for offset in range(0, notifications, batch_size):
+        size = min(batch_size, notifications - offset)
+        batch, sent = [], []
+        for _ in range(size):
+            title, message = rng.choice(NOTIFICATIONS)
+            target = None if rng.random() < GLOBAL_NOTIFICATIONS else rng.choice(user_ids)
+            sent.append(next(sent_times))
+            batch.append(Notification(title=title, message=message.format(street=rng.choice(STREETS)),
+                                      target_user_id=target, expires_at=sent[-1] + ttl))
+        with transaction.atomic():
+            Notification.objects.bulk_create(batch)
+            restore_timestamps(Notification, ('created_at', 'updated_at'), [
+                (notification.id, created_at, created_at) for notification, created_at in zip(batch, sent)])
+        inserted['notifications'] += size
+        if on_batch:
+            on_batch('notifications', inserted['notifications'])
+    return dict(inserted)
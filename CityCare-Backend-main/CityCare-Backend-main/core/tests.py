@@ -1,3 +1,1409 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import BytesIO, StringIO
+from contextlib import contextmanager
+from unittest import mock
+from django.conf import settings
+from django.contrib import admin
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from .admin import IssueAdmin
+from .changelists import EstimatedCountPaginator
+from .events import hub
+from .models import (
+    User, Issue, Notification, Feedback, OutboundEmail, NotificationReadState,
+    IssueSignature, IssueLSHBucket, RevokedToken, ArchivedIssue, ArchivedFeedback,
+)
+from .outbox import drain_outbox
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, parse_limit
+from .archive import archivable
+from .read_state import encode_bitmap
+from . import counters, hashing, profiling, renderers, metrics as request_metrics
+from .counters import rebuild
+from .geo import encode as geohash_encode
+from .imports import IssueImporter, iter_rows
+from .user_cache import user_cache
+from .tokens import RefreshToken, revocations, purge_expired
+from .bloom import BloomFilter
+from .routers import ReplicaRouter, replica_reads
+from .synthetic import seed_city
+from .projections import issue_values, issue_row
+from .dedupe import MAX_TEXT_LENGTH, issue_text
+from .management.commands.benchmark_routes import route_names
+from citycare.db_profiles import sqlite_profile
 
-# Create your tests here.
+
+class ListViewQueryCountTests(TestCase):
+    """List views must cost a constant number of queries regardless of row count"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user('admin@citycare.com', 'Admin', 'pw', is_admin=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def make_rows(self, count):
+        start = User.objects.count()
+        for i in range(start, start + count):
+            user = User.objects.create(email=f'citizen{i}@citycare.com', name=f'Citizen {i}')
+            issue = Issue.objects.create(user=user, problem=f'Pothole {i}', problem_type='ROAD',
+                                         location='Main Street', description='Deep pothole')
+            Feedback.objects.create(issue=issue, user=user, feedback_text='Thanks')
+            Notification.objects.create(title='Update', message='Hello', target_user=user)
+
+    def count_queries(self, url_name, key, expected_rows):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(len(response.data[key]), expected_rows)
+        return len(queries)
+
+    def assertConstantQueries(self, url_name, key):
+        self.make_rows(1)
+        few = self.count_queries(url_name, key, 1)
+        self.make_rows(20)
+        many = self.count_queries(url_name, key, 21)
+        self.assertEqual(few, many)
+        self.assertLessEqual(many, 2)
+
+    def test_admin_all_issues(self):
+        self.assertConstantQueries('admin_all_issues', 'issues')
+
+    def test_admin_view_feedback(self):
+        self.assertConstantQueries('admin_view_feedback', 'feedback')
+
+    def test_admin_all_notifications(self):
+        self.assertConstantQueries('admin_all_notifications', 'notifications')
+
+
+class KeysetPaginationTests(TestCase):
+    """Issue lists page on (created_at, id) with opaque cursors"""
+
+    def setUp(self):
+        self.citizen = User.objects.create(email='citizen@citycare.com', name='Citizen')
+        self.client = APIClient()
+        self.client.force_authenticate(self.citizen)
+        # Two issues share every timestamp, so pages must break ties on id
+        base = timezone.now() - timedelta(days=1)
+        for i in range(6):
+            issue = Issue.objects.create(user=self.citizen, problem=f'Pothole {i}', problem_type='ROAD',
+                                         location='Main Street', description='Deep')
+            Issue.objects.filter(pk=issue.pk).update(created_at=base + timedelta(minutes=i // 2))
+
+    def page(self, **params):
+        return self.client.get(reverse('user_issues'), params)
+
+    def test_cursors_walk_both_ways_across_ties(self):
+        problems, params = [], {'limit': 2}
+        while True:
+            response = self.page(**params)
+            problems += [issue['problem'] for issue in response.data['issues']]
+            if not response.data['next_cursor']:
+                break
+            params['cursor'] = response.data['next_cursor']
+        self.assertEqual(problems, [f'Pothole {i}' for i in range(5, -1, -1)])
+
+        previous = self.page(limit=2, cursor=response.data['prev_cursor'])
+        self.assertEqual([issue['problem'] for issue in previous.data['issues']], ['Pothole 3', 'Pothole 2'])
+        self.assertIsNotNone(previous.data['prev_cursor'])
+
+    def test_invalid_or_tampered_cursor_is_rejected(self):
+        cursor = self.page(limit=2).data['next_cursor']
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        tampered = base64.urlsafe_b64encode(json.dumps({**payload, 'd': 'sideways'}).encode()).decode()
+        for bad in ('not-a-cursor', cursor[:-3], tampered):
+            self.assertEqual(self.page(cursor=bad).status_code, 400)
+
+    def test_limit_is_clamped(self):
+        self.assertEqual(parse_limit(None), DEFAULT_PAGE_SIZE)
+        self.assertEqual(parse_limit('10000'), MAX_PAGE_SIZE)
+        for bad in ('0', '-1', 'ten'):
+            self.assertEqual(self.page(limit=bad).status_code, 400)
+        self.assertEqual(len(self.page(limit=10000).data['issues']), 6)
+
+
+class StreamingExportTests(TestCase):
+    """Admin exports stream NDJSON or CSV rows"""
+
+    def setUp(self):
+        self.admin = User.objects.create(email='admin@citycare.com', name='Admin', is_admin=True)
+        self.citizen = User.objects.create(email='citizen@citycare.com', name='Citizen')
+        Issue.objects.create(user=self.citizen, problem='Pothole, "deep"', problem_type='ROAD',
+                             location='Main Street', description='Two lines\nof detail')
+        Issue.objects.create(user=self.citizen, problem='Leak', problem_type='WATER',
+                             location='Lake Road', description='Pipe burst', status='RESOLVED')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def export(self, resource='issues', **params):
+        return self.client.get(reverse('admin_export', args=[resource]), params)
+
+    def test_csv_has_a_header_and_escapes_values(self):
+        response = self.export(output='csv', problem_type='ROAD')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('issues.csv', response['Content-Disposition'])
+        rows = list(csv.reader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:3], ['id', 'problem', 'problem_type'])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1:3], ['Pothole, "deep"', 'ROAD'])
+        self.assertEqual(rows[1][4], 'Two lines\nof detail')
+
+    def test_ndjson_streams_one_row_per_line(self):
+        response = self.export(status='RESOLVED')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual([json.loads(line)['problem'] for line in lines], ['Leak'])
+        self.assertEqual(json.loads(lines[0])['user']['email'], 'citizen@citycare.com')
+
+    async def test_asgi_exports_stream_asynchronously(self):
+        token = str(AccessToken.for_user(self.admin))
+        response = await self.async_client.get(reverse('admin_export', args=['issues']), {'output': 'csv'},
+                                               headers={'Authorization': f'Bearer {token}'})
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        rows = list(csv.reader(StringIO(b''.join(chunks).decode())))
+        self.assertEqual(rows[0][:2], ['id', 'problem'])
+        self.assertEqual([row[1] for row in rows[1:]], ['Leak', 'Pothole, "deep"'])
+
+    def test_rejects_non_admins_and_unknown_exports(self):
+        self.assertEqual(self.export('users').status_code, 404)
+        self.assertEqual(self.export(output='xml').status_code, 400)
+        self.client.force_authenticate(self.citizen)
+        self.assertEqual(self.export().status_code, 403)
+
+
+class EmailOutboxTests(TestCase):
+    """Status changes queue emails transactionally; the worker delivers them"""
+
+    def setUp(self):
+        self.admin = User.objects.create(email='admin@citycare.com', name='Admin', is_admin=True)
+        self.citizen = User.objects.create(email='citizen@citycare.com', name='Citizen')
+        self.issue = Issue.objects.create(user=self.citizen, problem='Broken light', problem_type='LIGHT',
+                                          location='Park Road', description='Dark at night')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def change_status(self, new_status):
+        return self.client.put(reverse('admin_change_issue_status', args=[self.issue.id]),
+                               {'status': new_status}, format='json')
+
+    def test_status_change_queues_email_without_sending(self):
+        self.change_status('RESOLVED')
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutboundEmail.objects.get()
+        self.assertEqual(queued.to_email, 'citizen@citycare.com')
+        self.assertEqual(queued.status, 'PENDING')
+
+    def test_drain_sends_batch_and_marks_sent(self):
+        self.change_status('RESOLVED')
+        self.change_status('REPORT')
+        self.assertEqual(drain_outbox(batch_size=10, max_attempts=3), (2, 0))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertFalse(OutboundEmail.objects.exclude(status='SENT').exists())
+
+    def test_failed_send_is_retried_with_backoff(self):
+        self.change_status('RESOLVED')
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                        side_effect=OSError('SMTP down')):
+            self.assertEqual(drain_outbox(batch_size=10, max_attempts=3), (0, 1))
+        queued = OutboundEmail.objects.get()
+        self.assertEqual((queued.status, queued.attempts), ('PENDING', 1))
+        self.assertGreater(queued.next_attempt_at, timezone.now())
+
+
+class NotificationReadStateTests(TestCase):
+    """Read tracking keeps one row per user and counts only visible unread notifications"""
+
+    def setUp(self):
+        self.citizen = User.objects.create(email='citizen@citycare.com', name='Citizen')
+        self.other = User.objects.create(email='other@citycare.com', name='Other')
+        self.notifications = [
+            Notification.objects.create(title=f'N{i}', message='Hello',
+                                        target_user=[None, self.citizen, self.other][i % 3])
+            for i in range(9)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.citizen)
+
+    def unread(self):
+        return self.client.get(reverse('notifications_unread_count')).data['unread_count']
+
+    def test_mark_read_advances_high_water_mark(self):
+        self.assertEqual(self.unread(), 6)
+        first, second, others, fourth = self.notifications[:4]
+        self.client.post(reverse('mark_notifications_read'), {'ids': [fourth.id, others.id]}, format='json')
+        self.assertEqual(self.unread(), 5)
+
+        self.client.post(reverse('mark_notifications_read'), {'ids': [first.id, second.id]}, format='json')
+        self.assertEqual(self.unread(), 3)
+        state = NotificationReadState.objects.get(user=self.citizen)
+        self.assertEqual(state.read_through_id, fourth.id)
+        self.assertEqual(bytes(state.read_bitmap), b'')
+
+    def test_mark_all_read(self):
+        self.client.post(reverse('mark_notifications_read'), {'all': True}, format='json')
+        self.assertEqual(self.unread(), 0)
+        rows = self.client.get(reverse('get_notifications')).data['notifications']
+        self.assertTrue(all(row['is_read'] for row in rows))
+        Notification.objects.create(title='New', message='Hello')
+        self.assertEqual(self.unread(), 1)
+
+    def test_wide_bitmap_still_gets_an_etag(self):
+        # Bits far above the mark (ids read in other users' ranges) outgrow str(int)
+        NotificationReadState.objects.create(
+            user=self.citizen, read_through_id=0, read_bitmap=encode_bitmap(1 << 15000 | 1))
+        response = self.client.get(reverse('get_notifications'))
+        self.assertEqual(response.status_code, 200)
+        cached = self.client.get(reverse('get_notifications'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+
+class EventStreamTests(TestCase):
+    """The push channel delivers a user's events and replays missed ones"""
+
+    def setUp(self):
+        self.citizen = User.objects.create(email='citizen@citycare.com', name='Citizen')
+        self.token = str(AccessToken.for_user(self.citizen))
+
+    async def poll(self, **params):
+        response = await self.async_client.get(
+            reverse('event_stream'), {'mode': 'poll', 'timeout': 1, **params},
+            headers={'Authorization': f'Bearer {self.token}'})
+        return response.json()
+
+    async def test_long_poll_receives_live_event(self):
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.05, hub.publish, 'notification', {'title': 'Hello'}, self.citizen.id)
+        loop.call_later(0.01, hub.publish, 'notification', {'title': 'Private'}, self.citizen.id + 1)
+        data = await self.poll()
+        self.assertEqual([event['data']['title'] for event in data['events']], ['Hello'])
+
+    async def test_long_poll_replays_since_last_event(self):
+        seen = hub.publish('issue_status', {'status': 'IN_PROGRESS'}, self.citizen.id)
+        hub.publish('issue_status', {'status': 'RESOLVED'}, self.citizen.id)
+        data = await self.poll(since=seen['id'])
+        self.assertEqual([event['data']['status'] for event in data['events']], ['RESOLVED'])
+
+    def test_sse_needs_asgi(self):
+        response = self.client.get(reverse('event_stream'), headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_requires_token(self):
+        response = await self.async_client.get(reverse('event_stream'), {'mode': 'poll'})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_accepts_query_token(self):
+        response = await self.async_client.get(reverse('event_stream'),
+                                               {'mode': 'poll', 'timeout': 0.01, 'token': self.token})
+        self.assertEqual(response.status_code, 200)
+
+
+class ConditionalGetTests(TestCase):
+    """Read endpoints answer repeat requests with 304 until the data changes"""
+
+    def setUp(self):
+        self.citizen = User.objects.create(email='citizen@citycare.com', name='Citizen')
+        self.issue = Issue.objects.create(user=self.citizen, problem='Leak', problem_type='WATER',
+                                          location='Lake Road', description='Pipe burst')
+        self.client = APIClient()
+        self.client.force_authenticate(self.citizen)
+
+    def test_list_returns_304_until_changed(self):
+        url = reverse('user_issues')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Issue.objects.filter(id=self.issue.id).update(status='RESOLVED', updated_at=timezone.now())
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_lists_validate_by_etag_only(self):
+        older = Issue.objects.create(user=self.citizen, problem='Old leak', problem_type='WATER',
+                                     location='Lake Road', description='Drip')
+        Issue.objects.filter(id=older.id).update(updated_at=timezone.now() - timedelta(days=1))
+        url = reverse('user_issues')
+        response = self.client.get(url)
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+        older.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag,
+                                   HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertEqual(len(response.data['issues']), 1)
+
+    def test_edited_feedback_and_notifications_change_the_etag(self):
+        admin_user = User.objects.create(email='admin@citycare.com', name='Admin', is_admin=True)
+        feedback = Feedback.objects.create(issue=self.issue, user=self.citizen, feedback_text='Still leaking')
+        notification = Notification.objects.create(title='Hello', message='Hi', target_user=self.citizen)
+        urls = [reverse('admin_view_feedback'), reverse('admin_all_notifications')]
+        self.client.force_authenticate(admin_user)
+        admin_etags = [self.client.get(url)['ETag'] for url in urls]
+        self.client.force_authenticate(self.citizen)
+        citizen_etag = self.client.get(reverse('get_notifications'))['ETag']
+
+        time.sleep(0.01)
+        feedback.feedback_text = 'Fixed now'
+        feedback.save()
+        notification.message = 'Hi again'
+        notification.save()
+        response = self.client.get(reverse('get_notifications'), HTTP_IF_NONE_MATCH=citizen_etag)
+        self.assertEqual(response.data['notifications'][0]['message'], 'Hi again')
+        self.client.force_authenticate(admin_user)
+        for url, etag in zip(urls, admin_etags):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_admin_lists_track_joined_rows(self):
+        admin_user = User.objects.create(email='admin@citycare.com', name='Admin', is_admin=True)
+        Feedback.objects.create(issue=self.issue, user=self.citizen, feedback_text='Still leaking')
+        Notification.objects.create(title='Hello', message='Hi', target_user=self.citizen)
+        self.client.force_authenticate(admin_user)
+        feedback_etag = self.client.get(reverse('admin_view_feedback'))['ETag']
+        notifications_etag = self.client.get(reverse('admin_all_notifications'))['ETag']
+
+        later = timezone.now() + timedelta(seconds=1)
+        Issue.objects.filter(id=self.issue.id).update(status='RESOLVED', updated_at=later)
+        ArchivedIssue.objects.create(id=999, user=self.citizen, problem='Old leak', problem_type='WATER',
+                                     location='Lake Road', description='Fixed', date=later, status='RESOLVED',
+                                     created_at=later, updated_at=later, archived_at=later)
+        issue_etags = {history: self.client.get(reverse('admin_all_issues'), {'history': history})['ETag']
+                       for history in ('0', '1')}
+        User.objects.filter(id=self.citizen.id).update(name='Citizen Kane', updated_at=later)
+        for history, etag in issue_etags.items():
+            response = self.client.get(reverse('admin_all_issues'), {'history': history}, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.data['issues'][0]['user']['name'], 'Citizen Kane')
+        response = self.client.get(reverse('admin_view_feedback'), HTTP_IF_NONE_MATCH=feedback_etag)
+        self.assertEqual(response.data['feedback'][0]['issue']['status'], 'RESOLVED')
+        response = self.client.get(reverse('admin_all_notifications'), HTTP_IF_NONE_MATCH=notifications_etag)
+        self.assertEqual(response.data['notifications'][0]['target_user']['name'], 'Citizen Kane')
+
+    def test_issue_detail_is_owner_only(self):
+        response = self.client.get(reverse('issue_detail', args=[self.issue.id]))
+        self.assertEqual(response.data['issue']['problem'], 'Leak')
+        self.assertEqual(self.client.get(reverse('issue_detail', args=[self.issue.id]),
+                                         HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        self.client.force_authenticate(User.objects.create(email='x@citycare.com', name='X'))
+        self.assertEqual(self.client.get(reverse('issue_detail', args=[self.issue.id])).status_code, 404)
+
+
+class IssueCounterTests(TestCase):
+    """Dashboard counters follow reports, status changes and deletes"""
+
+    def setUp(self):
+        self.admin = User.objects.create(email='admin@citycare.com', name='Admin', is_admin=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def report(self, problem_type):
+        response = self.client.post(reverse('report_issue'), {
+            'problem': 'Problem', 'problem_type': problem_type,
+            'location': 'Somewhere', 'description': 'Details'}, format='json')
+        return response.data['issue']['id']
+
+    def test_counters_track_lifecycle(self):
+        road = self.report('ROAD')
+        self.report('ROAD')
+        self.report('WATER')
+        self.client.put(reverse('admin_change_issue_status', args=[road]), {'status': 'RESOLVED'}, format='json')
+        Issue.objects.get(problem_type='WATER').delete()
+
+        with self.assertNumQueries(1):
+            stats = self.client.get(reverse('admin_issue_stats')).data
+        self.assertEqual(stats['total'], 2)
+        self.assertEqual(stats['by_status']['PENDING'], 1)
+        self.assertEqual(stats['by_status']['RESOLVED'], 1)
+        self.assertEqual(stats['by_problem_type'], {'ROAD': 2})
+        self.assertEqual(rebuild(dry_run=True), [])
+
+    def test_rebuild_reports_and_fixes_drift(self):
+        self.report('ROAD')
+        Issue.objects.update(status='IN_PROGRESS')
+        self.assertEqual(rebuild(), [('IN_PROGRESS', 'ROAD', 0, 1), ('PENDING', 'ROAD', 1, 0)])
+        self.assertEqual(rebuild(), [])
+
+
+class IssueSearchTests(TestCase):
+    """Search is ranked, tolerant of FTS syntax in input, and follows edits"""
+
+    def setUp(self):
+        self.admin = User.objects.create(email='admin@citycare.com', name='Admin', is_admin=True)
+        self.light = Issue.objects.create(user=self.admin, problem='Broken streetlight', problem_type='LIGHT',
+                                          location='Elm Street', description='Lamp is out')
+        self.pothole = Issue.objects.create(user=self.admin, problem='Pothole', problem_type='ROAD',
+                                            location='Station Road', description='Near the broken bench')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def search(self, q):
+        response = self.client.get(reverse('admin_search_issues'), {'q': q})
+        return [issue['id'] for issue in response.data['issues']]
+
+    def test_ranked_prefix_search(self):
+        self.assertEqual(self.search('broken'), [self.light.id, self.pothole.id])
+        self.assertEqual(self.search('street'), [self.light.id])
+        self.assertEqual(self.search('road" ('), [self.pothole.id])
+
+    def test_index_follows_updates_and_deletes(self):
+        Issue.objects.filter(id=self.light.id).update(problem='Fallen tree')
+        self.assertEqual(self.search('tree'), [self.light.id])
+        self.pothole.delete()
+        self.assertEqual(self.search('pothole'), [])
+
+
+class GeoQueryTests(TestCase):
+    """Coordinates are geohash-indexed and queried by radius or bounding box"""
+
+    def setUp(self):
+        self.citizen = User.objects.create(email='citizen@citycare.com', name='Citizen')
+        self.client = APIClient()
+        self.client.force_authenticate(self.citizen)
+        # Roughly 0 m, ~300 m and ~2 km north of the query point
+        for problem, lat in [('Here', 18.5204), ('Close', 18.5231), ('Far', 18.5384)]:
+            self.client.post(reverse('report_issue'), {
+                'problem': problem, 'problem_type': 'ROAD', 'location': 'Pune',
+                'description': 'Pothole', 'lat': lat, 'lon': 73.8567}, format='json')
+
+    def test_report_stores_geohash(self):
+        issue = Issue.objects.get(problem='Here')
+        self.assertEqual(issue.geohash, geohash_encode(18.5204, 73.8567))
+        response = self.client.post(reverse('report_issue'), {
+            'problem': 'X', 'problem_type': 'ROAD', 'location': 'Y', 'description': 'Z',
+            'lat': 95, 'lon': 0}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_nearby_is_radius_limited_and_sorted(self):
+        response = self.client.get(reverse('issues_nearby'),
+                                   {'lat': 18.5204, 'lon': 73.8567, 'radius': 500})
+        self.assertEqual([issue['problem'] for issue in response.data['issues']], ['Here', 'Close'])
+        self.assertLess(response.data['issues'][1]['distance_m'], 500)
+
+    def test_bbox(self):
+        response = self.client.get(reverse('issues_in_bbox'), {
+            'min_lat': 18.53, 'min_lon': 73.85, 'max_lat': 18.54, 'max_lon': 73.86})
+        self.assertEqual([issue['problem'] for issue in response.data['issues']], ['Far'])
+
+    def test_other_citizens_issues_show_only_public_fields(self):
+        neighbour = User.objects.create(email='neighbour@citycare.com', name='Neighbour')
+        self.client.force_authenticate(neighbour)
+        response = self.client.get(reverse('issues_nearby'),
+                                   {'lat': 18.5204, 'lon': 73.8567, 'radius': 100})
+        self.assertEqual(set(response.data['issues'][0]),
+                         {'id', 'problem_type', 'status', 'lat', 'lon', 'distance_m'})
+        response = self.client.get(reverse('issues_in_bbox'), {
+            'min_lat': 18.53, 'min_lon': 73.85, 'max_lat': 18.54, 'max_lon': 73.86})
+        self.assertNotIn('description', response.data['issues'][0])
+
+        self.client.force_authenticate(User.objects.create(email='admin@citycare.com', name='Admin',
+                                                           is_admin=True))
+        response = self.client.get(reverse('issues_in_bbox'), {
+            'min_lat': 18.53, 'min_lon': 73.85, 'max_lat': 18.54, 'max_lon': 73.86})
+        self.assertEqual(response.data['issues'][0]['problem'], 'Far')
+
+
+class DuplicateDetectionTests(TestCase):
+    """Near-identical open reports are linked to one canonical issue"""
+
+    def setUp(self):
+        self.citizen = User.objects.create(email='citizen@citycare.com', name='Citizen')
+        self.client = APIClient()
+        self.client.force_authenticate(self.citizen)
+
+    def report(self, problem, description, location):
+        return self.client.post(reverse('report_issue'), {
+            'problem': problem, 'problem_type': 'STREETLIGHT',
+            'location': location, 'description': description}, format='json').data
+
+    def test_duplicates_link_to_canonical_issue(self):
+        first = self.report('Streetlight not working', 'The streetlight has been off for three nights',
+                            '12 Station Road')
+        self.assertEqual(first['possible_duplicates'], [])
+
+        second = self.report('Streetlight not working!', 'Streetlight has been off for three nights.',
+                             '12, Station Rd')
+        self.assertEqual(second['issue']['duplicate_of'], first['issue']['id'])
+        self.assertEqual(second['possible_duplicates'][0]['id'], first['issue']['id'])
+
+        third = self.report('Streetlight not working', 'streetlight has been off for 3 nights',
+                            '12 station road')
+        self.assertEqual(third['issue']['duplicate_of'], first['issue']['id'])
+
+        unrelated = self.report('Overflowing garbage bin', 'Bin not emptied since Monday', 'Market Square')
+        self.assertIsNone(unrelated['issue']['duplicate_of'])
+
+    def test_backfill_indexes_existing_issues(self):
+        Issue.objects.create(user=self.citizen, problem='Burst pipe', problem_type='WATER',
+                             location='Lake Road', description='Water everywhere')
+        call_command('backfill_issue_signatures', stdout=StringIO())
+        self.assertEqual(IssueSignature.objects.count(), 1)
+        self.assertEqual(IssueLSHBucket.objects.count(), 16)
+        duplicate = self.report('Burst pipe', 'Water everywhere', 'Lake Rd')
+        self.assertIsNotNone(duplicate['issue']['duplicate_of'])
+
+    def test_only_the_start_of_long_text_is_shingled(self):
+        text = issue_text('Pothole', 'deep ' * 10000, 'Main Street')
+        self.assertLess(len(text), MAX_TEXT_LENGTH + 20)
+        self.assertTrue(text.endswith(' @ main st'))
+
+    def test_admin_edits_reindex_the_issue(self):
+        first = self.report('Streetlight not working', 'The streetlight has been off for three nights',
+                            '12 Station Road')
+        issue = Issue.objects.get(id=first['issue']['id'])
+        issue.problem, issue.description = 'Overflowing garbage bin', 'Bin not emptied since Monday'
+        form = mock.Mock(changed_data=['problem', 'description'])
+        IssueAdmin(Issue, admin.site).save_model(None, issue, form, change=True)
+        self.assertEqual(IssueLSHBucket.objects.filter(issue=issue).count(), 16)
+
+        stale = self.report('Streetlight not working', 'Streetlight has been off for three nights',
+                            '12 Station Road')
+        self.assertEqual(stale['possible_duplicates'], [])
+        fresh = self.report('Overflowing garbage bin', 'Bin not emptied since Monday', '12 Station Road')
+        self.assertEqual(fresh['issue']['duplicate_of'], issue.id)
+
+
+class BulkStatusChangeTests(TestCase):
+    """Bulk status changes run set-based with batched side effects"""
+
+    def setUp(self):
+        self.admin = User.objects.create(email='admin@citycare.com', name='Admin', is_admin=True)
+        self.citizen = User.objects.create(email='citizen@citycare.com', name='Citizen')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def make_issues(self, count, problem_type='ROAD'):
+        issues = []
+        for i in range(count):
+            issue = Issue.objects.create(user=self.citizen, problem=f'Pothole {i}', problem_type=problem_type,
+                                         location='Main Street', description='Deep')
+            counters.record_created(issue)
+            issues.append(issue)
+        return issues
+
+    def bulk(self, payload):
+        return self.client.post(reverse('admin_bulk_change_issue_status'), payload, format='json')
+
+    def test_bulk_by_ids_batches_side_effects(self):
+        issues = self.make_issues(3)
+        Issue.objects.filter(id=issues[0].id).update(status='RESOLVED')
+        counters.rebuild()
+
+        response = self.bulk({'status': 'RESOLVED', 'ids': [issue.id for issue in issues] + [999]})
+        self.assertEqual(response.data['updated'], 3)
+        self.assertEqual(response.data['not_found'], [999])
+        self.assertEqual([row['old_status'] for row in response.data['issues']],
+                         ['RESOLVED', 'PENDING', 'PENDING'])
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertEqual(OutboundEmail.objects.count(), 2)
+        self.assertEqual(counters.dashboard_stats()['by_status']['RESOLVED'], 3)
+        self.assertEqual(rebuild(dry_run=True), [])
+
+    def test_query_count_is_independent_of_issue_count(self):
+        def queries_for(issues):
+            with CaptureQueriesContext(connection) as queries:
+                self.bulk({'status': 'REPORT', 'ids': [issue.id for issue in issues]})
+            return len(queries)
+
+        few = queries_for(self.make_issues(2))
+        many = queries_for(self.make_issues(30, problem_type='WATER'))
+        self.assertEqual(few, many)
+
+    def test_bulk_by_filter(self):
+        self.make_issues(2)
+        self.make_issues(1, problem_type='WATER')
+        response = self.bulk({'status': 'IN_PROGRESS', 'filter': {'problem_type': 'WATER'}})
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(Issue.objects.filter(status='IN_PROGRESS').count(), 1)
+        self.assertEqual(response.data['not_found'], [])
+
+    def test_non_list_ids_are_rejected_before_updating(self):
+        self.make_issues(1, problem_type='WATER')
+        for ids in (5, '12'):
+            response = self.bulk({'status': 'RESOLVED', 'ids': ids, 'filter': {'problem_type': 'WATER'}})
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(Issue.objects.filter(status='RESOLVED').exists())
+
+
+class IssueImportTests(TestCase):
+    """Imports stream rows into chunked bulk inserts and report rejected rows"""
+
+    def setUp(self):
+        self.admin = User.objects.create(email='admin@citycare.com', name='Admin', is_admin=True)
+        self.existing = User.objects.create(email='known@citycare.com', name='Known')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_csv_upload(self):
+        content = (
+            'email,name,problem,problem_type,location,description,status,created_at\n'
+            'known@citycare.com,,Pothole,ROAD,Main Street,Deep,RESOLVED,2019-03-01T10:00:00\n'
+            'new@citycare.com,New Citizen,Leak,WATER,Lake Road,Pipe burst,,\n'
+            'new@citycare.com,,Leak again,WATER,Lake Road,Still leaking,PENDING,\n'
+            'bad-email,,Noise,NOISE,Park,Loud,PENDING,\n'
+            'known@citycare.com,,No type,,Park,Loud,PENDING,\n'
+        )
+        upload = SimpleUploadedFile('legacy.csv', content.encode())
+        response = self.client.post(reverse('admin_import_issues'), {'file': upload}, format='multipart')
+
+        self.assertEqual((response.data['imported'], response.data['rejected'], response.data['users_created']),
+                         (3, 2, 1))
+        self.assertEqual([error['line'] for error in response.data['errors']], [5, 6])
+        legacy = Issue.objects.get(problem='Pothole')
+        self.assertEqual((legacy.user_id, legacy.created_at.year), (self.existing.id, 2019))
+        self.assertEqual(User.objects.get(email='new@citycare.com').issues.count(), 2)
+        self.assertEqual(rebuild(dry_run=True), [])
+
+    def test_emails_match_like_the_user_manager(self):
+        mixed_case = User.objects.create_user('Alice@Example.com', 'Alice', 'pw')
+        content = (
+            'email,problem,problem_type,location,description\n'
+            'Alice@EXAMPLE.com,Pothole,ROAD,Main Street,Deep\n'
+            'Bob@Example.com,Leak,WATER,Lake Road,Burst\n'
+        )
+        importer = IssueImporter()
+        importer.run(iter_rows(BytesIO(content.encode()), 'csv'))
+        self.assertEqual(Issue.objects.get(problem='Pothole').user_id, mixed_case.id)
+        self.assertTrue(User.objects.filter(email='Bob@example.com').exists())
+        self.assertEqual(importer.users_created, 1)
+
+    def test_users_created_skips_conflicts(self):
+        importer = IssueImporter()
+        rows = [{'email': 'late@citycare.com', 'name': '', 'problem': 'Leak', 'problem_type': 'WATER',
+                 'location': 'Lake Road', 'description': 'Burst'}]
+        original = User.objects.bulk_create
+
+        def racing_bulk_create(objs, **kwargs):
+            # Another worker creates the same user first
+            User.objects.create(email='late@citycare.com', name='Late')
+            return original(objs, **kwargs)
+
+        with mock.patch.object(User.objects, 'bulk_create', racing_bulk_create):
+            importer.resolve_users(rows)
+        self.assertEqual(importer.users_created, 0)
+        self.assertIn('late@citycare.com', importer.user_ids)
+
+    def test_ndjson_chunks(self):
+        lines = [json.dumps({'email': f'user{i % 3}@citycare.com', 'problem': f'Issue {i}',
+                             'problem_type': 'ROAD', 'location': 'Main Street', 'description': 'x'})
+                 for i in range(7)] + ['not json']
+        importer = IssueImporter(chunk_size=3)
+        importer.run(iter_rows(BytesIO('\n'.join(lines).encode()), 'ndjson'))
+        self.assertEqual(importer.summary(), {'imported': 7, 'rejected': 1, 'users_created': 3})
+
+
+class CachedAuthenticationTests(TestCase):
+    """JWT users come from the in-process cache until the user row changes"""
+
+    def setUp(self):
+        user_cache.clear()
+        self.citizen = User.objects.create(email='citizen@citycare.com', name='Citizen')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.citizen)}')
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('notifications_unread_count'))
+        self.assertEqual(response.status_code, 200)
+        return sum('FROM "users"' in query['sql'] for query in queries.captured_queries)
+
+    def test_repeat_requests_skip_user_lookup(self):
+        self.assertEqual(self.user_queries(), 1)
+        self.assertEqual(self.user_queries(), 0)
+
+    def test_profile_edit_invalidates(self):
+        self.user_queries()
+        response = self.client.put(reverse('edit_profile'), {'name': 'Renamed'}, format='json')
+        self.assertEqual(response.data['user']['name'], 'Renamed')
+        self.assertEqual(self.user_queries(), 1)
+        self.assertEqual(user_cache.get(self.citizen.id).name, 'Renamed')
+
+    def test_deactivation_invalidates(self):
+        self.user_queries()
+        self.citizen.is_active = False
+        self.citizen.save()
+        response = self.client.get(reverse('notifications_unread_count'))
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AsyncAuthTests(TestCase):
+    """Register/login hash on the bounded pool and shed load when it is full"""
+
+    def setUp(self):
+        hashing.pool.configure(workers=2, max_pending=2)
+        self.addCleanup(hashing.pool.configure)
+
+    def post(self, name, data):
+        return self.client.post(reverse(name), data, content_type='application/json')
+
+    def test_register_then_login(self):
+        response = self.post('register', {'name': 'Asha', 'email': 'asha@citycare.com', 'password': 's3cret'})
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('access', response.json()['tokens'])
+        self.assertEqual(self.post('register', {'name': 'Asha', 'email': 'asha@citycare.com',
+                                                'password': 'x'}).status_code, 400)
+
+        self.assertEqual(self.post('login', {'email': 'asha@citycare.com', 'password': 's3cret'}).status_code, 200)
+        self.assertEqual(self.post('login', {'email': 'asha@citycare.com', 'password': 'wrong'}).status_code, 401)
+        self.assertEqual(self.post('login', {'email': 'nobody@citycare.com', 'password': 'x'}).status_code, 401)
+
+    def test_full_queue_returns_503(self):
+        User.objects.create_user(email='asha@citycare.com', name='Asha', password='s3cret')
+        release = threading.Event()
+        blockers = [hashing.pool.submit(release.wait) for _ in range(2)]
+        try:
+            response = self.post('login', {'email': 'asha@citycare.com', 'password': 's3cret'})
+        finally:
+            release.set()
+        for blocker in blockers:
+            blocker.result()
+        self.assertEqual((response.status_code, response['Retry-After']), (503, '1'))
+        self.assertEqual(self.post('login', {'email': 'asha@citycare.com', 'password': 's3cret'}).status_code, 200)
+
+
+class RefreshTokenRevocationTests(TestCase):
+    """Logout and rotation revoke refresh tokens; checks skip the DB unless the Bloom filter hits"""
+
+    def setUp(self):
+        revocations.reset()
+        self.citizen = User.objects.create(email='citizen@citycare.com', name='Citizen')
+        self.refresh = str(RefreshToken.for_user(self.citizen))
+
+    def refresh_with(self, token):
+        return self.client.post(reverse('token_refresh'), {'refresh': token}, content_type='application/json')
+
+    def test_rotation_revokes_old_token(self):
+        response = self.refresh_with(self.refresh)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh_with(self.refresh).status_code, 401)
+        self.assertEqual(self.refresh_with(response.json()['refresh']).status_code, 200)
+
+    def test_logout_revokes_token(self):
+        client = APIClient()
+        client.force_authenticate(self.citizen)
+        response = client.post(reverse('logout'), {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh_with(self.refresh).status_code, 401)
+
+    def test_unrevoked_check_skips_revoked_table(self):
+        RefreshToken(self.refresh)
+        with CaptureQueriesContext(connection) as queries:
+            RefreshToken(self.refresh)
+        self.assertEqual(queries.captured_queries, [])
+
+    def test_purge_drops_expired(self):
+        past = timezone.now() - timedelta(days=1)
+        RevokedToken.objects.create(jti='expired', expires_at=past)
+        RevokedToken.objects.create(jti='live', expires_at=timezone.now() + timedelta(days=1))
+        self.assertEqual(purge_expired(), 1)
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), ['live'])
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(1000)
+        keys = [f'jti-{i}' for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class DatabaseProfileTests(TestCase):
+    def test_sqlite_connection_is_tuned(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_BUSY_TIMEOUT_MS)
+        init_command = sqlite_profile('city.sqlite3')['OPTIONS']['init_command']
+        self.assertIn('PRAGMA journal_mode=WAL', init_command)
+        self.assertIn('PRAGMA synchronous=NORMAL', init_command)
+
+    def test_committed_database_keeps_its_journal(self):
+        init_command = sqlite_profile('db.sqlite3', journal_mode=None)['OPTIONS']['init_command']
+        self.assertNotIn('journal_mode', init_command)
+        self.assertNotIn('synchronous', init_command)
+
+    def test_replica_profile_is_read_only(self):
+        profile = sqlite_profile('replica.sqlite3', replica=True)
+        self.assertIn('PRAGMA query_only=ON', profile['OPTIONS']['init_command'])
+        self.assertNotIn('journal_mode', profile['OPTIONS']['init_command'])
+
+    def test_router_sends_only_opted_in_reads_to_replica(self):
+        router = ReplicaRouter()
+        routed = replica_reads(lambda: (router.db_for_read(Issue), router.db_for_write(Issue)))
+        primary_only = {'default': settings.DATABASES['default']}
+        with_replica = {**primary_only, 'replica': settings.DATABASES['default']}
+
+        with override_settings(DATABASES=primary_only):
+            self.assertEqual(routed(), ('default', 'default'))
+        with override_settings(DATABASES=with_replica):
+            self.assertEqual(routed(), ('replica', 'default'))
+            self.assertEqual(router.db_for_read(Issue), 'default')
+
+
+class SeedAndBenchmarkTests(TestCase):
+    def test_seed_city_keeps_counters_exact(self):
+        inserted = seed_city(300, users=20, notifications=40, batch_size=100)
+        self.assertEqual(inserted['users'], 20)
+        self.assertEqual(Issue.objects.count(), 300)
+        self.assertEqual(Notification.objects.count(), 40)
+        self.assertEqual(Feedback.objects.count(), inserted['feedback'])
+        self.assertFalse(Feedback.objects.exclude(issue__status='RESOLVED').exists())
+        self.assertEqual(counters.dashboard_stats()['total'], 300)
+        self.assertEqual(rebuild(dry_run=True), [])
+
+        seed_city(10, users=5)
+        self.assertEqual(User.objects.filter(email__endswith='@seed.citycare.invalid').count(), 25)
+
+    def test_seeded_city_has_a_history(self):
+        seed_city(400, users=20, notifications=200, batch_size=150, history_days=365)
+        now = timezone.now()
+        created = list(Issue.objects.order_by('id').values_list('created_at', flat=True))
+        self.assertEqual(created, sorted(created))
+        self.assertLess(created[0], now - timedelta(days=300))
+        self.assertGreater(len({day.date() for day in created}), 200)
+        self.assertFalse(Issue.objects.filter(status='PENDING').exclude(updated_at=F('created_at')).exists())
+        self.assertFalse(Issue.objects.filter(updated_at__lt=F('created_at')).exists())
+        self.assertFalse(Feedback.objects.exclude(created_at=F('issue__updated_at')).exists())
+        # Older notifications have expired, and archiving has closed issues to move
+        self.assertTrue(Notification.objects.filter(expires_at__lte=now).exists())
+        self.assertTrue(Notification.objects.filter(expires_at__gt=now).exists())
+        self.assertFalse(Notification.objects.exclude(
+            expires_at=F('created_at') + timedelta(days=settings.NOTIFICATION_TTL_DAYS)).exists())
+        self.assertTrue(archivable(now - timedelta(days=settings.ISSUE_ARCHIVE_AFTER_DAYS)).exists())
+
+    def test_benchmark_covers_every_route(self):
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            call_command('benchmark_routes', scales='50', requests=2, warmup=0, output=output.name,
+                         stdout=StringIO())
+            report = json.load(output)
+
+        routes = report['scales'][0]['routes']
+        self.assertEqual(set(routes), set(route_names()))
+        for name, stats in routes.items():
+            self.assertTrue(all(status < 500 for status in stats['statuses']), name)
+        self.assertLessEqual(routes['user_issues']['p50_ms'], routes['user_issues']['p99_ms'])
+        # Everything was rolled back
+        self.assertEqual(Issue.objects.count(), 0)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.metrics_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.metrics_dir.cleanup)
+        overrides = override_settings(METRICS_DIR=self.metrics_dir.name, METRICS_SCRAPE_TOKEN='scrape-me')
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        request_metrics.registry.clear()
+
+        self.admin = User.objects.create_user('admin@citycare.com', 'Admin', 'pw', is_admin=True)
+        self.citizen = User.objects.create_user('asha@citycare.com', 'Asha', 'pw')
+        self.client = APIClient()
+
+    def scrape(self, user=None, **headers):
+        if user:
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {AccessToken.for_user(user)}'
+        return self.client.get('/metrics', **headers)
+
+    def test_metrics_are_admin_only(self):
+        self.assertEqual(self.scrape().status_code, 401)
+        self.assertEqual(self.scrape(self.citizen).status_code, 403)
+        self.assertEqual(self.scrape(self.admin).status_code, 200)
+        self.assertEqual(self.scrape(HTTP_AUTHORIZATION='Bearer scrape-me').status_code, 200)
+
+    def test_query_token_is_only_for_the_event_stream(self):
+        response = self.client.get('/metrics', {'token': str(AccessToken.for_user(self.admin))})
+        self.assertEqual(response.status_code, 401)
+
+    def test_records_latency_status_and_queries_per_route(self):
+        self.client.force_authenticate(self.citizen)
+        self.client.get(reverse('user_issues'))
+        self.client.force_authenticate(None)
+        body = self.scrape(HTTP_AUTHORIZATION='Bearer scrape-me').content.decode()
+
+        self.assertIn('citycare_http_requests_total{route="user_issues",method="GET",status="200"} 1', body)
+        self.assertIn('citycare_http_request_duration_seconds_bucket{route="user_issues",method="GET",le="+Inf"} 1',
+                      body)
+        self.assertIn('citycare_http_request_duration_seconds_count{route="user_issues",method="GET"} 1', body)
+        queries = next(line for line in body.splitlines()
+                       if line.startswith('citycare_db_queries_total{route="user_issues"'))
+        self.assertGreater(float(queries.split()[-1]), 0)
+
+    def test_sums_snapshots_of_other_workers(self):
+        other = {'counters': [['citycare_http_requests_total', ['login', 'POST', '200'], 4]], 'histograms': []}
+        with open(f'{self.metrics_dir.name}/999999.json', 'w') as snapshot:
+            json.dump(other, snapshot)
+        self.client.post(reverse('login'), {'email': 'nobody@citycare.com', 'password': 'x'}, format='json')
+        self.client.post(reverse('login'), {'email': 'asha@citycare.com', 'password': 'pw'}, format='json')
+
+        body = self.scrape(self.admin).content.decode()
+        self.assertIn('citycare_http_requests_total{route="login",method="POST",status="200"} 5', body)
+        self.assertIn('citycare_http_requests_total{route="login",method="POST",status="401"} 1', body)
+
+
+class RequestProfilingTests(TestCase):
+    def setUp(self):
+        self.profile_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.profile_dir.cleanup)
+        overrides = override_settings(PROFILE_DIR=self.profile_dir.name, PROFILE_MAX_FILES=2)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.admin = User.objects.create_user('admin@citycare.com', 'Admin', 'pw', is_admin=True)
+        self.citizen = User.objects.create_user('asha@citycare.com', 'Asha', 'pw')
+        Issue.objects.create(user=self.citizen, problem='Pothole', problem_type='ROAD',
+                             location='Main Street', description='Deep pothole')
+
+    def get(self, user, url, **headers):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        return client.get(url, **headers)
+
+    def test_admin_trigger_saves_profile_with_sql(self):
+        response = self.get(self.admin, reverse('admin_all_issues'), HTTP_X_PROFILE='1')
+        profile_id = response['X-Profile-Id']
+
+        listed = self.get(self.admin, reverse('admin_profiles')).json()['profiles']
+        self.assertEqual([profile['id'] for profile in listed], [profile_id])
+
+        profile = self.get(self.admin, reverse('admin_profile_detail', args=[profile_id])).json()
+        self.assertEqual(profile['path'], reverse('admin_all_issues'))
+        self.assertEqual(profile['query_count'], len(profile['queries']))
+        self.assertTrue(any('"issues"' in query['sql'] for query in profile['queries']))
+
+        folded = self.get(self.admin, reverse('admin_profile_detail', args=[profile_id]) + '?output=folded')
+        self.assertEqual(folded['Content-Type'], 'text/plain; charset=utf-8')
+
+    def test_untriggered_and_non_admin_requests_are_not_profiled(self):
+        self.assertNotIn('X-Profile-Id', self.get(self.admin, reverse('admin_all_issues')))
+        self.assertNotIn('X-Profile-Id', self.get(self.citizen, reverse('user_issues') + '?_profile=1'))
+        self.assertEqual(os.listdir(self.profile_dir.name), [])
+        self.assertEqual(self.get(self.citizen, reverse('admin_profiles')).status_code, 403)
+
+    def test_trigger_needs_an_exact_flag(self):
+        for query in ('?x_profile=1', '?q=_profile=1', '?_profile=0'):
+            self.assertNotIn('X-Profile-Id', self.get(self.admin, reverse('admin_all_issues') + query))
+        self.assertNotIn('X-Profile-Id', self.get(self.admin, reverse('admin_all_issues'), HTTP_X_PROFILE='0'))
+
+        token = 'secret-looking-value'
+        response = self.get(self.admin, reverse('admin_all_issues') + f'?_profile=1&q={token}')
+        profile = self.get(self.admin, reverse('admin_profile_detail', args=[response['X-Profile-Id']])).json()
+        self.assertEqual(profile['path'], reverse('admin_all_issues'))
+
+    def test_ring_buffer_keeps_newest(self):
+        ids = [self.get(self.admin, reverse('admin_issue_stats') + '?_profile=1')['X-Profile-Id']
+               for _ in range(3)]
+        listed = [profile['id'] for profile in profiling.list_profiles()]
+        self.assertEqual(listed, ids[:0:-1])
+        self.assertEqual(self.get(self.admin, reverse('admin_profile_detail', args=[ids[0]])).status_code, 404)
+        self.assertEqual(self.get(self.admin, reverse('admin_profile_detail', args=['..etc'])).status_code, 404)
+
+    def test_folded_stacks(self):
+        sampler = profiling.Sampler(threading.get_ident(), 0.0005)
+        sampler.start()
+        deadline = time.monotonic() + 0.05
+        while time.monotonic() < deadline:
+            sum(range(1000))
+        sampler.stop()
+        self.assertGreater(sampler.samples, 0)
+        stack, count = profiling.folded({'stacks': dict(sampler.stacks)}).splitlines()[0].rsplit(' ', 1)
+        self.assertIn('test_folded_stacks (core/tests.py:', stack.split(';')[-1])
+
+
+class FastRenderingTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('admin@citycare.com', 'Admin', 'pw', is_admin=True)
+        self.issue = Issue.objects.create(user=self.admin, problem='Pothole ☂', problem_type='ROAD',
+                                          location='Main Street', description='Deep pothole')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_list_renders_native_datetimes(self):
+        response = self.client.get(reverse('admin_all_issues'))
+        row = json.loads(response.content)['issues'][0]
+        self.assertEqual(row['created_at'], self.issue.created_at.isoformat())
+        self.assertEqual(row['user'], {'id': self.admin.id, 'name': 'Admin', 'email': 'admin@citycare.com'})
+        self.assertEqual(row['problem'], 'Pothole ☂')
+
+    def test_stdlib_fallback_matches_orjson(self):
+        data = {'issues': [issue_row(row) for row in issue_values(Issue.objects.all(), with_user=True)],
+                'count': 1, 'ratio': 0.5, 'missing': None}
+        self.assertEqual(renderers.stdlib_dumps(data), renderers.dumps(data))
+        self.assertEqual(json.loads(renderers.stdlib_dumps(data, indent=True)), json.loads(renderers.dumps(data)))
+
+    def test_ndjson_export_uses_fast_encoder(self):
+        response = self.client.get(reverse('admin_export', args=['issues']))
+        line = json.loads(b''.join(response.streaming_content).splitlines()[0])
+        self.assertEqual(line['date'], self.issue.date.isoformat())
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('admin@citycare.com', 'Admin', 'pw', is_admin=True)
+        self.citizen = User.objects.create_user('asha@citycare.com', 'Asha', 'pw')
+        for i in range(3):
+            Issue.objects.create(user=self.citizen, problem=f'Pothole {i}', problem_type='ROAD',
+                                 location='Main Street', description='Deep pothole ' * 20)
+        Notification.objects.create(title='Update', message='Long message ' * 50, target_user=self.citizen)
+        self.client = APIClient()
+
+    def get(self, user, name, **params):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(name), params)
+        return response, queries
+
+    def test_only_requested_columns_are_read(self):
+        response, queries = self.get(self.citizen, 'user_issues', fields='problem,status,description_preview',
+                                     limit=2)
+        rows = response.data['issues']
+        self.assertEqual(set(rows[0]), {'id', 'problem', 'status', 'description_preview'})
+        self.assertEqual(len(rows[0]['description_preview']), 121)
+        self.assertTrue(rows[0]['description_preview'].endswith('…'))
+        select = queries.captured_queries[-1]['sql']
+        self.assertNotIn('"issues"."description" AS', select)
+        self.assertEqual(select.count('"issues"."id" AS'), 1)
+
+        # Cursors still work on sparse rows
+        next_page, _ = self.get(self.citizen, 'user_issues', fields='problem', limit=2,
+                                cursor=response.data['next_cursor'])
+        self.assertEqual([row['problem'] for row in next_page.data['issues']], ['Pothole 0'])
+
+    def test_admin_lists_and_nested_fields(self):
+        response, _ = self.get(self.admin, 'admin_all_issues', fields='problem,user')
+        self.assertEqual(response.data['issues'][0]['user']['email'], 'asha@citycare.com')
+
+        response, queries = self.get(self.admin, 'admin_all_notifications', fields='title,target_user')
+        self.assertEqual(response.data['notifications'][0]['target_user']['name'], 'Asha')
+        self.assertNotIn('"message"', queries.captured_queries[-1]['sql'])
+
+    def test_notification_read_state_is_a_field(self):
+        response, _ = self.get(self.citizen, 'get_notifications', fields='title,is_read')
+        self.assertEqual(response.data['notifications'][0], {'id': response.data['notifications'][0]['id'],
+                                                              'title': 'Update', 'is_read': False})
+        response, _ = self.get(self.citizen, 'get_notifications', fields='title')
+        self.assertNotIn('is_read', response.data['notifications'][0])
+
+    def test_unknown_field_is_rejected(self):
+        response, _ = self.get(self.citizen, 'user_issues', fields='problem,user')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.get(self.citizen, 'get_notifications', fields='secret')[0].status_code, 400)
+
+
+class AdminChangelistTests(TestCase):
+    def setUp(self):
+        self.superuser = User.objects.create_superuser('root@citycare.com', 'Root', 'pw')
+        self.client.force_login(self.superuser)
+
+    def make_rows(self, count):
+        start = User.objects.count()
+        for i in range(start, start + count):
+            user = User.objects.create(email=f'citizen{i}@citycare.com', name=f'Citizen {i}')
+            issue = Issue.objects.create(user=user, problem=f'Pothole {i}', problem_type='ROAD',
+                                         location='Main Street', description='Deep pothole')
+            counters.record_created(issue)
+            Feedback.objects.create(issue=issue, user=user, feedback_text='Thanks')
+            Notification.objects.create(title=f'Update {i}', message='Hello', target_user=user)
+
+    def changelist(self, model, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(f'admin:core_{model}_changelist'), params)
+        self.assertEqual(response.status_code, 200)
+        return response, queries
+
+    def test_queries_do_not_grow_with_rows(self):
+        self.make_rows(2)
+        few = {model: len(self.changelist(model)[1]) for model in ('issue', 'notification', 'feedback')}
+        self.make_rows(8)
+        for model, count in few.items():
+            response, queries = self.changelist(model)
+            self.assertEqual(len(queries), count, model)
+            self.assertEqual(response.context['cl'].result_count, 10)
+        # Never an uncapped COUNT(*) or SELECT DISTINCT over issues
+        issue_sql = ' '.join(query['sql'] for query in self.changelist('issue')[1].captured_queries)
+        self.assertNotIn('DISTINCT', issue_sql)
+        self.assertNotIn('COUNT(*) AS "__count" FROM "issues"', issue_sql)
+
+    def test_filtered_counts_are_capped(self):
+        self.make_rows(5)
+        with mock.patch.object(EstimatedCountPaginator, 'count_limit', 3):
+            response, _ = self.changelist('issue', status__exact='PENDING')
+        self.assertEqual(response.context['cl'].result_count, 3)
+
+    def test_search_uses_indexes(self):
+        self.make_rows(3)
+        response, queries = self.changelist('issue', q='pothole 1')
+        self.assertEqual([issue.problem for issue in response.context['cl'].result_list], ['Pothole 1'])
+        self.assertNotIn('LIKE', ' '.join(query['sql'] for query in queries.captured_queries))
+
+        response, _ = self.changelist('feedback', q='citizen2@CityCare.com')
+        self.assertEqual([feedback.user.email for feedback in response.context['cl'].result_list],
+                         ['citizen2@citycare.com'])
+        response, _ = self.changelist('notification', q='Update 1')
+        self.assertEqual([notification.title for notification in response.context['cl'].result_list],
+                         ['Update 1'])
+
+    def test_date_hierarchy_probes_the_index(self):
+        self.make_rows(3)
+        Issue.objects.filter(problem='Pothole 1').update(created_at=timezone.now() - timedelta(days=400))
+        issues = IssueAdmin(Issue, admin.site).get_queryset(None)
+        for kind in ('year', 'month', 'day'):
+            with CaptureQueriesContext(connection) as queries:
+                probed = list(issues.datetimes('created_at', kind))
+            self.assertEqual(probed, list(Issue.objects.datetimes('created_at', kind)))
+            self.assertNotIn('django_datetime_trunc', ' '.join(query['sql'] for query in queries.captured_queries))
+
+        year = timezone.localtime(Issue.objects.get(problem='Pothole 1').created_at).year
+        response, _ = self.changelist('issue', created_at__year=year)
+        self.assertIn('Pothole 1', [issue.problem for issue in response.context['cl'].result_list])
+
+
+class IssueArchiveTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('admin@citycare.com', 'Admin', 'pw', is_admin=True)
+        self.citizen = User.objects.create_user('asha@citycare.com', 'Asha', 'pw')
+        self.client = APIClient()
+
+    def make_issue(self, problem, status='PENDING', age_days=0, **fields):
+        issue = Issue.objects.create(user=self.citizen, problem=problem, problem_type='ROAD',
+                                     location='Main Street', description='Deep pothole', status=status, **fields)
+        counters.record_created(issue)
+        past = timezone.now() - timedelta(days=age_days)
+        Issue.objects.filter(pk=issue.pk).update(created_at=past, updated_at=past)
+        return issue
+
+    def archive(self, **options):
+        call_command('archive_issues', older_than_days=30, stdout=StringIO(), **options)
+
+    def test_moves_old_closed_issues_with_feedback(self):
+        old = self.make_issue('Old pothole', 'RESOLVED', age_days=60)
+        Feedback.objects.create(issue=old, user=self.citizen, feedback_text='Fixed, thanks')
+        reported = self.make_issue('Old report', 'REPORT', age_days=45)
+        recent = self.make_issue('Recent pothole', 'RESOLVED', age_days=5)
+        still_open = self.make_issue('Old open pothole', 'PENDING', age_days=90)
+        stats = counters.dashboard_stats()
+
+        self.archive(batch_size=1)
+
+        self.assertEqual(set(Issue.objects.values_list('id', flat=True)), {recent.id, still_open.id})
+        self.assertEqual(set(ArchivedIssue.objects.values_list('id', flat=True)), {old.id, reported.id})
+        self.assertFalse(Feedback.objects.exists())
+        self.assertEqual(ArchivedFeedback.objects.get().issue_id, old.id)
+        archived = ArchivedIssue.objects.get(id=old.id)
+        self.assertEqual((archived.problem, archived.status, archived.user_id),
+                         ('Old pothole', 'RESOLVED', self.citizen.id))
+        # Archived issues still count on the dashboard, and the counters agree with a rebuild
+        self.assertEqual(counters.dashboard_stats(), stats)
+        self.assertEqual(rebuild(dry_run=True), [])
+
+    def test_archiving_leaves_counters_alone_and_user_deletes_decrement(self):
+        old = self.make_issue('Old pothole', 'RESOLVED', age_days=60)
+        IssueSignature.objects.create(issue=old, minhash=b'x')
+        IssueLSHBucket.objects.create(issue=old, band=0, bucket=1)
+        stats = counters.dashboard_stats()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.archive()
+        self.assertFalse([query for query in queries if 'issue_counters' in query['sql']])
+        self.assertFalse(IssueSignature.objects.exists() or IssueLSHBucket.objects.exists())
+        self.assertEqual(counters.dashboard_stats(), stats)
+
+        self.citizen.delete()
+        self.assertFalse(ArchivedIssue.objects.exists())
+        self.assertEqual(rebuild(dry_run=True), [])
+
+    def test_issue_reopened_mid_batch_stays_hot(self):
+        reopened = self.make_issue('Old pothole', 'RESOLVED', age_days=60)
+        archived = self.make_issue('Old report', 'REPORT', age_days=60)
+        untracked = counters.deletes_untracked
+
+        @contextmanager
+        def reopen_first():
+            # A citizen reopens the issue after the batch was read
+            Issue.objects.filter(pk=reopened.pk).update(status='PENDING', updated_at=timezone.now())
+            with untracked():
+                yield
+
+        with mock.patch.object(counters, 'deletes_untracked', reopen_first):
+            self.archive()
+        self.assertEqual(Issue.objects.get(pk=reopened.pk).status, 'PENDING')
+        self.assertEqual(list(ArchivedIssue.objects.values_list('id', flat=True)), [archived.id])
+
+    def test_duplicate_targets_wait_for_their_duplicates(self):
+        original = self.make_issue('Old pothole', 'RESOLVED', age_days=60)
+        duplicate = self.make_issue('Same pothole', 'RESOLVED', age_days=60, duplicate_of=original)
+        still_open = self.make_issue('Another pothole', 'RESOLVED', age_days=60)
+        self.make_issue('Open duplicate', 'PENDING', duplicate_of=still_open)
+
+        self.archive()
+
+        self.assertEqual(set(ArchivedIssue.objects.values_list('id', flat=True)), {original.id, duplicate.id})
+        self.assertEqual(ArchivedIssue.objects.get(id=duplicate.id).duplicate_of_id, original.id)
+        self.assertTrue(Issue.objects.filter(id=still_open.id).exists())
+
+    def test_history_merges_the_archive_into_lists(self):
+        for days in (50, 40, 3, 1):
+            self.make_issue(f'Pothole {days}', 'RESOLVED', age_days=days)
+        self.archive()
+        self.client.force_authenticate(self.citizen)
+
+        response = self.client.get(reverse('user_issues'))
+        self.assertEqual([issue['problem'] for issue in response.data['issues']], ['Pothole 1', 'Pothole 3'])
+
+        # Walk the merged list one row per page, both ways
+        problems, params = [], {'history': '1', 'limit': 1}
+        while True:
+            response = self.client.get(reverse('user_issues'), params)
+            problems += [issue['problem'] for issue in response.data['issues']]
+            if not response.data['next_cursor']:
+                break
+            params['cursor'] = response.data['next_cursor']
+        self.assertEqual(problems, ['Pothole 1', 'Pothole 3', 'Pothole 40', 'Pothole 50'])
+        previous = self.client.get(reverse('user_issues'), {**params, 'cursor': response.data['prev_cursor']})
+        self.assertEqual([issue['problem'] for issue in previous.data['issues']], ['Pothole 40'])
+
+        archived = ArchivedIssue.objects.get(problem='Pothole 50')
+        response = self.client.get(reverse('issue_detail', args=[archived.id]))
+        self.assertEqual(response.data['issue']['problem'], 'Pothole 50')
+
+    def test_admin_history_applies_filters_to_both_tables(self):
+        self.make_issue('Old pothole', 'RESOLVED', age_days=60)
+        self.make_issue('Old report', 'REPORT', age_days=60)
+        self.make_issue('New pothole', 'RESOLVED')
+        self.archive()
+        self.client.force_authenticate(self.admin)
+
+        response = self.client.get(reverse('admin_all_issues'), {'status': 'RESOLVED', 'history': 'true'})
+        self.assertEqual([issue['problem'] for issue in response.data['issues']], ['New pothole', 'Old pothole'])
+        without = self.client.get(reverse('admin_all_issues'), {'status': 'RESOLVED'})
+        self.assertEqual(len(without.data['issues']), 1)
+        self.assertNotEqual(response['ETag'], without['ETag'])
+
+
+class NotificationRetentionTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('admin@citycare.com', 'Admin', 'pw', is_admin=True)
+        self.citizen = User.objects.create_user('asha@citycare.com', 'Asha', 'pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.citizen)
+
+    def notify(self, title, target_user=None, age_days=0, expires_in_days=30):
+        notification = Notification.objects.create(title=title, message='Hello', target_user=target_user)
+        sent = timezone.now() - timedelta(days=age_days)
+        Notification.objects.filter(pk=notification.pk).update(
+            created_at=sent, expires_at=sent + timedelta(days=expires_in_days))
+        return notification
+
+    def titles(self):
+        return [row['title'] for row in self.client.get(reverse('get_notifications')).data['notifications']]
+
+    def prune(self, **options):
+        call_command('prune_notifications', stdout=StringIO(), **options)
+
+    def test_expired_notifications_are_hidden_and_pruned(self):
+        for days in range(1, 6):
+            self.notify(f'Expired {days}', self.citizen, age_days=40 + days)
+        self.notify('Live', self.citizen, age_days=1)
+        self.notify('Road closure', age_days=2)
+
+        self.assertEqual(self.titles(), ['Live', 'Road closure'])
+        self.assertEqual(self.client.get(reverse('notifications_unread_count')).data['unread_count'], 2)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.prune(batch_size=2)
+        deletes = [query['sql'] for query in queries if query['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 3)
+        self.assertEqual(set(Notification.objects.values_list('title', flat=True)), {'Live', 'Road closure'})
+
+    @override_settings(NOTIFICATION_MAX_PER_USER=3)
+    def test_cap_bounds_the_window_and_pruning(self):
+        for days in range(1, 5):
+            self.notify(f'Personal {days}', self.citizen, age_days=days * 2)
+            self.notify(f'Global {days}', age_days=days * 2 + 1)
+
+        self.assertEqual(self.titles(), ['Personal 1', 'Global 1', 'Personal 2'])
+        self.assertEqual(self.client.get(reverse('notifications_unread_count')).data['unread_count'], 3)
+
+        self.prune(batch_size=1, since_hours=0)
+        self.assertEqual(set(Notification.objects.values_list('title', flat=True)), {
+            'Personal 1', 'Personal 2', 'Personal 3', 'Global 1', 'Global 2', 'Global 3'})
+        self.assertEqual(self.titles(), ['Personal 1', 'Global 1', 'Personal 2'])
+
+    @override_settings(NOTIFICATION_MAX_PER_USER=2, NOTIFICATION_PRUNE_LOOKBACK_HOURS=24)
+    def test_only_recently_notified_streams_are_checked_for_the_cap(self):
+        other = User.objects.create_user('ravi@citycare.com', 'Ravi', 'pw')
+        for days in (3, 4, 5):
+            self.notify(f'Quiet {days}', other, age_days=days)
+            self.notify(f'Busy {days}', self.citizen, age_days=days)
+        self.notify('Busy today', self.citizen)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.prune()
+        self.assertFalse(any('GROUP BY' in query['sql'] or 'COUNT(' in query['sql'] for query in queries))
+        self.assertEqual(set(Notification.objects.filter(target_user=self.citizen).values_list('title', flat=True)),
+                         {'Busy today', 'Busy 3'})
+        self.assertEqual(Notification.objects.filter(target_user=other).count(), 3)
+
+    @override_settings(NOTIFICATION_MAX_PER_USER=2)
+    def test_rows_outside_the_window_do_not_pin_the_read_mark(self):
+        self.notify('Dropped out', self.citizen, age_days=5)
+        self.notify('Expired', self.citizen, age_days=40)
+        shown = [self.notify(f'Shown {days}', self.citizen, age_days=days) for days in (2, 1)]
+
+        self.client.post(reverse('mark_notifications_read'), {'ids': [n.id for n in shown]}, format='json')
+        state = NotificationReadState.objects.get(user=self.citizen)
+        self.assertEqual(state.read_through_id, shown[-1].id)
+        self.assertEqual(bytes(state.read_bitmap), b'')
+        self.assertEqual(self.client.get(reverse('notifications_unread_count')).data['unread_count'], 0)
+
+    def test_window_reads_each_stream_through_its_index(self):
+        other = User.objects.create_user('ravi@citycare.com', 'Ravi', 'pw')
+        first = self.notify('Water cut', age_days=1)
+        self.notify('Not yours', other)
+        self.notify('Pothole fixed', self.citizen)
+        self.client.post(reverse('mark_notifications_read'), {'ids': [first.id]}, format='json')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('get_notifications'))
+        selects = [query['sql'] for query in queries if 'FROM "notifications"' in query['sql']]
+        self.assertFalse(any(' OR ' in sql for sql in selects))
+        # One bounded scan per stream, plus the ETag's max(updated_at) over the window's ids
+        self.assertEqual(len([sql for sql in selects if 'LIMIT' in sql]), 2)
+        self.assertEqual(len(selects), 3)
+        self.assertEqual([(row['title'], row['is_read']) for row in response.data['notifications']],
+                         [('Pothole fixed', False), ('Water cut', True)])
+        self.assertEqual(self.client.get(reverse('notifications_unread_count')).data['unread_count'], 1)
+
+        cached = self.client.get(reverse('get_notifications'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_admin_chooses_the_expiry(self):
+        self.client.force_authenticate(self.admin)
+        url = reverse('admin_send_notification')
+        response = self.client.post(url, {'title': 'Marathon', 'message': 'Roads closed Sunday',
+                                          'expires_in_days': 2}, format='json')
+        self.assertEqual(response.status_code, 201)
+        notification = Notification.objects.get(title='Marathon')
+        self.assertEqual(notification.expires_at.date(), (notification.created_at + timedelta(days=2)).date())
+        self.assertEqual(response.data['notification']['expires_at'], notification.expires_at)
+
+        default = self.client.post(url, {'title': 'Survey', 'message': 'Tell us'}, format='json')
+        self.assertEqual(Notification.objects.get(title='Survey').expires_at.date(),
+                         (timezone.now() + timedelta(days=settings.NOTIFICATION_TTL_DAYS)).date())
+        self.assertEqual(default.status_code, 201)
+        for invalid in (0, -3, 'soon'):
+            response = self.client.post(url, {'title': 'Bad', 'message': 'x', 'expires_in_days': invalid},
+                                        format='json')
+            self.assertEqual(response.status_code, 400)
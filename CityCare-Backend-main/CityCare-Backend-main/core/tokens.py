@@ -0,0 +1,110 @@
+"""
+Refresh-token revocation (logout and rotation) without a per-refresh query.
+
+Only revoked ``jti``s are stored, one ``RevokedToken`` row each, kept until
+the token would have expired anyway. Each process holds a Bloom filter of
+the revoked ``jti``s. A refresh first probes the filter, and only a filter
+hit (a revoked token, or a ~1% false positive) is confirmed in the
+database.
+
+The filter picks up revocations made by other processes with an incremental
+``id > last_seen`` query at most every ``TOKEN_BLACKLIST_SYNC_INTERVAL``
+seconds. That interval is the window in which another worker may still
+accept a just-revoked token; set it to 0 to sync on every check. Every
+``TOKEN_BLACKLIST_PURGE_INTERVAL`` seconds a process deletes expired rows and
+rebuilds its filter from what remains. Rotation is made race-free by the
+unique ``jti``: only one refresh can insert the revocation.
+"""
+import threading
+import time
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt import serializers, tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+from .bloom import BloomFilter
+from .models import RevokedToken
+
+
+class RevocationList:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._last_id = 0
+        self._synced_at = 0.0
+        self._purged_at = time.monotonic()
+
+    def _rebuild(self):
+        rows = list(RevokedToken.objects.filter(expires_at__gt=timezone.now()).values_list('id', 'jti'))
+        bloom = BloomFilter(max(settings.TOKEN_BLACKLIST_BLOOM_CAPACITY, 2 * len(rows)),
+                            settings.TOKEN_BLACKLIST_BLOOM_ERROR_RATE)
+        for _, jti in rows:
+            bloom.add(jti)
+        # Rows newer than the snapshot are picked up by the next incremental sync
+        self._bloom = bloom
+        self._last_id = max((row_id for row_id, _ in rows), default=self._last_id)
+
+    def _sync(self):
+        now = time.monotonic()
+        if now - self._purged_at >= settings.TOKEN_BLACKLIST_PURGE_INTERVAL:
+            self._purged_at = now
+            purge_expired()
+            self._bloom = None
+        if self._bloom is None or self._bloom.full:
+            self._rebuild()
+            self._synced_at = now
+        elif now - self._synced_at >= settings.TOKEN_BLACKLIST_SYNC_INTERVAL:
+            for row_id, jti in RevokedToken.objects.filter(id__gt=self._last_id).values_list('id', 'jti'):
+                self._bloom.add(jti)
+                self._last_id = max(self._last_id, row_id)
+            self._synced_at = now
+
+    def is_revoked(self, jti):
+        with self._lock:
+            self._sync()
+            maybe_revoked = jti in self._bloom
+        return maybe_revoked and RevokedToken.objects.filter(jti=jti).exists()
+
+    def revoke(self, jti, expires_at):
+        """Record a revocation; False if the jti was already revoked"""
+        _, created = RevokedToken.objects.get_or_create(jti=jti, defaults={'expires_at': expires_at})
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+        return created
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+            self._last_id = 0
+
+
+revocations = RevocationList()
+
+
+def purge_expired():
+    """Delete revocations of tokens that have expired anyway; returns the count"""
+    deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+class RefreshToken(tokens.RefreshToken):
+    """simplejwt's RefreshToken checked against ``revocations`` instead of the token_blacklist app"""
+
+    def verify(self, *args, **kwargs):
+        self.check_blacklist()
+        super().verify(*args, **kwargs)
+
+    def check_blacklist(self):
+        if revocations.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError('Token is blacklisted')
+
+    def blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if not revocations.revoke(jti, datetime_from_epoch(self.payload['exp'])):
+            raise TokenError('Token is blacklisted')
+
+
+class TokenRefreshSerializer(serializers.TokenRefreshSerializer):
+    token_class = RefreshToken
@@ -16,15 +16,28 @@ urlpatterns = [
     # -------------------------------
     path('issues/report/', views.report_issue, name='report_issue'),
     path('issues/user/', views.user_issues, name='user_issues'),
+    path('issues/nearby/', views.issues_nearby, name='issues_nearby'),
+    path('issues/bbox/', views.issues_in_bbox, name='issues_in_bbox'),
+    path('issues/<int:issue_id>/', views.issue_detail, name='issue_detail'),
     path('notifications/', views.get_notifications, name='get_notifications'),
+    path('notifications/unread-count/', views.notifications_unread_count, name='notifications_unread_count'),
+    path('notifications/read/', views.mark_notifications_read, name='mark_notifications_read'),
     path('feedback/submit/', views.submit_feedback, name='submit_feedback'),
+    path('events/', views.event_stream, name='event_stream'),
 
     # -------------------------------
     # 🧑‍💼 Admin Routes
     # -------------------------------
     path('admin/issues/', views.admin_all_issues, name='admin_all_issues'),
+    path('admin/issues/stats/', views.admin_issue_stats, name='admin_issue_stats'),
+    path('admin/issues/search/', views.admin_search_issues, name='admin_search_issues'),
     path('admin/issues/<int:issue_id>/status/', views.admin_change_issue_status, name='admin_change_issue_status'),
+    path('admin/issues/status/bulk/', views.admin_bulk_change_issue_status, name='admin_bulk_change_issue_status'),
+    path('admin/issues/import/', views.admin_import_issues, name='admin_import_issues'),
     path('admin/feedback/', views.admin_view_feedback, name='admin_view_feedback'),
     path('admin/notifications/', views.admin_all_notifications, name='admin_all_notifications'),
     path('admin/notifications/send/', views.admin_send_notification, name='admin_send_notification'),
+    path('admin/export/<str:resource>/', views.admin_export, name='admin_export'),
+    path('admin/profiles/', views.admin_profiles, name='admin_profiles'),
+    path('admin/profiles/<str:profile_id>/', views.admin_profile_detail, name='admin_profile_detail'),
 ]
@@ -0,0 +1,80 @@
+"""
+Bounded in-process cache of user rows for JWT authentication.
+
+Authenticated requests only need the user's own row, yet simplejwt loads it
+with a SELECT on every request. This LRU/TTL cache keeps the column values of
+recently seen users keyed by id and builds a fresh ``User`` instance from
+them per request, so views can still mutate and save ``request.user``.
+
+Entries are dropped when the user is saved or deleted (see ``signals``), and
+again once that transaction commits. The cache is per process: another worker
+can serve a stale row (e.g. a just-deactivated user) for at most
+``AUTH_USER_CACHE_TTL`` seconds. Writes through ``QuerySet.update()`` bypass
+the signals and are bounded by the same TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from .models import User
+
+_ATTNAMES = tuple(field.attname for field in User._meta.concrete_fields)
+
+
+class UserCache:
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        # Bumped on every invalidation so a lookup that raced a write is not cached
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        """A fresh User for ``user_id``, or None if the user does not exist"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return User.from_db(DEFAULT_DB_ALIAS, _ATTNAMES, entry[1])
+            self.misses += 1
+            generation = self._generation
+
+        values = User.objects.filter(id=user_id).values_list(*_ATTNAMES).first()
+        if values is None:
+            return None
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[user_id] = (now + self.ttl, values)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return User.from_db(DEFAULT_DB_ALIAS, _ATTNAMES, values)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+user_cache = UserCache(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL)
+
+
+def invalidate_user(user_id):
+    """Drop a user's cached row now and again when the current transaction commits"""
+    user_cache.invalidate(user_id)
+    transaction.on_commit(lambda: user_cache.invalidate(user_id))
@@ -1,26 +1,28 @@
-from django.core.mail import send_mail
-from django.conf import settings
 from django.template.loader import render_to_string
 from .models import Notification
+from .outbox import enqueue_email
+from .events import publish_notification
 
-def send_issue_status_email(issue, status):
-    """Send email notification when issue status changes"""
+STATUS_NOTIFY = ['RESOLVED', 'REPORT']
+
+def issue_status_email(user_name, problem, location, status, updated_at):
+    """Build the (subject, message) of a status change email, or None"""
     subject_map = {
-        'RESOLVED': f'Issue Resolved: {issue.problem}',
-        'REPORT': f'Issue Report: {issue.problem}',
+        'RESOLVED': f'Issue Resolved: {problem}',
+        'REPORT': f'Issue Report: {problem}',
     }
     
     message_map = {
         'RESOLVED': f"""
-Dear {issue.user.name},
+Dear {user_name},
 
 Great news! Your reported issue has been resolved.
 
 Issue Details:
-- Problem: {issue.problem}
-- Location: {issue.location}
-- Status: {issue.status}
-- Resolved on: {issue.updated_at.strftime('%Y-%m-%d %H:%M:%S')}
+- Problem: {problem}
+- Location: {location}
+- Status: {status}
+- Resolved on: {updated_at.strftime('%Y-%m-%d %H:%M:%S')}
 
 Thank you for helping make our city better!
 
@@ -28,15 +30,15 @@ Best regards,
 City Care Team
         """,
         'REPORT': f"""
-Dear {issue.user.name},
+Dear {user_name},
 
 We have reviewed your reported issue and need to inform you about the following:
 
 Issue Details:
-- Problem: {issue.problem}
-- Location: {issue.location}
-- Status: {issue.status}
-- Updated on: {issue.updated_at.strftime('%Y-%m-%d %H:%M:%S')}
+- Problem: {problem}
+- Location: {location}
+- Status: {status}
+- Updated on: {updated_at.strftime('%Y-%m-%d %H:%M:%S')}
 
 Please contact us if you have any questions or need clarification.
 
@@ -46,27 +48,38 @@ City Care Team
     }
     
     if status in subject_map:
-        try:
-            send_mail(
-                subject=subject_map[status],
-                message=message_map[status],
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[issue.user.email],
-                fail_silently=False,
-            )
-        except Exception as e:
-            print(f"Failed to send email: {e}")
-
-def create_notification(title, message, target_user=None):
-    """Create a notification"""
-    return Notification.objects.create(
+        return subject_map[status], message_map[status]
+    return None
+
+def issue_status_notification(problem, location, status):
+    """Build the (title, message) of a status change notification"""
+    title = f"Issue {status.title()}: {problem}"
+    if status == 'RESOLVED':
+        message = f"Your reported issue '{problem}' at {location} has been resolved. Thank you for helping make our city better!"
+    else:  # REPORT
+        message = f"Your reported issue '{problem}' at {location} has been marked as a report. Please contact us for more information."
+    return title, message
+
+def send_issue_status_email(issue, status):
+    """Queue an email notification when issue status changes"""
+    email = issue_status_email(issue.user.name, issue.problem, issue.location, status, issue.updated_at)
+    if email:
+        enqueue_email(*email, issue.user.email)
+
+def create_notification(title, message, target_user=None, expires_at=None):
+    """Create a notification (expiring after NOTIFICATION_TTL_DAYS by default) and push it to connected clients"""
+    extra = {'expires_at': expires_at} if expires_at else {}
+    notification = Notification.objects.create(
         title=title,
         message=message,
-        target_user=target_user
+        target_user=target_user,
+        **extra
     )
+    publish_notification(notification)
+    return notification
 
 def send_password_reset_email(user, new_password):
-    """Send password reset email"""
+    """Queue password reset email"""
     subject = 'City Care - Password Reset'
     message = f"""
 Dear {user.name},
@@ -81,13 +94,4 @@ Best regards,
 City Care Team
     """
     
-    try:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            fail_silently=False,
-        )
-    except Exception as e:
-        print(f"Failed to send password reset email: {e}")
\ No newline at end of file
+    enqueue_email(subject, message, user.email)
\ No newline at end of file
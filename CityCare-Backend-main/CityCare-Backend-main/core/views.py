@@ -1,22 +1,55 @@
+import asyncio
+import hmac
 import json
 import random
 import string
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
 from django.shortcuts import get_object_or_404
-from django.contrib.auth import authenticate
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
+from django.conf import settings
+from django.utils import timezone
 from django.views.decorators.http import require_http_methods
-from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db import IntegrityError, transaction
+from django.db.models import Max
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
+from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from .models import User, Issue, Notification, Feedback
+from .models import User, Issue, Notification, Feedback, ArchivedIssue
+from .tokens import RefreshToken
+from . import counters, hashing
+from .hashing import HashingBusy
+from .dedupe import check_new_issue, duplicate_row
+from .bulk import change_status, BulkStatusError
+from .imports import IssueImporter, iter_rows
 from .permissions import IsAdminUser, IsOwnerOrAdmin
-from .utils import send_issue_status_email, create_notification, send_password_reset_email
+from .utils import (
+    send_issue_status_email, create_notification, send_password_reset_email,
+    issue_status_email, issue_status_notification, STATUS_NOTIFY,
+)
+from .pagination import paginate_keyset, parse_limit, CursorError
+from .search import search_issues
+from .geo import GeoError, validate_point, covering_cells, cells_q, radius_box, distance_m
+from .filters import issue_filter_q, FilterError
+from .exports import streaming_export, EXPORTS, EXPORT_FORMATS
+from .authentication import authenticate_jwt
+from .routers import replica_reads
+from .events import hub, publish_issue_status
+from .archive import history_querysets, archive_validators
+from .retention import window as notification_window
+from . import metrics as request_metrics, profiling
+from .conditional import Validators, list_validators, not_modified, with_validators
+from .read_state import ReadSet, unread_count, mark_read, mark_all_read
+from .projections import (
+    ISSUE_FIELDS, ISSUE_USER_FIELDS, ISSUE_LAT, ISSUE_LON, ISSUE_USER_ID, issue_values, issue_row,
+    map_issue_values, map_issue_row,
+    feedback_values, feedback_row, issue_projection, notification_projection, FieldsetError,
+)
 
 def generate_random_password(length=8):
     """Generate a random password"""
@@ -31,80 +64,101 @@ def get_tokens_for_user(user):
         'access': str(refresh.access_token),
     }
 
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def register(request):
-    """User registration"""
+def _request_data(request):
+    """JSON or form body of a plain (non-DRF) view, or None if it cannot be parsed"""
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST
+
+def _hashing_busy():
+    response = JsonResponse({'error': 'Server is busy, please retry shortly'}, status=503)
+    response['Retry-After'] = '1'
+    return response
+
+def _user_data(user):
+    return {
+        'id': user.id,
+        'name': user.name,
+        'email': user.email,
+        'is_admin': user.is_admin
+    }
+
+@csrf_exempt
+@require_http_methods(['POST'])
+async def register(request):
+    """User registration (password hashed on the worker pool)"""
     try:
-        data = request.data
+        data = _request_data(request)
+        if data is None:
+            return JsonResponse({'error': 'Invalid request body'}, status=400)
         name = data.get('name')
         email = data.get('email')
         password = data.get('password')
         is_admin = data.get('is_admin', False)
 
         if not all([name, email, password]):
-            return Response({'error': 'Name, email, and password are required'}, 
-                          status=status.HTTP_400_BAD_REQUEST)
-
-        if User.objects.filter(email=email).exists():
-            return Response({'error': 'Email already exists'}, 
-                          status=status.HTTP_400_BAD_REQUEST)
+            return JsonResponse({'error': 'Name, email, and password are required'}, status=400)
 
-        user = User.objects.create_user(
-            email=email,
-            name=name,
-            password=password,
-            is_admin=is_admin
-        )
+        email = User.objects.normalize_email(email)
+        if await User.objects.filter(email=email).aexists():
+            return JsonResponse({'error': 'Email already exists'}, status=400)
 
-        tokens = get_tokens_for_user(user)
-
-        return Response({
+        try:
+            user = await User.objects.acreate(
+                email=email,
+                name=name,
+                password=await hashing.amake_password(password),
+                is_admin=is_admin
+            )
+        except IntegrityError:
+            return JsonResponse({'error': 'Email already exists'}, status=400)
+
+        tokens = await sync_to_async(get_tokens_for_user)(user)
+
+        return JsonResponse({
             'message': 'User registered successfully',
-            'user': {
-                'id': user.id,
-                'name': user.name,
-                'email': user.email,
-                'is_admin': user.is_admin
-            },
+            'user': _user_data(user),
             'tokens': tokens
-        }, status=status.HTTP_201_CREATED)
+        }, status=201)
 
+    except HashingBusy:
+        return _hashing_busy()
     except Exception as e:
-        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return JsonResponse({'error': str(e)}, status=500)
 
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def login_view(request):
-    """User login"""
+@csrf_exempt
+@require_http_methods(['POST'])
+async def login_view(request):
+    """User login (password checked on the worker pool)"""
     try:
-        data = request.data
+        data = _request_data(request)
+        if data is None:
+            return JsonResponse({'error': 'Invalid request body'}, status=400)
         email = data.get('email')
         password = data.get('password')
 
         if not all([email, password]):
-            return Response({'error': 'Email and password are required'}, 
-                          status=status.HTTP_400_BAD_REQUEST)
+            return JsonResponse({'error': 'Email and password are required'}, status=400)
 
-        user = authenticate(username=email, password=password)
-        if user:
-            tokens = get_tokens_for_user(user)
-            return Response({
+        user = await User.objects.filter(email=email).afirst()
+        if await hashing.averify_password(user, password):
+            tokens = await sync_to_async(get_tokens_for_user)(user)
+            return JsonResponse({
                 'message': 'Login successful',
-                'user': {
-                    'id': user.id,
-                    'name': user.name,
-                    'email': user.email,
-                    'is_admin': user.is_admin
-                },
+                'user': _user_data(user),
                 'tokens': tokens
             })
         else:
-            return Response({'error': 'Invalid credentials'}, 
-                          status=status.HTTP_401_UNAUTHORIZED)
+            return JsonResponse({'error': 'Invalid credentials'}, status=401)
 
+    except HashingBusy:
+        return _hashing_busy()
     except Exception as e:
-        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return JsonResponse({'error': str(e)}, status=500)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -123,36 +177,40 @@ def logout_view(request):
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def forgot_password(request):
+def _reset_password(user, hashed_password, new_password):
+    # Save the new password and queue the email in the same transaction
+    user.password = hashed_password
+    with transaction.atomic():
+        user.save()
+        send_password_reset_email(user, new_password)
+
+@csrf_exempt
+@require_http_methods(['POST'])
+async def forgot_password(request):
     """Send new password via email"""
     try:
-        data = request.data
+        data = _request_data(request)
+        if data is None:
+            return JsonResponse({'error': 'Invalid request body'}, status=400)
         email = data.get('email')
 
         if not email:
-            return Response({'error': 'Email is required'}, 
-                          status=status.HTTP_400_BAD_REQUEST)
+            return JsonResponse({'error': 'Email is required'}, status=400)
 
-        try:
-            user = User.objects.get(email=email)
-        except User.DoesNotExist:
-            return Response({'error': 'User not found'}, 
-                          status=status.HTTP_404_NOT_FOUND)
+        user = await User.objects.filter(email=email).afirst()
+        if user is None:
+            return JsonResponse({'error': 'User not found'}, status=404)
 
-        # Generate new password
         new_password = generate_random_password()
-        user.set_password(new_password)
-        user.save()
-
-        # Send email
-        send_password_reset_email(user, new_password)
+        hashed_password = await hashing.amake_password(new_password)
+        await sync_to_async(_reset_password)(user, hashed_password, new_password)
 
-        return Response({'message': 'New password sent to your email'})
+        return JsonResponse({'message': 'New password sent to your email'})
 
+    except HashingBusy:
+        return _hashing_busy()
     except Exception as e:
-        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return JsonResponse({'error': str(e)}, status=500)
 
 @api_view(['PUT'])
 @permission_classes([IsAuthenticated])
@@ -172,7 +230,7 @@ def edit_profile(request):
             user.email = data['email']
         
         if 'password' in data:
-            user.set_password(data['password'])
+            user.password = hashing.make_password(data['password'])
 
         user.save()
 
@@ -186,6 +244,9 @@ def edit_profile(request):
             }
         })
 
+    except HashingBusy:
+        return Response({'error': 'Server is busy, please retry shortly'},
+                      status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '1'})
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -204,13 +265,26 @@ def report_issue(request):
             return Response({'error': 'All fields are required'}, 
                           status=status.HTTP_400_BAD_REQUEST)
 
-        issue = Issue.objects.create(
-            user=request.user,
-            problem=problem,
-            problem_type=problem_type,
-            location=location,
-            description=description
-        )
+        # Optional coordinates (both or neither)
+        lat, lon = data.get('lat'), data.get('lon')
+        if (lat is None) != (lon is None):
+            return Response({'error': 'Provide both lat and lon'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        if lat is not None:
+            lat, lon = validate_point(lat, lon)
+
+        with transaction.atomic():
+            issue = Issue.objects.create(
+                user=request.user,
+                problem=problem,
+                problem_type=problem_type,
+                location=location,
+                description=description,
+                lat=lat,
+                lon=lon
+            )
+            counters.record_created(issue)
+            duplicates = check_new_issue(issue)
 
         return Response({
             'message': 'Issue reported successfully',
@@ -221,55 +295,215 @@ def report_issue(request):
                 'location': issue.location,
                 'description': issue.description,
                 'status': issue.status,
-                'date': issue.date.isoformat()
-            }
+                'lat': issue.lat,
+                'lon': issue.lon,
+                'duplicate_of': issue.duplicate_of_id,
+                'date': issue.date
+            },
+            'possible_duplicates': [duplicate_row(match) for match in duplicates]
         }, status=status.HTTP_201_CREATED)
 
+    except GeoError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@replica_reads
 def user_issues(request):
-    """Get all issues reported by the user"""
+    """Get issues reported by the user, newest first (?cursor=&limit=&fields=&history=1)"""
     try:
+        projection = issue_projection(request.GET.get('fields'))
         issues = Issue.objects.filter(user=request.user)
-        
-        issues_data = [{
-            'id': issue.id,
-            'problem': issue.problem,
-            'problem_type': issue.problem_type,
-            'location': issue.location,
-            'description': issue.description,
-            'status': issue.status,
-            'date': issue.date.isoformat(),
-            'created_at': issue.created_at.isoformat()
-        } for issue in issues]
+        archived = history_querysets(request, user=request.user)
+        validators = list_validators(request, issues, 'updated_at', request.user.id,
+                                     *archive_validators(archived))
+        cached = not_modified(request, validators)
+        if cached:
+            return cached
+
+        issues, next_cursor, prev_cursor = paginate_keyset(
+            projection.values(issues), request, projection.key, [projection.values(rows) for rows in archived])
+
+        issues_data = [projection.row(issue) for issue in issues]
+
+        return with_validators(Response({
+            'issues': issues_data,
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor
+        }), validators)
+
+    except (CursorError, FieldsetError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def issue_detail(request, issue_id):
+    """Get a single issue (owner or admin)"""
+    try:
+        issue = Issue.objects.filter(id=issue_id).values_list(
+            *ISSUE_FIELDS, *ISSUE_USER_FIELDS, 'updated_at').first()
+        if issue is None:
+            issue = ArchivedIssue.objects.filter(id=issue_id).values_list(
+                *ISSUE_FIELDS, *ISSUE_USER_FIELDS, 'updated_at').first()
+
+        if issue is None or (not request.user.is_admin and issue[ISSUE_USER_ID] != request.user.id):
+            return Response({'error': 'Issue not found'},
+                          status=status.HTTP_404_NOT_FOUND)
+
+        validators = Validators(issue[-1], issue[0])
+        cached = not_modified(request, validators)
+        if cached:
+            return cached
+
+        return with_validators(Response({'issue': issue_row(issue)}), validators)
+
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+NEARBY_DEFAULT_RADIUS = 500
+NEARBY_MAX_RADIUS = 5000
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def issues_nearby(request):
+    """
+    Get issues within ?radius= metres of ?lat=&lon=, nearest first. Other
+    citizens' issues only show their public fields (see map_issue_row).
+    """
+    try:
+        lat, lon = validate_point(request.GET.get('lat'), request.GET.get('lon'))
+        try:
+            radius = float(request.GET.get('radius', NEARBY_DEFAULT_RADIUS))
+        except ValueError:
+            radius = -1
+        if not 0 < radius <= NEARBY_MAX_RADIUS:
+            return Response({'error': f'Radius must be between 0 and {NEARBY_MAX_RADIUS} metres'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        limit = parse_limit(request.GET.get('limit'))
+
+        cells = covering_cells(*radius_box(lat, lon, radius))
+        candidates = map_issue_values(Issue.objects.filter(cells_q(cells)))
+
+        matches = []
+        for issue in candidates.iterator():
+            distance = distance_m(lat, lon, issue[ISSUE_LAT], issue[ISSUE_LON])
+            if distance <= radius:
+                matches.append((distance, issue))
+        matches.sort(key=lambda match: match[0])
+
+        issues_data = []
+        for distance, issue in matches[:limit]:
+            row = map_issue_row(issue, request.user)
+            row['distance_m'] = round(distance, 1)
+            issues_data.append(row)
 
         return Response({'issues': issues_data})
 
+    except (GeoError, CursorError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def issues_in_bbox(request):
+    """Get issues inside ?min_lat=&min_lon=&max_lat=&max_lon=, newest first (as issues_nearby shows them)"""
+    try:
+        min_lat, min_lon = validate_point(request.GET.get('min_lat'), request.GET.get('min_lon'))
+        max_lat, max_lon = validate_point(request.GET.get('max_lat'), request.GET.get('max_lon'))
+        if min_lat > max_lat or min_lon > max_lon:
+            return Response({'error': 'Minimum bounds must not exceed maximum bounds'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        limit = parse_limit(request.GET.get('limit'))
+
+        cells = covering_cells(min_lat, min_lon, max_lat, max_lon)
+        issues = map_issue_values(Issue.objects.filter(
+            cells_q(cells),
+            lat__gte=min_lat, lat__lte=max_lat,
+            lon__gte=min_lon, lon__lte=max_lon,
+        )).order_by('-created_at', '-id')[:limit]
+
+        return Response({'issues': [map_issue_row(issue, request.user) for issue in issues]})
+
+    except (GeoError, CursorError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@replica_reads
 def get_notifications(request):
-    """Get user notifications (global + personal)"""
+    """Get user notifications (global + personal) with read state (?fields=)"""
     try:
-        # Get personal notifications and global notifications
-        notifications = Notification.objects.filter(
-            Q(target_user=request.user) | Q(target_user__isnull=True)
-        )
+        projection = notification_projection(request.GET.get('fields'), computed=('is_read',))
+
+        # The newest live notifications of the personal and global streams
+        notifications = notification_window(request.user, projection.values, projection.key)
+
+        read_set = ReadSet.for_user(request.user)
+        ids = [row[0] for row in notifications]
+        latest = Notification.objects.filter(id__in=ids).aggregate(latest=Max('updated_at'))['latest']
+        validators = Validators(latest, ','.join(map(str, ids)), request.GET.urlencode(), request.user.id,
+                                read_set.fingerprint(), dated=False)
+        cached = not_modified(request, validators)
+        if cached:
+            return cached
+
+        with_read_state = projection.wants('is_read')
+        notifications_data = []
+        for notification in notifications:
+            row = projection.row(notification)
+            if with_read_state:
+                row['is_read'] = notification[0] in read_set
+            notifications_data.append(row)
+
+        return with_validators(Response({'notifications': notifications_data}), validators)
+
+    except FieldsetError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        notifications_data = [{
-            'id': notification.id,
-            'title': notification.title,
-            'message': notification.message,
-            'is_global': notification.is_global,
-            'created_at': notification.created_at.isoformat()
-        } for notification in notifications]
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def notifications_unread_count(request):
+    """Get the number of unread notifications (for badge polling)"""
+    try:
+        return Response({'unread_count': unread_count(request.user)})
 
-        return Response({'notifications': notifications_data})
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def mark_notifications_read(request):
+    """Mark notifications read: {"ids": [...]} or {"all": true}"""
+    try:
+        data = request.data
+        ids = data.get('ids')
+
+        if data.get('all'):
+            mark_all_read(request.user)
+        elif isinstance(ids, list) and ids:
+            try:
+                ids = [int(notification_id) for notification_id in ids]
+            except (TypeError, ValueError):
+                return Response({'error': 'Notification ids must be integers'},
+                              status=status.HTTP_400_BAD_REQUEST)
+            mark_read(request.user, ids)
+        else:
+            return Response({'error': 'Provide a list of ids or all=true'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'message': 'Notifications marked as read',
+            'unread_count': unread_count(request.user)
+        })
 
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -305,7 +539,7 @@ def submit_feedback(request):
                 'id': feedback.id,
                 'issue_id': feedback.issue.id,
                 'feedback_text': feedback.feedback_text,
-                'created_at': feedback.created_at.isoformat()
+                'created_at': feedback.created_at
             }
         }, status=status.HTTP_201_CREATED)
 
@@ -316,33 +550,99 @@ def submit_feedback(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdminUser])
+@replica_reads
 def admin_all_issues(request):
-    """Admin: Get all issues with filters"""
+    """Admin: Get all issues, filtered by status/problem_type/date range, newest first (?cursor=&limit=&fields=&history=1)"""
     try:
-        status_filter = request.GET.get('status', '')
-        issues = Issue.objects.all()
+        projection = issue_projection(request.GET.get('fields'), with_user=True)
+        filters = issue_filter_q(request.GET)
+        issues = Issue.objects.filter(filters)
+        archived = history_querysets(request, filters)
+        # Rows show the reporter's name and email
+        validators = list_validators(request, issues, 'updated_at',
+                                     *archive_validators(archived, related=('user__updated_at',)),
+                                     related=('user__updated_at',))
+        cached = not_modified(request, validators)
+        if cached:
+            return cached
+
+        issues, next_cursor, prev_cursor = paginate_keyset(
+            projection.values(issues), request, projection.key, [projection.values(rows) for rows in archived])
+
+        issues_data = [projection.row(issue) for issue in issues]
+
+        return with_validators(Response({
+            'issues': issues_data,
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor
+        }), validators)
+
+    except (CursorError, FilterError, FieldsetError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        if status_filter:
-            issues = issues.filter(status=status_filter)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def admin_search_issues(request):
+    """Admin: Ranked full-text search over problem, location and description (?q=&page=&limit=)"""
+    try:
+        query = request.GET.get('q', '').strip()
+        if not query:
+            return Response({'error': 'Search query is required'},
+                          status=status.HTTP_400_BAD_REQUEST)
 
-        issues_data = [{
-            'id': issue.id,
-            'user': {
-                'id': issue.user.id,
-                'name': issue.user.name,
-                'email': issue.user.email
-            },
-            'problem': issue.problem,
-            'problem_type': issue.problem_type,
-            'location': issue.location,
-            'description': issue.description,
-            'status': issue.status,
-            'date': issue.date.isoformat(),
-            'created_at': issue.created_at.isoformat()
-        } for issue in issues]
+        limit = parse_limit(request.GET.get('limit'))
+        try:
+            page = int(request.GET.get('page', 1))
+        except ValueError:
+            page = 0
+        if page < 1:
+            return Response({'error': 'Invalid page'},
+                          status=status.HTTP_400_BAD_REQUEST)
 
-        return Response({'issues': issues_data})
+        issues = search_issues(query, limit + 1, (page - 1) * limit)
 
+        return Response({
+            'issues': [issue_row(issue) for issue in issues[:limit]],
+            'page': page,
+            'has_more': len(issues) > limit
+        })
+
+    except CursorError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def admin_issue_stats(request):
+    """Admin: Issue totals by status and problem type"""
+    try:
+        return Response(counters.dashboard_stats())
+
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def admin_export(request, resource):
+    """Admin: Stream issues, feedback or notifications as NDJSON or CSV"""
+    try:
+        if resource not in EXPORTS:
+            return Response({'error': 'Unknown export'},
+                          status=status.HTTP_404_NOT_FOUND)
+
+        export_format = request.GET.get('output', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response({'error': 'Output must be ndjson or csv'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        return streaming_export(resource, request.GET, export_format,
+                                asynchronous=isinstance(request._request, ASGIRequest))
+
+    except FilterError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -362,29 +662,29 @@ def admin_change_issue_status(request, issue_id):
             return Response({'error': 'Invalid status'}, 
                           status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            issue = Issue.objects.get(id=issue_id)
-        except Issue.DoesNotExist:
-            return Response({'error': 'Issue not found'}, 
-                          status=status.HTTP_404_NOT_FOUND)
+        with transaction.atomic():
+            try:
+                issue = Issue.objects.select_for_update().get(id=issue_id)
+            except Issue.DoesNotExist:
+                return Response({'error': 'Issue not found'}, 
+                              status=status.HTTP_404_NOT_FOUND)
 
-        old_status = issue.status
-        issue.status = new_status
-        issue.save()
+            old_status = issue.status
+            issue.status = new_status
+            issue.save()
+            counters.record_changed(old_status, issue.problem_type, new_status, issue.problem_type)
 
-        # Send email and notification for RESOLVED and REPORT status
-        if new_status in ['RESOLVED', 'REPORT']:
-            # Send email
-            send_issue_status_email(issue, new_status)
-            
-            # Create notification
-            notification_title = f"Issue {new_status.title()}: {issue.problem}"
-            if new_status == 'RESOLVED':
-                notification_message = f"Your reported issue '{issue.problem}' at {issue.location} has been resolved. Thank you for helping make our city better!"
-            else:  # REPORT
-                notification_message = f"Your reported issue '{issue.problem}' at {issue.location} has been marked as a report. Please contact us for more information."
+            # Send email and notification for RESOLVED and REPORT status
+            if new_status in STATUS_NOTIFY:
+                # Queue email (delivered by the send_outbox worker)
+                send_issue_status_email(issue, new_status)
             
-            create_notification(notification_title, notification_message, issue.user)
+                # Create notification
+                notification_title, notification_message = issue_status_notification(
+                    issue.problem, issue.location, new_status)
+                create_notification(notification_title, notification_message, issue.user)
+
+            publish_issue_status(issue, old_status)
 
         return Response({
             'message': 'Issue status updated successfully',
@@ -398,57 +698,126 @@ def admin_change_issue_status(request, issue_id):
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def admin_bulk_change_issue_status(request):
+    """Admin: Change the status of many issues: {"status", "ids": [...]} or {"status", "filter": {...}}"""
+    try:
+        data = request.data
+        new_status = data.get('status')
+        ids = data.get('ids')
+        filters = data.get('filter')
+
+        if new_status not in ['PENDING', 'IN_PROGRESS', 'RESOLVED', 'REPORT']:
+            return Response({'error': 'Invalid status'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        if ids is not None and not isinstance(ids, list):
+            return Response({'error': 'Issue ids must be a list'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        requested_ids = []
+        if ids:
+            try:
+                requested_ids = [int(issue_id) for issue_id in ids]
+            except (TypeError, ValueError):
+                return Response({'error': 'Issue ids must be integers'},
+                              status=status.HTTP_400_BAD_REQUEST)
+            issues = Issue.objects.filter(id__in=requested_ids)
+        elif isinstance(filters, dict) and filters:
+            issues = Issue.objects.filter(issue_filter_q(filters))
+        else:
+            return Response({'error': 'Provide a list of ids or a filter'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        rows = change_status(issues, new_status)
+        found = {row['id'] for row in rows}
+
+        return Response({
+            'message': 'Issue statuses updated successfully',
+            'status': new_status,
+            'updated': len(rows),
+            'issues': [{'id': row['id'], 'old_status': row['status']} for row in rows],
+            'not_found': [issue_id for issue_id in requested_ids if issue_id not in found]
+        })
+
+    except (BulkStatusError, FilterError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+IMPORT_ERRORS_RETURNED = 100
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def admin_import_issues(request):
+    """Admin: Bulk import issues from an uploaded CSV or NDJSON file (multipart field "file")"""
+    try:
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'File is required'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        file_format = request.data.get('file_format') or (
+            'ndjson' if upload.name.endswith(('.ndjson', '.jsonl')) else 'csv')
+        if file_format not in ('csv', 'ndjson'):
+            return Response({'error': 'File format must be csv or ndjson'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        importer = IssueImporter(max_errors_kept=IMPORT_ERRORS_RETURNED)
+        importer.run(iter_rows(upload, file_format))
+
+        return Response({
+            'message': 'Import finished',
+            **importer.summary(),
+            'errors': importer.errors
+        }, status=status.HTTP_201_CREATED)
+
+    except UnicodeDecodeError:
+        return Response({'error': 'File must be UTF-8 encoded'},
+                      status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdminUser])
+@replica_reads
 def admin_view_feedback(request):
     """Admin: View all feedback on issues"""
     try:
-        feedback_list = Feedback.objects.all().select_related('issue', 'user')
+        feedback_list = Feedback.objects.all()
+        validators = list_validators(request, feedback_list, 'updated_at',
+                                     related=('issue__updated_at', 'user__updated_at'))
+        cached = not_modified(request, validators)
+        if cached:
+            return cached
 
-        feedback_data = [{
-            'id': feedback.id,
-            'issue': {
-                'id': feedback.issue.id,
-                'problem': feedback.issue.problem,
-                'location': feedback.issue.location,
-                'status': feedback.issue.status
-            },
-            'user': {
-                'id': feedback.user.id,
-                'name': feedback.user.name,
-                'email': feedback.user.email
-            },
-            'feedback_text': feedback.feedback_text,
-            'created_at': feedback.created_at.isoformat()
-        } for feedback in feedback_list]
+        feedback_data = [feedback_row(feedback) for feedback in feedback_values(feedback_list)]
 
-        return Response({'feedback': feedback_data})
+        return with_validators(Response({'feedback': feedback_data}), validators)
 
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdminUser])
+@replica_reads
 def admin_all_notifications(request):
-    """Admin: View all notifications"""
+    """Admin: View all notifications (?fields=)"""
     try:
-        notifications = Notification.objects.all().select_related('target_user')
-
-        notifications_data = [{
-            'id': notification.id,
-            'title': notification.title,
-            'message': notification.message,
-            'target_user': {
-                'id': notification.target_user.id,
-                'name': notification.target_user.name,
-                'email': notification.target_user.email
-            } if notification.target_user else None,
-            'is_global': notification.is_global,
-            'created_at': notification.created_at.isoformat()
-        } for notification in notifications]
-
-        return Response({'notifications': notifications_data})
+        projection = notification_projection(request.GET.get('fields'), with_user=True)
+        notifications = Notification.objects.all()
+        validators = list_validators(request, notifications, 'updated_at', related=('target_user__updated_at',))
+        cached = not_modified(request, validators)
+        if cached:
+            return cached
+
+        notifications_data = [projection.row(notification) for notification in projection.values(notifications)]
 
+        return with_validators(Response({'notifications': notifications_data}), validators)
+
+    except FieldsetError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -461,11 +830,23 @@ def admin_send_notification(request):
         title = data.get('title')
         message = data.get('message')
         target_user_id = data.get('target_user_id')  # Optional, null for global
+        expires_in_days = data.get('expires_in_days')  # Optional, NOTIFICATION_TTL_DAYS by default
 
         if not all([title, message]):
             return Response({'error': 'Title and message are required'}, 
                           status=status.HTTP_400_BAD_REQUEST)
 
+        expires_at = None
+        if expires_in_days is not None:
+            try:
+                expires_in_days = int(expires_in_days)
+            except (TypeError, ValueError):
+                expires_in_days = 0
+            if expires_in_days < 1:
+                return Response({'error': 'expires_in_days must be a positive integer'},
+                              status=status.HTTP_400_BAD_REQUEST)
+            expires_at = timezone.now() + timedelta(days=expires_in_days)
+
         target_user = None
         if target_user_id:
             try:
@@ -474,7 +855,7 @@ def admin_send_notification(request):
                 return Response({'error': 'Target user not found'}, 
                               status=status.HTTP_404_NOT_FOUND)
 
-        notification = create_notification(title, message, target_user)
+        notification = create_notification(title, message, target_user, expires_at)
 
         return Response({
             'message': 'Notification sent successfully',
@@ -483,13 +864,131 @@ def admin_send_notification(request):
                 'title': notification.title,
                 'message': notification.message,
                 'is_global': notification.is_global,
-                'created_at': notification.created_at.isoformat()
+                'created_at': notification.created_at,
+                'expires_at': notification.expires_at
             }
         }, status=status.HTTP_201_CREATED)
 
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+# Push channel
+
+EVENT_STREAM_HEARTBEAT = 15
+LONG_POLL_TIMEOUT = 25
+LONG_POLL_MAX_TIMEOUT = 55
+
+def _format_sse(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+async def _sse_events(subscription):
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), timeout=EVENT_STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            yield _format_sse(event)
+    finally:
+        hub.unsubscribe(subscription)
+
+async def event_stream(request):
+    """Push new notifications and issue status changes (SSE, or long-poll with ?mode=poll)"""
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    user = await sync_to_async(authenticate_jwt)(request, query_token=True)
+    if user is None:
+        return JsonResponse({'error': 'Authentication credentials were not provided or are invalid'},
+                            status=401)
+
+    try:
+        since = request.GET.get('since') or request.META.get('HTTP_LAST_EVENT_ID')
+        since = int(since) if since else None
+        timeout = min(float(request.GET.get('timeout', LONG_POLL_TIMEOUT)), LONG_POLL_MAX_TIMEOUT)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid since or timeout'}, status=400)
+
+    if request.GET.get('mode') != 'poll' and not isinstance(request, ASGIRequest):
+        # A WSGI server would drain the endless stream into memory before sending it
+        return JsonResponse({'error': 'Event streams need the ASGI server; use ?mode=poll'}, status=400)
+
+    subscription = hub.subscribe(user.id, since=since)
+
+    if request.GET.get('mode') != 'poll':
+        response = StreamingHttpResponse(_sse_events(subscription), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    # Long-poll fallback: return as soon as anything is queued, or empty on timeout
+    try:
+        events = subscription.drain()
+        if not events:
+            try:
+                events = [await asyncio.wait_for(subscription.get(), timeout=max(timeout, 0))]
+            except asyncio.TimeoutError:
+                events = []
+            events += subscription.drain()
+    finally:
+        hub.unsubscribe(subscription)
+
+    return JsonResponse({
+        'events': [{'id': event['id'], 'type': event['type'], 'data': event['data']} for event in events],
+        'last_event_id': events[-1]['id'] if events else since
+    })
+
+# Monitoring
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def admin_profiles(request):
+    """Admin: Saved request profiles, newest first (send X-Profile: 1 to record one)"""
+    try:
+        return Response({'profiles': profiling.list_profiles()})
+
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def admin_profile_detail(request, profile_id):
+    """Admin: Download a profile as JSON, or its stacks for flamegraph.pl/speedscope (?output=folded)"""
+    try:
+        profile = profiling.load(profile_id)
+
+        if request.GET.get('output') == 'folded':
+            response = HttpResponse(profiling.folded(profile), content_type='text/plain; charset=utf-8')
+            response['Content-Disposition'] = f'attachment; filename="profile-{profile_id}.folded"'
+            return response
+
+        return Response(profile)
+
+    except profiling.ProfileError as e:
+        return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+def _is_metrics_scraper(request):
+    token = settings.METRICS_SCRAPE_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
+
+@require_http_methods(['GET'])
+def metrics(request):
+    """Request metrics of all workers in Prometheus text format (admins or the scrape token)"""
+    if not _is_metrics_scraper(request):
+        user = authenticate_jwt(request)
+        if user is None:
+            return JsonResponse({'error': 'Authentication credentials were not provided or are invalid'},
+                                status=401)
+        if not user.is_admin:
+            return JsonResponse({'error': 'Admin access required'}, status=403)
+
+    return HttpResponse(request_metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 # Token refresh endpoint
 @api_view(['POST'])
 @permission_classes([AllowAny])